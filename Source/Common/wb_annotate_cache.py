@@ -0,0 +1,249 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_annotate_cache.py
+
+    save the annotation of files so that annotating the same
+    contents again does not need to run the scm annotate command
+
+'''
+import time
+import datetime
+import sqlite3
+
+import wb_platform_specific
+import wb_annotate_node
+
+#
+#   The commit log of an annotated line as saved in the cache.
+#   Provides the parts of a commit log that WbAnnotateModel uses.
+#
+#   When read_commit_message is given only the headline of the
+#   message is saved and the full message is read when first needed.
+#
+class WbAnnotateCacheLogNode:
+    def __init__( self, log_id, id_string, author, timestamp, utc_offset, message, read_commit_message=None ):
+        self.__log_id = log_id
+        self.__id_string = id_string
+        self.__author = author
+        self.__date = datetime.datetime.fromtimestamp( timestamp, datetime.timezone( datetime.timedelta( seconds=utc_offset ) ) )
+        self.__message = message
+        self.__read_commit_message = read_commit_message
+
+    def commitId( self ):
+        return self.__log_id
+
+    def commitIdString( self ):
+        return self.__id_string
+
+    def commitAuthor( self ):
+        return self.__author
+
+    def commitDate( self ):
+        return self.__date
+
+    def commitMessage( self ):
+        if self.__read_commit_message is not None:
+            message = self.__read_commit_message( self.__id_string )
+            if message is not None:
+                self.__message = message
+                self.__read_commit_message = None
+
+        return self.__message
+
+#
+#   One cache is shared by all projects. Each file has one entry
+#   that is replaced when the identity of its contents changes.
+#
+#   The identity is given by the scm backend and must change
+#   whenever the annotation could change, for example the blob id
+#   and the id of the last commit that changed the file.
+#
+#   The least recently used entries are removed when the total
+#   number of lines in the cache is over max_lines.
+#
+#   read_commit_message( id_string ) returns the full message of a commit.
+#   Give it for scms where the message is costly to get while annotating.
+#
+class WbAnnotateCache:
+    version = '1'
+    max_lines = 2*1000*1000
+
+    def __init__( self, app, scm_type, project_path, read_commit_message=None ):
+        self.app = app
+        self.debugLog = self.app.debug_options.debugLogAnnotateCache
+
+        self.filename = wb_platform_specific.getCacheDir() / 'annotate.db'
+
+        self.__scm_type = scm_type
+        self.__project_path = str( project_path )
+        self.__read_commit_message = read_commit_message
+
+    def __connect( self ):
+        if not self.filename.parent.exists():
+            self.filename.parent.mkdir( parents=True )
+
+        db = sqlite3.connect( str( self.filename ) )
+        db.execute( 'CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)' )
+
+        row = db.execute( 'SELECT value FROM info WHERE name = ?', ('version',) ).fetchone()
+        if row is None or row[0] != self.version:
+            with db:
+                db.execute( 'DROP TABLE IF EXISTS annotation' )
+                db.execute( 'DROP TABLE IF EXISTS line' )
+                db.execute( 'DROP TABLE IF EXISTS commit_log' )
+                db.execute( 'INSERT OR REPLACE INTO info (name, value) VALUES (?, ?)', ('version', self.version) )
+
+        db.execute( 'CREATE TABLE IF NOT EXISTS annotation'
+                    ' (id INTEGER PRIMARY KEY, scm_type TEXT, project_path TEXT, path TEXT, identity TEXT,'
+                    ' num_lines INTEGER, last_used REAL, UNIQUE (scm_type, project_path, path))' )
+        db.execute( 'CREATE TABLE IF NOT EXISTS line'
+                    ' (annotation_id INTEGER, line_num INTEGER, line_text TEXT, log_id TEXT, PRIMARY KEY (annotation_id, line_num))' )
+        db.execute( 'CREATE TABLE IF NOT EXISTS commit_log'
+                    ' (annotation_id INTEGER, log_id TEXT, id_string TEXT, author TEXT, timestamp REAL, utc_offset INTEGER, message TEXT,'
+                    ' PRIMARY KEY (annotation_id, log_id))' )
+        return db
+
+    # return (all_annotation_nodes, all_commit_log_nodes) or None if
+    # the annotation of filename with this identity is not in the cache
+    def load( self, filename, identity ):
+        if identity is None or not self.filename.exists():
+            return None
+
+        try:
+            db = self.__connect()
+            try:
+                row = db.execute( 'SELECT id, identity FROM annotation WHERE scm_type = ? AND project_path = ? AND path = ?',
+                                    (self.__scm_type, self.__project_path, str( filename )) ).fetchone()
+                if row is None or row[1] != identity:
+                    self.debugLog( 'load %s %s not cached' % (filename, identity) )
+                    return None
+
+                annotation_id = row[0]
+
+                all_annotation_nodes = [wb_annotate_node.AnnotateNode( line_num, line_text, log_id )
+                                        for line_num, line_text, log_id in
+                                            db.execute( 'SELECT line_num, line_text, log_id FROM line WHERE annotation_id = ? ORDER BY line_num',
+                                                        (annotation_id,) )]
+
+                all_commit_log_nodes = {}
+                for log_id, id_string, author, timestamp, utc_offset, message in db.execute(
+                            'SELECT log_id, id_string, author, timestamp, utc_offset, message FROM commit_log WHERE annotation_id = ?',
+                            (annotation_id,) ):
+                    all_commit_log_nodes[ log_id ] = WbAnnotateCacheLogNode( log_id, id_string, author, timestamp, utc_offset, message,
+                                                                            self.__read_commit_message )
+
+                with db:
+                    db.execute( 'UPDATE annotation SET last_used = ? WHERE id = ?', (time.time(), annotation_id) )
+
+            finally:
+                db.close()
+
+        except sqlite3.Error as e:
+            self.app.log.error( T_('Cannot read annotate cache %(filename)s: %(error)s') %
+                                {'filename': self.filename, 'error': e} )
+            return None
+
+        self.debugLog( 'load %s %s %d lines %d commits' %
+                        (filename, identity, len(all_annotation_nodes), len(all_commit_log_nodes)) )
+        return all_annotation_nodes, all_commit_log_nodes
+
+    # all_commit_log_nodes maps the log_id of the nodes to their commit log
+    def save( self, filename, identity, all_annotation_nodes, all_commit_log_nodes ):
+        if identity is None:
+            return
+
+        self.debugLog( 'save %s %s %d lines %d commits' %
+                        (filename, identity, len(all_annotation_nodes), len(all_commit_log_nodes)) )
+
+        # the log_id of the nodes is saved as text so make the keys match
+        all_line_records = [(node.line_num, node.line_text, self.__logIdText( node.log_id ))
+                            for node in all_annotation_nodes]
+
+        all_log_records = []
+        for log_id, log_node in all_commit_log_nodes.items():
+            timestamp, utc_offset = self.__timestampAndOffset( log_node.commitDate() )
+            if self.__read_commit_message is not None:
+                message = log_node.commitMessageHeadline()
+
+            else:
+                message = log_node.commitMessage()
+
+            all_log_records.append( (self.__logIdText( log_id ), log_node.commitIdString(), log_node.commitAuthor(),
+                                        timestamp, utc_offset, message) )
+
+        try:
+            db = self.__connect()
+            try:
+                with db:
+                    self.__deleteAnnotations( db, db.execute( 'SELECT id FROM annotation WHERE scm_type = ? AND project_path = ? AND path = ?',
+                                                            (self.__scm_type, self.__project_path, str( filename )) ).fetchall() )
+
+                    cursor = db.execute( 'INSERT INTO annotation (scm_type, project_path, path, identity, num_lines, last_used)'
+                                            ' VALUES (?, ?, ?, ?, ?, ?)',
+                                            (self.__scm_type, self.__project_path, str( filename ), identity,
+                                            len(all_line_records), time.time()) )
+                    annotation_id = cursor.lastrowid
+
+                    db.executemany( 'INSERT INTO line (annotation_id, line_num, line_text, log_id) VALUES (?, ?, ?, ?)',
+                                    [(annotation_id,) + record for record in all_line_records] )
+                    db.executemany( 'INSERT OR REPLACE INTO commit_log'
+                                    ' (annotation_id, log_id, id_string, author, timestamp, utc_offset, message) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    [(annotation_id,) + record for record in all_log_records] )
+
+                    self.__evict( db )
+
+            finally:
+                db.close()
+
+        except sqlite3.Error as e:
+            self.app.log.error( T_('Cannot write annotate cache %(filename)s: %(error)s') %
+                                {'filename': self.filename, 'error': e} )
+
+    def clear( self ):
+        if self.filename.exists():
+            self.filename.unlink()
+
+    def __evict( self, db ):
+        total_lines = db.execute( 'SELECT SUM(num_lines) FROM annotation' ).fetchone()[0] or 0
+        if total_lines <= self.max_lines:
+            return
+
+        all_evict_ids = []
+        for annotation_id, num_lines in db.execute( 'SELECT id, num_lines FROM annotation ORDER BY last_used' ).fetchall():
+            if total_lines <= self.max_lines:
+                break
+
+            all_evict_ids.append( (annotation_id,) )
+            total_lines -= num_lines
+
+        self.debugLog( 'evict %d annotations' % (len(all_evict_ids),) )
+        self.__deleteAnnotations( db, all_evict_ids )
+
+    # all_ids is a list of (annotation_id,)
+    def __deleteAnnotations( self, db, all_ids ):
+        db.executemany( 'DELETE FROM line WHERE annotation_id = ?', all_ids )
+        db.executemany( 'DELETE FROM commit_log WHERE annotation_id = ?', all_ids )
+        db.executemany( 'DELETE FROM annotation WHERE id = ?', all_ids )
+
+    def __logIdText( self, log_id ):
+        if isinstance( log_id, bytes ):
+            return log_id.decode( 'utf-8' )
+
+        return str( log_id )
+
+    # the commit date can be a datetime, with or without a timezone, or a timestamp
+    def __timestampAndOffset( self, date ):
+        if type(date) in (int, float):
+            return date, 0
+
+        if date.tzinfo is None:
+            date = date.astimezone()
+
+        return date.timestamp(), int( date.utcoffset().total_seconds() )
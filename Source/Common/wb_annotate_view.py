@@ -13,9 +13,11 @@
 from PyQt5 import QtWidgets
 from PyQt5 import QtCore
 
+import wb_date
 import wb_tracked_qwidget
 import wb_main_window
 import wb_table_view
+import wb_background_thread
 
 def U_( s: str ) -> str:
     return s
@@ -37,6 +39,9 @@ class WbAnnotateView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedMo
 
         self.current_annotations = None
 
+        # cancelled when the view is closed to stop finding the annotation
+        self.cancel_token = wb_background_thread.CancelToken()
+
         self.ui_component = ui_component
 
         self.annotate_model = WbAnnotateModel( self.app )
@@ -105,6 +110,11 @@ class WbAnnotateView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedMo
         message_height = height - table_height
         self.v_split.setSizes( [table_height, message_height] )
 
+    def closeEvent( self, event ):
+        self.cancel_token.cancel()
+
+        super().closeEvent( event )
+
     def setupMenuBar( self, mb ):
         self.ui_component.setupMenuBar( mb, self._addMenu )
 
@@ -132,6 +142,16 @@ class WbAnnotateView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedMo
 
         self.updateEnableStates()
 
+    # the commits of some of the lines have been found
+    def updateAnnotationForFile( self, all_line_log_ids, all_commit_log_nodes ):
+        self.annotate_model.updateAnnotationForFile( all_line_log_ids, all_commit_log_nodes )
+
+        self.annotate_table.resizeColumnToContents( self.annotate_model.col_date )
+
+        # the message of the selected line may now be known
+        if self.current_annotations:
+            self.selectionChangedAnnotation()
+
     def selectionChangedAnnotation( self ):
         self.current_annotations = [index.row() for index in self.annotate_table.selectedIndexes() if index.column() == 0]
 
@@ -188,6 +208,7 @@ class WbAnnotateModel(QtCore.QAbstractTableModel):
 
         self.all_annotation_nodes  = []
         self.all_commit_log_nodes = {}
+        self.date_strings = wb_date.WbTableDateStrings( self.app.formatDatetime, lambda log_id: self.all_commit_log_nodes[ log_id ].commitDate() )
 
         self.fixed_font = self.app.codeFont()
 
@@ -195,8 +216,25 @@ class WbAnnotateModel(QtCore.QAbstractTableModel):
         self.beginResetModel()
         self.all_annotation_nodes = all_annotation_nodes
         self.all_commit_log_nodes = all_commit_log_nodes
+        self.date_strings.clear()
         self.endResetModel()
 
+    # all_line_log_ids is a list of (log_id, first_line_num, num_lines)
+    def updateAnnotationForFile( self, all_line_log_ids, all_commit_log_nodes ):
+        self.all_commit_log_nodes.update( all_commit_log_nodes )
+
+        first_row = len(self.all_annotation_nodes)
+        last_row = -1
+        for log_id, first_line_num, num_lines in all_line_log_ids:
+            for node in self.all_annotation_nodes[ first_line_num-1:first_line_num-1+num_lines ]:
+                node.log_id = log_id
+
+            first_row = min( first_row, first_line_num-1 )
+            last_row = max( last_row, first_line_num-1+num_lines-1 )
+
+        if last_row >= first_row:
+            self.dataChanged.emit( self.createIndex( first_row, self.col_revision ), self.createIndex( last_row, self.col_date ) )
+
     def rowCount( self, parent ):
         return len( self.all_annotation_nodes )
 
@@ -228,10 +266,14 @@ class WbAnnotateModel(QtCore.QAbstractTableModel):
 
         if role == QtCore.Qt.DisplayRole:
             node = self.all_annotation_nodes[ index.row() ]
-            log_node = self.all_commit_log_nodes[ node.log_id ]
+            # the log node is not known until the commit of the line is found
+            log_node = self.all_commit_log_nodes.get( node.log_id )
 
             col = index.column()
 
+            if log_node is None and col in (self.col_revision, self.col_author, self.col_date):
+                return ''
+
             if col == self.col_revision:
                 return log_node.commitIdString()
 
@@ -239,7 +281,7 @@ class WbAnnotateModel(QtCore.QAbstractTableModel):
                 return log_node.commitAuthor()
 
             elif col == self.col_date:
-                return self.app.formatDatetime( log_node.commitDate() )
+                return self.date_strings.dateString( node.log_id )
 
             elif col == self.col_line_num:
                 return '%d' % (node.line_num,)
@@ -318,6 +318,9 @@ class WbApp(wb_logging.AppLoggingMixin,
 
     def quit( self ):
         self.debugLogApp( 'quit()' )
+        for line in self.background_scheduler.metrics.report():
+            self.debug_options.debugLogBackground( 'metrics %s' % (line,) )
+
         self.may_quit = True
         self.main_window.close()
 
@@ -11,8 +11,8 @@
 
 '''
 import threading
-import queue
 import types
+import time
 
 from PyQt5 import QtCore
 
@@ -41,38 +41,262 @@ class MarshalledCall:
     def __repr__( self ):
         return '<MarshalledCall: fn=%s nargs=%d>' % (self.function.__name__, len(self.args))
 
-class BackgroundThread(threading.Thread):
-    def __init__( self, app ):
-        super().__init__()
+#
+#   Background work is queued on a lane with a priority.
+#
+#   Work on the app lane runs on its own, one item at a time, as all
+#   background work did before there was more then one worker.
+#   Work on any other lane runs one item at a time for that lane but
+#   in parallel with the work of other lanes, for example each project
+#   has its own lane via projectLane().
+#
+#   Queued work starts in priority order, lower first, then in the
+#   order it was added.
+#
+LANE_APP = 'app'
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+all_priority_names = ('interactive', 'normal', 'bulk')
+
+def projectLane( scm_project ):
+    return 'project:%s:%s' % (scm_project.scmType(), scm_project.projectPath())
+
+#
+#   A thread switcher stops at its next switch once its token is cancelled
+#
+class CancelToken:
+    def __init__( self ):
+        self.__cancelled = False
+
+    def cancel( self ):
+        self.__cancelled = True
+
+    def isCancelled( self ):
+        return self.__cancelled
+
+class BackgroundWork:
+    def __init__( self, call, lane, priority, sequence ):
+        self.call = call
+        self.lane = lane
+        self.priority = priority
+        self.sequence = sequence
+        self.queued_time = time.monotonic()
 
+    def __lt__( self, other ):
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def __repr__( self ):
+        return '<BackgroundWork: %r lane=%s priority=%s>' % (self.call, self.lane, all_priority_names[ self.priority ])
+
+#
+#   How long work waits in the queue and how long it runs for
+#   for each priority
+#
+class BackgroundMetrics:
+    def __init__( self ):
+        self.all_counts = [0] * len(all_priority_names)
+        self.all_total_wait = [0.0] * len(all_priority_names)
+        self.all_max_wait = [0.0] * len(all_priority_names)
+        self.all_total_run = [0.0] * len(all_priority_names)
+        self.all_max_run = [0.0] * len(all_priority_names)
+        self.max_queue_depth = 0
+
+    def recordQueueDepth( self, depth ):
+        self.max_queue_depth = max( self.max_queue_depth, depth )
+
+    def recordWork( self, priority, wait_time, run_time ):
+        self.all_counts[ priority ] += 1
+        self.all_total_wait[ priority ] += wait_time
+        self.all_max_wait[ priority ] = max( self.all_max_wait[ priority ], wait_time )
+        self.all_total_run[ priority ] += run_time
+        self.all_max_run[ priority ] = max( self.all_max_run[ priority ], run_time )
+
+    def report( self ):
+        all_lines = ['max queue depth %d' % (self.max_queue_depth,)]
+        for priority, name in enumerate( all_priority_names ):
+            count = self.all_counts[ priority ]
+            if count == 0:
+                continue
+
+            all_lines.append( '%s: %d run, wait avg %.3fs max %.3fs, run avg %.3fs max %.3fs' %
+                                (name, count
+                                ,self.all_total_wait[ priority ] / count, self.all_max_wait[ priority ]
+                                ,self.all_total_run[ priority ] / count, self.all_max_run[ priority ]) )
+
+        return all_lines
+
+class BackgroundScheduler:
+    def __init__( self, app, num_workers ):
         self.app = app
+        self.num_workers = num_workers
+
+        self.__condition = threading.Condition()
+        self.__all_pending = []
+        self.__all_busy_lanes = set()
+        self.__running_count = 0
+        self.__next_sequence = 0
+        self.__running = True
+
+        self.metrics = BackgroundMetrics()
+
+    def start( self ):
+        for index in range( self.num_workers ):
+            worker = threading.Thread( target=self.__runWorker, name='BackgroundWorker-%d' % (index,) )
+            worker.daemon = True
+            worker.start()
+
+    def addWork( self, function, args, lane=LANE_APP, priority=PRIORITY_NORMAL ):
+        with self.__condition:
+            assert self.__running
+            self.__next_sequence += 1
+            self.__all_pending.append( BackgroundWork( MarshalledCall( function, args ), lane, priority, self.__next_sequence ) )
+            self.metrics.recordQueueDepth( len(self.__all_pending) )
+            self.__condition.notify_all()
+
+    # return the number of items waiting for each priority
+    def queueDepths( self ):
+        with self.__condition:
+            all_depths = [0] * len(all_priority_names)
+            for work in self.__all_pending:
+                all_depths[ work.priority ] += 1
+
+            return all_depths
+
+    def shutdown( self ):
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+
+    # called with the condition held
+    def __nextWork( self ):
+        for work in sorted( self.__all_pending ):
+            if work.lane == LANE_APP:
+                if self.__running_count == 0:
+                    return work
+
+                # nothing else starts until the app lane work has run
+                return None
+
+            if LANE_APP not in self.__all_busy_lanes and work.lane not in self.__all_busy_lanes:
+                return work
+
+        return None
+
+    def __runWorker( self ):
+        debugLogBackground = self.app.debug_options.debugLogBackground
+
+        while True:
+            with self.__condition:
+                while True:
+                    if not self.__running:
+                        return
+
+                    work = self.__nextWork()
+                    if work is not None:
+                        break
 
-        self.setDaemon( 1 )
-        self.running = 1
+                    self.__condition.wait()
 
-        self.work_queue = queue.Queue( maxsize=0 )
+                self.__all_pending.remove( work )
+                self.__all_busy_lanes.add( work.lane )
+                self.__running_count += 1
 
-    def run( self ):
-        while self.running:
-            function = self.work_queue.get( block=True, timeout=None )
-            self.app.debug_options.debugLogThreading( 'BackgroundThread.run dispatching %r' % (function,) )
+            start_time = time.monotonic()
+            debugLogBackground( 'dispatching %r' % (work,) )
 
             try:
-                function()
+                work.call()
 
             except:
                 self.app.log.exception( 'function failed on background thread' )
 
-    def addWork( self, function, args ):
-        self.app.debug_options.debugLogThreading( 'BackgroundThread.addWork( %r, %r )' % (function, args) )
-        assert self.running
-        self.work_queue.put( MarshalledCall( function, args ), block=False, timeout=None )
+            end_time = time.monotonic()
 
-    def shutdown( self ):
-        self.addWork( self.__shutdown )
+            with self.__condition:
+                self.__all_busy_lanes.remove( work.lane )
+                self.__running_count -= 1
+                self.metrics.recordWork( work.priority, start_time - work.queued_time, end_time - start_time )
+                self.__condition.notify_all()
+
+            debugLogBackground( 'done %r wait %.3fs run %.3fs' % (work, start_time - work.queued_time, end_time - start_time) )
+
+#
+#   Calls made from background threads that do not need to run
+#   at once, like logging and progress, are batched up and run
+#   on the foreground thread at most every flush_interval seconds.
+#
+#   Counts added to the same function are summed and the function
+#   is called once with the total.
+#
+#   The batch is run before any other call is run in the foreground
+#   so that the order of calls from a thread is kept.
+#
+class ForegroundBatch:
+    flush_interval = 0.050
+
+    def __init__( self, app ):
+        self.app = app
+
+        self.__lock = threading.Lock()
+        self.__all_calls = []
+        self.__all_count_indices = {}
+        self.__flush_pending = False
+        self.__last_flush_time = 0.0
+
+        self.flush_call = MarshalledCall( self.__scheduleFlush, () )
+
+    def addCall( self, function, args ):
+        with self.__lock:
+            self.__all_calls.append( (function, args) )
+            self.__requestFlush()
+
+    def addCount( self, function, count ):
+        with self.__lock:
+            index = self.__all_count_indices.get( function )
+            if index is None:
+                self.__all_count_indices[ function ] = len(self.__all_calls)
+                self.__all_calls.append( (function, (count,)) )
+
+            else:
+                self.__all_calls[ index ] = (function, (self.__all_calls[ index ][1][0] + count,))
+
+            self.__requestFlush()
+
+    # called with the lock held
+    def __requestFlush( self ):
+        if not self.__flush_pending:
+            self.__flush_pending = True
+            self.app.foregroundProcessSignal.emit( self.flush_call )
+
+    def __scheduleFlush( self ):
+        delay = self.__last_flush_time + self.flush_interval - time.monotonic()
+        if delay <= 0:
+            self.flush()
+
+        else:
+            QtCore.QTimer.singleShot( int( delay*1000 ) + 1, self.flush )
+
+    # called on the foreground thread
+    def flush( self ):
+        with self.__lock:
+            if len(self.__all_calls) == 0:
+                return
+
+            all_calls = self.__all_calls
+            self.__all_calls = []
+            self.__all_count_indices = {}
+            self.__flush_pending = False
+            self.__last_flush_time = time.monotonic()
+
+        for function, args in all_calls:
+            try:
+                function( *args )
 
-    def __shutdown( self ):
-        self.running = 0
+            except:
+                self.app.log.exception( 'batched foregroundProcess function failed' )
 
 #
 #   BackgroundWorkMixin
@@ -83,6 +307,12 @@ class BackgroundThread(threading.Thread):
 #   runInBackground - call function on the background thread
 #   runInForeground - call function on the foreground thread
 #
+#   runInForegroundBatched - call function on the foreground thread
+#       - along with other calls made in the last flush_interval
+#
+#   countInForeground - call function with the sum of the counts
+#       - along with other calls made in the last flush_interval
+#
 #   deferRunInForeground
 #       - used to move a callback made in the background
 #         into the foreground with the args provided in the
@@ -98,13 +328,16 @@ class BackgroundThread(threading.Thread):
 class BackgroundWorkMixin:
     foregroundProcessSignal = QtCore.pyqtSignal( [MarshalledCall] )
 
+    background_workers = 4
+
     def __init__( self ):
         self.foreground_thread = threading.currentThread()
-        self.background_thread = BackgroundThread( self )
+        self.background_scheduler = BackgroundScheduler( self, self.background_workers )
+        self.foreground_batch = ForegroundBatch( self )
 
     def startBackgroundThread( self ):
         self.foregroundProcessSignal.connect( self.__runInForeground, type=QtCore.Qt.QueuedConnection )
-        self.background_thread.start()
+        self.background_scheduler.start()
 
     def isForegroundThread( self ):
         # return true if the caller is running on the main thread
@@ -113,17 +346,31 @@ class BackgroundWorkMixin:
     def deferRunInForeground( self, function ):
         return DeferRunInForeground( self, function )
 
-    def runInBackground( self, function, args ):
-        self.debug_options.debugLogThreading( 'runInBackground( %r, %r )' % (function, args) )
-        self.background_thread.addWork( function, args )
+    def runInBackground( self, function, args, lane=LANE_APP, priority=PRIORITY_NORMAL ):
+        self.debug_options.debugLogThreading( 'runInBackground( %r, %r, %s, %s )' % (function, args, lane, all_priority_names[ priority ]) )
+        self.background_scheduler.addWork( function, args, lane, priority )
 
     def runInForeground( self, function, args ):
         # cannot call logging from here as this will cause the log call to be marshelled
         self.foregroundProcessSignal.emit( MarshalledCall( function, args ) )
 
-    def wrapWithThreadSwitcher( self, function, reason='' ):
+    def runInForegroundBatched( self, function, args ):
+        if self.isForegroundThread():
+            function( *args )
+
+        else:
+            self.foreground_batch.addCall( function, args )
+
+    def countInForeground( self, function, count=1 ):
+        if self.isForegroundThread():
+            function( count )
+
+        else:
+            self.foreground_batch.addCount( function, count )
+
+    def wrapWithThreadSwitcher( self, function, reason='', lane=LANE_APP, priority=PRIORITY_NORMAL, cancel_token=None ):
         if requiresThreadSwitcher( function ):
-            return ThreadSwitchScheduler( self, function, reason )
+            return ThreadSwitchScheduler( self, function, reason, lane, priority, cancel_token )
 
         else:
             return function
@@ -132,7 +379,15 @@ class BackgroundWorkMixin:
     switchToForeground = runInForeground
     switchToBackground = runInBackground
 
+    # yield the result to switch to the background on another lane
+    def switchToBackgroundLane( self, lane, priority=PRIORITY_NORMAL ):
+        return SwitchToBackgroundLane( self, lane, priority )
+
     def __runInForeground( self, function ):
+        # keep the order of the calls made by a background thread
+        if function is not self.foreground_batch.flush_call:
+            self.foreground_batch.flush()
+
         self.debug_options.debugLogThreading( '__runInForeground( %r )' % (function,) )
 
         try:
@@ -141,20 +396,39 @@ class BackgroundWorkMixin:
         except:
             self.log.exception( 'foregroundProcess function failed' )
 
+class SwitchToBackgroundLane:
+    def __init__( self, app, lane, priority ):
+        self.app = app
+        self.lane = lane
+        self.priority = priority
+
+    def __call__( self, function, args ):
+        self.app.runInBackground( function, args, self.lane, self.priority )
+
+    def __repr__( self ):
+        return '<SwitchToBackgroundLane: %s %s>' % (self.lane, all_priority_names[ self.priority ])
+
 class DeferRunInForeground:
     def __init__( self, app, function ):
         self.app = app
         self.function = function
 
     def __call__( self, *args ):
-        self.app.runInForeground( self.function, args )
+        self.app.runInForegroundBatched( self.function, args )
 
+#
+#   A switch to the background using switchToBackground
+#   is queued on the lane and priority of the scheduler.
+#
 class ThreadSwitchScheduler:
     next_instance_id = 0
-    def __init__( self, app, function, reason ):
+    def __init__( self, app, function, reason, lane=LANE_APP, priority=PRIORITY_NORMAL, cancel_token=None ):
         self.app = app
         self.function = function
         self.reason = reason
+        self.lane = lane
+        self.priority = priority
+        self.cancel_token = cancel_token
         self.debugLogThreading = self.app.debug_options.debugLogThreading
         ThreadSwitchScheduler.next_instance_id += 1
         self.instance_id = self.next_instance_id
@@ -181,6 +455,12 @@ class ThreadSwitchScheduler:
 
     def queueNextSwitch( self, generator ):
         self.debugLogThreading( 'ThreadSwitchScheduler(%d:%s): generator %r' % (self.instance_id, self.reason, generator) )
+        if self.cancel_token is not None and self.cancel_token.isCancelled():
+            self.debugLogThreading( 'ThreadSwitchScheduler(%d:%s): cancelled' % (self.instance_id, self.reason) )
+            # runs any finally clauses of the generator
+            generator.close()
+            return
+
         # result tells where to schedule the generator to next
         try:
             where_to_go_next = next( generator )
@@ -190,9 +470,13 @@ class ThreadSwitchScheduler:
             self.debugLogThreading( 'ThreadSwitchScheduler(%d:%s): done (StopIteration)' % (self.instance_id, self.reason) )
             return
 
-        # will be one of app.runInForeground or app.runInForeground
+        # will be one of app.runInForeground, app.runInBackground or a SwitchToBackgroundLane
         self.debugLogThreading( 'ThreadSwitchScheduler(%d:%s): next %r' % (self.instance_id, self.reason, where_to_go_next) )
-        where_to_go_next( self.queueNextSwitch, (generator,) )
+        if where_to_go_next == self.app.switchToBackground:
+            self.app.runInBackground( self.queueNextSwitch, (generator,), self.lane, self.priority )
+
+        else:
+            where_to_go_next( self.queueNextSwitch, (generator,) )
 
 #------------------------------------------------------------
 #
@@ -17,7 +17,10 @@
 #
 #   This hack works around the problem.
 #
+import time
 import datetime
+import threading
+import collections
 import zoneinfo
 import tzlocal
 
@@ -32,16 +35,130 @@ except ImportError:
 def utcDatetime( timestamp ):
     return datetime.datetime.fromtimestamp( timestamp, datetime.timezone.utc )
 
+#
+#   Finding the name of the local timezone and creating its ZoneInfo
+#   is slow compared to formatting a date. The zone is found once and
+#   only looked up again every check_interval seconds to notice when
+#   the user changes the timezone of the system.
+#
+#   tzlocal remembers the zone it first found so it has to be told
+#   to look again.
+#
+class WbLocalTimezone:
+    check_interval = 60.0
+
+    def __init__( self ):
+        self.__lock = threading.Lock()
+        self.__zone_name = None
+        self.__zone = None
+        self.__next_check_time = 0.0
+
+    def zone( self ):
+        now = time.monotonic()
+        if now >= self.__next_check_time:
+            with self.__lock:
+                if self.__zone_name is not None:
+                    tzlocal.reload_localzone()
+
+                zone_name = tzlocal.get_localzone_name()
+                if zone_name != self.__zone_name:
+                    self.__zone = zoneinfo.ZoneInfo( zone_name )
+                    self.__zone_name = zone_name
+
+                self.__next_check_time = now + self.check_interval
+
+        return self.__zone
+
+    def zoneName( self ):
+        self.zone()
+        return self.__zone_name
+
+local_timezone = WbLocalTimezone()
+
 def localDatetime( datetime_or_timestamp ):
     if type(datetime_or_timestamp) in (int, float):
         dt = utcDatetime( datetime_or_timestamp )
     else:
         dt = datetime_or_timestamp
 
-    local_timezone = zoneinfo.ZoneInfo( tzlocal.get_localzone_name() )
-    local_dt = dt.astimezone( local_timezone )
+    local_dt = dt.astimezone( local_timezone.zone() )
     return local_dt
 
+#
+#   Format dates in the local timezone remembering the strings
+#   of recently formatted dates. Tables show the same dates many
+#   times as they are scrolled and sorted.
+#
+#   The remembered strings are forgotten when the timezone changes.
+#
+class WbDateFormatter:
+    def __init__( self, format, max_size=16*1024 ):
+        self.__format = format
+        self.__max_size = max_size
+
+        self.__lock = threading.Lock()
+        self.__zone_name = None
+        self.__all_strings = collections.OrderedDict()
+
+    def format( self, datetime_or_timestamp ):
+        zone = local_timezone.zone()
+
+        with self.__lock:
+            if self.__zone_name != local_timezone.zoneName():
+                self.__zone_name = local_timezone.zoneName()
+                self.__all_strings.clear()
+
+            # a datetime and a timestamp of the same time compare as not equal
+            key = (type(datetime_or_timestamp), datetime_or_timestamp)
+            text = self.__all_strings.get( key )
+            if text is not None:
+                self.__all_strings.move_to_end( key )
+                return text
+
+        if type(datetime_or_timestamp) in (int, float):
+            dt = utcDatetime( datetime_or_timestamp )
+        else:
+            dt = datetime_or_timestamp
+
+        text = dt.astimezone( zone ).strftime( self.__format )
+
+        with self.__lock:
+            self.__all_strings[ key ] = text
+            if len(self.__all_strings) > self.__max_size:
+                self.__all_strings.popitem( last=False )
+
+        return text
+
+#
+#   The date strings of the rows of a table keyed by row or any
+#   other key that date_function can find the date of.
+#   Each date is formatted the first time it is shown and all of
+#   them are formatted again if the timezone changes.
+#
+class WbTableDateStrings:
+    def __init__( self, format_function, date_function ):
+        self.__format_function = format_function
+        self.__date_function = date_function
+
+        self.__zone_name = None
+        self.__all_strings = {}
+
+    def clear( self ):
+        self.__all_strings = {}
+
+    def dateString( self, key ):
+        zone_name = local_timezone.zoneName()
+        if zone_name != self.__zone_name:
+            self.__zone_name = zone_name
+            self.__all_strings = {}
+
+        text = self.__all_strings.get( key )
+        if text is None:
+            text = self.__format_function( self.__date_function( key ) )
+            self.__all_strings[ key ] = text
+
+        return text
+
 if __name__ == '__main__':
     import time
 
@@ -58,3 +175,7 @@ if __name__ == '__main__':
     local = localDatetime( t )
     print( 'Local2: repr %r' % (local,) )
     print( 'Local2:  str %s' % (local,) )
+
+    formatter = WbDateFormatter( '%Y-%m-%d %H:%M:%S' )
+    print( 'Format1: %s' % (formatter.format( t ),) )
+    print( 'Format2: %s' % (formatter.format( utc ),) )
@@ -11,6 +11,30 @@
 
 '''
 import time
+
+#
+#   Debug options are called in the hottest code of the app so
+#   the cost of a message is only paid when the option is enabled.
+#
+#       debugLog( 'refresh %r', node )              - formatted when enabled
+#       debugLog( lambda: expensiveMessage() )      - called when enabled
+#
+#   Use the option as a bool to guard code that finds the
+#   values to log, for example in a loop:
+#
+#       if debugLog:
+#           for line in all_lines:
+#               debugLog( line )
+#
+def formatMessage( msg, args ):
+    if callable( msg ):
+        return msg()
+
+    if len(args) > 0:
+        return msg % args
+
+    return msg
+
 class WbDebugOption:
     __slots__ = ('__enabled', '_log', '__name', '__fmt')
 
@@ -33,9 +57,13 @@ class WbDebugOption:
     def __bool__( self ):
         return self.__enabled
 
-    def __call__( self, msg ):
-        if self.__enabled:
-            self._log.debug( self.__fmt % (msg,) )
+    # the message is only formatted when the option is enabled
+    # msg can be a format used with args or a callable that returns the message
+    def __call__( self, msg, *args ):
+        if not self.__enabled:
+            return
+
+        self._log.debug( self.__fmt % (formatMessage( msg, args ),) )
 
 class WbDebugSpeedOption(WbDebugOption):
     __slots__ = ('__speed_start_time', '__speed_last_event_time')
@@ -45,8 +73,9 @@ class WbDebugSpeedOption(WbDebugOption):
         self.__speed_start_time = time.time()
         self.__speed_last_event_time = self.__speed_start_time
 
-    def __call__( self, msg, start_timer=False ):
+    def __call__( self, msg, *args, start_timer=False ):
         if self.isEnabled():
+            msg = formatMessage( msg, args )
             now = time.time()
             if start_timer:
                 self.__speed_start_time = now
@@ -64,6 +93,7 @@ class WbDebug:
         self.debugLogSpeed = WbDebugSpeedOption( self._log, 'SPEED' )
         self.debugLogApp = self.addDebugOption( 'APP' )
         self.debugLogThreading = self.addDebugOption( 'THREADING' )
+        self.debugLogBackground = self.addDebugOption( 'BACKGROUND' )
         self.debugLogMainWindow = self.addDebugOption( 'MAIN WINDOW' )
         self.debugLogTreeModel = self.addDebugOption( 'TREE MODEL' )
         self.debugLogTreeModelNode = self.addDebugOption( 'TREE MODEL NODE' )
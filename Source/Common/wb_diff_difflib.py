@@ -11,6 +11,8 @@
 
 '''
 import sys
+import array
+import bisect
 import unicodedata
 import difflib
 import wb_read_file
@@ -23,10 +25,441 @@ def isLineJunk(line, pat=None):
 def isCharacterJunk(ch, ws=" \t"):
     return False
 
+class DiffCancelled(Exception):
+    pass
+
+#------------------------------------------------------------
+#
+#   Line diff algorithms
+#
+#   difflib uses difflib.SequenceMatcher.
+#   myers, patience and histogram work on lines interned to ints
+#   and return opcodes in the same form as SequenceMatcher.get_opcodes()
+#
+#------------------------------------------------------------
+all_diff_algorithms = ('histogram', 'patience', 'myers', 'difflib')
+
+def getOpcodes( algorithm, lines_left, lines_right, check_cancelled=None ):
+    if check_cancelled is None:
+        check_cancelled = lambda: None
+
+    if algorithm == 'difflib':
+        matcher = difflib.SequenceMatcher( isLineJunk, lines_left, lines_right )
+        return matcher.get_opcodes()
+
+    a, b = internLines( lines_left, lines_right )
+    return getOpcodesForKeys( algorithm, a, b, check_cancelled )
+
+# a and b are sequences of ints, or other hashable keys, one per line
+def getOpcodesForKeys( algorithm, a, b, check_cancelled ):
+    if algorithm == 'difflib':
+        matcher = difflib.SequenceMatcher( isLineJunk, a, b )
+        return matcher.get_opcodes()
+
+    if algorithm == 'myers':
+        matcher = MyersMatcher( a, b, check_cancelled )
+
+    elif algorithm == 'patience':
+        matcher = PatienceMatcher( a, b, check_cancelled )
+
+    elif algorithm == 'histogram':
+        matcher = HistogramMatcher( a, b, check_cancelled )
+
+    else:
+        raise ValueError( 'unknown diff algorithm ' + str( algorithm ) )
+
+    return opcodesFromMatchingBlocks( matcher.getMatchingBlocks() )
+
+# replace each line with an int so that compares are cheap
+def internLines( lines_left, lines_right ):
+    all_ids = {}
+    a = [all_ids.setdefault( line, len(all_ids) ) for line in lines_left]
+    b = [all_ids.setdefault( line, len(all_ids) ) for line in lines_right]
+    return a, b
+
+# same rules as difflib.SequenceMatcher.get_opcodes()
+def opcodesFromMatchingBlocks( all_blocks ):
+    all_opcodes = []
+
+    i = j = 0
+    for ai, bj, size in all_blocks:
+        if i < ai and j < bj:
+            all_opcodes.append( ('replace', i, ai, j, bj) )
+
+        elif i < ai:
+            all_opcodes.append( ('delete', i, ai, j, bj) )
+
+        elif j < bj:
+            all_opcodes.append( ('insert', i, ai, j, bj) )
+
+        i = ai + size
+        j = bj + size
+        if size > 0:
+            all_opcodes.append( ('equal', ai, i, bj, j) )
+
+    return all_opcodes
+
+class LineMatcher:
+    def __init__( self, a, b, check_cancelled ):
+        self.a = a
+        self.b = b
+        self.check_cancelled = check_cancelled
+
+        # (a_index, b_index, length) of the matching lines
+        self.all_blocks = []
+
+    # return the blocks as difflib.SequenceMatcher.get_matching_blocks() does
+    def getMatchingBlocks( self ):
+        # work from a stack of regions to avoid deep recursion
+        all_regions = [(0, len(self.a), 0, len(self.b))]
+        while len(all_regions) > 0:
+            self.check_cancelled()
+
+            alo, ahi, blo, bhi = all_regions.pop()
+            alo, ahi, blo, bhi = self.matchPrefixAndSuffix( alo, ahi, blo, bhi )
+            if alo < ahi and blo < bhi:
+                all_regions.extend( self.splitRegion( alo, ahi, blo, bhi ) )
+
+        # merge adjacent blocks
+        all_merged_blocks = []
+        for block in sorted( self.all_blocks ):
+            if len(all_merged_blocks) > 0:
+                i, j, n = all_merged_blocks[-1]
+                if i + n == block[0] and j + n == block[1]:
+                    all_merged_blocks[-1] = (i, j, n + block[2])
+                    continue
+
+            all_merged_blocks.append( block )
+
+        all_merged_blocks.append( (len(self.a), len(self.b), 0) )
+        return all_merged_blocks
+
+    def addBlock( self, i, j, n ):
+        if n > 0:
+            # extend the last block if this one follows on from it
+            if len(self.all_blocks) > 0:
+                last_i, last_j, last_n = self.all_blocks[-1]
+                if last_i + last_n == i and last_j + last_n == j:
+                    self.all_blocks[-1] = (last_i, last_j, last_n + n)
+                    return
+
+            self.all_blocks.append( (i, j, n) )
+
+    def matchPrefixAndSuffix( self, alo, ahi, blo, bhi ):
+        a = self.a
+        b = self.b
+
+        n = 0
+        while alo + n < ahi and blo + n < bhi and a[alo + n] == b[blo + n]:
+            n += 1
+
+        self.addBlock( alo, blo, n )
+        alo += n
+        blo += n
+
+        n = 0
+        while alo < ahi - n and blo < bhi - n and a[ahi - n - 1] == b[bhi - n - 1]:
+            n += 1
+
+        self.addBlock( ahi - n, bhi - n, n )
+        return alo, ahi - n, blo, bhi - n
+
+    # record matches found in the region and return the sub regions left to diff
+    def splitRegion( self, alo, ahi, blo, bhi ):
+        raise NotImplementedError()
+
+class MyersMatcher(LineMatcher):
+    # give up looking for the shortest edit script after this many edits
+    # and split where the forward search has got furthest
+    max_edit_cost = 256
+
+    # split the region at the middle snake of the shortest edit script.
+    # This is the linear space version of the Myers algorithm.
+    # The region has no common prefix or suffix
+    def splitRegion( self, alo, ahi, blo, bhi ):
+        a = self.a
+        b = self.b
+
+        # nothing to find if there are no common lines
+        if set( a[alo:ahi] ).isdisjoint( b[blo:bhi] ):
+            return []
+
+        n = ahi - alo
+        m = bhi - blo
+        delta = n - m
+        is_odd = (delta & 1) == 1
+
+        max_d = (n + m + 1) // 2
+        offset = max_d + 1
+        v_forward = [-1] * (2*offset + 1)
+        v_reverse = [-1] * (2*offset + 1)
+        v_forward[ offset + 1 ] = 0
+        v_reverse[ offset + 1 ] = 0
+
+        for d in range( max_d + 1 ):
+            self.check_cancelled()
+
+            if d > self.max_edit_cost:
+                # split at the forward point furthest from the start
+                best_x = -1
+                best_y = -1
+                for k in range( -d + 1, d, 2 ):
+                    x = v_forward[ offset + k ]
+                    y = x - k
+                    if 0 <= y <= m and x + y > best_x + best_y:
+                        best_x = x
+                        best_y = y
+
+                return [(alo, alo + best_x, blo, blo + best_y), (alo + best_x, ahi, blo + best_y, bhi)]
+
+            for k in range( -d, d + 1, 2 ):
+                if k == -d or (k != d and v_forward[ offset + k - 1 ] < v_forward[ offset + k + 1 ]):
+                    x = v_forward[ offset + k + 1 ]
+
+                else:
+                    x = v_forward[ offset + k - 1 ] + 1
+
+                y = x - k
+                while x < n and y < m and a[ alo + x ] == b[ blo + y ]:
+                    x += 1
+                    y += 1
+
+                v_forward[ offset + k ] = x
+
+                k_reverse = delta - k
+                if( is_odd and -d < k_reverse < d
+                and v_reverse[ offset + k_reverse ] != -1
+                and x + v_reverse[ offset + k_reverse ] >= n ):
+                    return [(alo, alo + x, blo, blo + y), (alo + x, ahi, blo + y, bhi)]
+
+            for k in range( -d, d + 1, 2 ):
+                if k == -d or (k != d and v_reverse[ offset + k - 1 ] < v_reverse[ offset + k + 1 ]):
+                    x = v_reverse[ offset + k + 1 ]
+
+                else:
+                    x = v_reverse[ offset + k - 1 ] + 1
+
+                y = x - k
+                while x < n and y < m and a[ ahi - x - 1 ] == b[ bhi - y - 1 ]:
+                    x += 1
+                    y += 1
+
+                v_reverse[ offset + k ] = x
+
+                k_forward = delta - k
+                if( not is_odd and -d <= k_forward <= d
+                and v_forward[ offset + k_forward ] != -1
+                and x + v_forward[ offset + k_forward ] >= n ):
+                    return [(alo, ahi - x, blo, bhi - y), (ahi - x, ahi, bhi - y, bhi)]
+
+        # cannot happen - there is always a path
+        assert False
+
+class PatienceMatcher(MyersMatcher):
+    # match the lines that are unique in both sides in order.
+    # Use myers when there are no unique lines.
+    def splitRegion( self, alo, ahi, blo, bhi ):
+        all_sub_regions = self.splitOnUniqueLines( alo, ahi, blo, bhi )
+        if all_sub_regions is None:
+            return super().splitRegion( alo, ahi, blo, bhi )
+
+        return all_sub_regions
+
+    def splitOnUniqueLines( self, alo, ahi, blo, bhi ):
+        a = self.a
+        b = self.b
+
+        # index of each line or -1 if the line is not unique.
+        # arrays of ints are used as there can be millions of lines
+        all_index_a = {}
+        for i in range( alo, ahi ):
+            line = a[ i ]
+            all_index_a[ line ] = -1 if line in all_index_a else i
+
+        all_index_b = {}
+        for j in range( blo, bhi ):
+            line = b[ j ]
+            all_index_b[ line ] = -1 if line in all_index_b else j
+
+        all_pairs_i = array.array( 'l' )
+        all_pairs_j = array.array( 'l' )
+        for i in range( alo, ahi ):
+            line = a[ i ]
+            if all_index_a[ line ] == i:
+                j = all_index_b.get( line, -1 )
+                if j >= 0:
+                    all_pairs_i.append( i )
+                    all_pairs_j.append( j )
+
+        del all_index_a
+        del all_index_b
+
+        if len(all_pairs_i) == 0:
+            return None
+
+        # longest increasing sequence of b indexes using patience sorting
+        all_pile_tops = []
+        all_pile_j = []
+        all_back_links = array.array( 'l' )
+        for index, j in enumerate( all_pairs_j ):
+            pile = bisect.bisect_left( all_pile_j, j )
+            if pile == len(all_pile_j):
+                all_pile_j.append( j )
+                all_pile_tops.append( index )
+
+            else:
+                all_pile_j[ pile ] = j
+                all_pile_tops[ pile ] = index
+
+            all_back_links.append( all_pile_tops[ pile - 1 ] if pile > 0 else -1 )
+
+        all_anchors = array.array( 'l' )
+        index = all_pile_tops[-1]
+        while index != -1:
+            all_anchors.append( index )
+            index = all_back_links[ index ]
+
+        all_anchors.reverse()
+
+        all_sub_regions = []
+        last_i = alo
+        last_j = blo
+        for index in all_anchors:
+            i = all_pairs_i[ index ]
+            j = all_pairs_j[ index ]
+            self.addBlock( i, j, 1 )
+            # no need to diff the empty region between adjacent anchors
+            if i != last_i or j != last_j:
+                all_sub_regions.append( (last_i, i, last_j, j) )
+
+            last_i = i + 1
+            last_j = j + 1
+
+        all_sub_regions.append( (last_i, ahi, last_j, bhi) )
+        return all_sub_regions
+
+class HistogramMatcher(PatienceMatcher):
+    # lines that occur more often than this are not used to split a region
+    max_occurrences = 64
+
+    # when there are unique lines split on them all at once, as patience does.
+    # Otherwise split the region around the longest run of matching lines
+    # that contains the line that occurs least often in a.
+    # Use myers when all the common lines are too common.
+    def splitRegion( self, alo, ahi, blo, bhi ):
+        all_sub_regions = self.splitOnUniqueLines( alo, ahi, blo, bhi )
+        if all_sub_regions is not None:
+            return all_sub_regions
+
+        a = self.a
+        b = self.b
+
+        all_occurrences = {}
+        for i in range( alo, ahi ):
+            all_occurrences.setdefault( a[ i ], [] ).append( i )
+
+        best_count = self.max_occurrences + 1
+        best_length = 0
+        best = None
+
+        j = blo
+        while j < bhi:
+            next_j = j + 1
+
+            all_lines_i = all_occurrences.get( b[ j ] )
+            if all_lines_i is not None and len(all_lines_i) <= best_count:
+                for i in all_lines_i:
+                    count = len(all_lines_i)
+
+                    start_i = i
+                    start_j = j
+                    while start_i > alo and start_j > blo and a[ start_i - 1 ] == b[ start_j - 1 ]:
+                        start_i -= 1
+                        start_j -= 1
+                        count = min( count, len(all_occurrences[ a[ start_i ] ]) )
+
+                    end_i = i + 1
+                    end_j = j + 1
+                    while end_i < ahi and end_j < bhi and a[ end_i ] == b[ end_j ]:
+                        count = min( count, len(all_occurrences[ a[ end_i ] ]) )
+                        end_i += 1
+                        end_j += 1
+
+                    if count < best_count or (count == best_count and end_i - start_i > best_length):
+                        best_count = count
+                        best_length = end_i - start_i
+                        best = (start_i, start_j)
+
+                    next_j = max( next_j, end_j )
+
+            j = next_j
+
+        if best is None:
+            return MyersMatcher.splitRegion( self, alo, ahi, blo, bhi )
+
+        start_i, start_j = best
+        self.addBlock( start_i, start_j, best_length )
+
+        return [(alo, start_i, blo, start_j), (start_i + best_length, ahi, start_j + best_length, bhi)]
+
+#
+#   DiffResult records the calls that Difference makes on its
+#   text_body so that the diff can be calculated on a worker thread
+#   and the result replayed into the widgets on the foreground thread
+#
+class DiffResult:
+    def __init__( self ):
+        self.all_ops = []
+
+    def replay( self, text_body ):
+        for name, args in self.all_ops:
+            getattr( text_body, name )( *args )
+
+    def addNormalLine( self, line ):
+        self.all_ops.append( ('addNormalLine', (line,)) )
+
+    def addInsertedLine( self, line ):
+        self.all_ops.append( ('addInsertedLine', (line,)) )
+
+    def addDeletedLine( self, line ):
+        self.all_ops.append( ('addDeletedLine', (line,)) )
+
+    def addChangedLineBegin( self ):
+        self.all_ops.append( ('addChangedLineBegin', ()) )
+
+    def addChangedLineReplace( self, old, new ):
+        self.all_ops.append( ('addChangedLineReplace', (old, new)) )
+
+    def addChangedLineDelete( self, old ):
+        self.all_ops.append( ('addChangedLineDelete', (old,)) )
+
+    def addChangedLineInsert( self, new ):
+        self.all_ops.append( ('addChangedLineInsert', (new,)) )
+
+    def addChangedLineEqual( self, text ):
+        self.all_ops.append( ('addChangedLineEqual', (text,)) )
+
+    def addChangedLineEnd( self ):
+        self.all_ops.append( ('addChangedLineEnd', ()) )
+
+    def addEnd( self ):
+        self.all_ops.append( ('addEnd', ()) )
+
 class Difference:
     'Difference'
-    def __init__( self, text_body ):
+    # is_cancelled() is called as the diff progresses and
+    # if it returns True DiffCancelled is raised.
+    # progress_callback( lines_done, total_lines ) reports progress
+    # algorithm is one of all_diff_algorithms
+    def __init__( self, text_body, is_cancelled=None, progress_callback=None, algorithm='difflib' ):
         self.text_body = text_body
+        self.is_cancelled = is_cancelled
+        self.progress_callback = progress_callback
+        self.algorithm = algorithm
+
+    def checkCancelled( self ):
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise DiffCancelled()
 
     # meant for dumping lines
     def dump( self, fn, x, lo, hi ):
@@ -49,7 +482,17 @@ class Difference:
     # used as a synch point, and intraline difference marking is done on
     # the similar pair.  Lots of work, but often worth it.
 
+    # limits on the work done to find similar lines and words
+    # beyond which blocks and lines are shown as a plain replace
+    fancy_replace_max_pairs = 100000
+    word_diff_max_pairs = 250000
+
     def fancy_replace( self, a, alo, ahi, b, blo, bhi):
+        # comparing every pair of lines in a large block takes too long
+        if (ahi - alo)*(bhi - blo) > self.fancy_replace_max_pairs:
+            self.plain_replace( a, alo, ahi, b, blo, bhi )
+            return
+
         # don't synch up unless the lines have a similarity score of at
         # least cutoff; best_ratio tracks the best score seen so far
         best_ratio, cutoff = 0.51, 0.52
@@ -60,6 +503,8 @@ class Difference:
         # (identical lines must be junk lines, & we don't want to synch up
         # on junk -- unless we have to)
         for j in range( blo, bhi ):
+            self.checkCancelled()
+
             bj = b[j]
             cruncher.set_seq2(bj)
             for i in range( alo, ahi ):
@@ -101,34 +546,41 @@ class Difference:
         # do intraline marking on the synch pair
         aelt, belt = a[ best_i ], b[ best_j ]
         if eqi is None:
-            self.text_body.addChangedLineBegin()
+            self.addChangedLine( aelt, belt )
+        else:
+            self.text_body.addNormalLine( aelt )
 
-            # diff usually makes more sense as a diff of the words in a line
-            awords = self.splitIntoWords( aelt )
-            bwords = self.splitIntoWords( belt )
-            cruncher.set_seqs( awords, bwords )
-            for tag, ai1, ai2, bj1, bj2 in cruncher.get_opcodes():
-                if tag == 'replace':
-                    self.text_body.addChangedLineReplace( ''.join( awords[ai1:ai2] ), ''.join( bwords[bj1:bj2] ) )
+        # pump out diffs from after the synch point
+        self.fancy_helper(a, best_i+1, ahi, b, best_j+1, bhi)
 
-                elif tag == 'delete':
-                    self.text_body.addChangedLineDelete( ''.join( awords[ai1:ai2] ) )
+    def addChangedLine( self, aelt, belt ):
+        self.text_body.addChangedLineBegin()
 
-                elif tag == 'insert':
-                    self.text_body.addChangedLineInsert( ''.join( bwords[bj1:bj2] ) )
+        # diff usually makes more sense as a diff of the words in a line
+        awords = self.splitIntoWords( aelt )
+        bwords = self.splitIntoWords( belt )
+        if len(awords)*len(bwords) > self.word_diff_max_pairs:
+            awords = [aelt]
+            bwords = [belt]
 
-                elif tag == 'equal':
-                    self.text_body.addChangedLineEqual( ''.join( bwords[bj1:bj2] ) )
+        cruncher = difflib.SequenceMatcher( isCharacterJunk, awords, bwords )
+        for tag, ai1, ai2, bj1, bj2 in cruncher.get_opcodes():
+            if tag == 'replace':
+                self.text_body.addChangedLineReplace( ''.join( awords[ai1:ai2] ), ''.join( bwords[bj1:bj2] ) )
 
-                else:
-                    raise ValueError( 'unknown tag ' + str(tag) )
+            elif tag == 'delete':
+                self.text_body.addChangedLineDelete( ''.join( awords[ai1:ai2] ) )
 
-            self.text_body.addChangedLineEnd()
-        else:
-            self.text_body.addNormalLine( aelt )
+            elif tag == 'insert':
+                self.text_body.addChangedLineInsert( ''.join( bwords[bj1:bj2] ) )
 
-        # pump out diffs from after the synch point
-        self.fancy_helper(a, best_i+1, ahi, b, best_j+1, bhi)
+            elif tag == 'equal':
+                self.text_body.addChangedLineEqual( ''.join( bwords[bj1:bj2] ) )
+
+            else:
+                raise ValueError( 'unknown tag ' + str(tag) )
+
+        self.text_body.addChangedLineEnd()
 
     def splitIntoWords( self, line ):
         all_words = []
@@ -197,8 +649,12 @@ class Difference:
         lines_left = [eolRemoval( line ) for line in lines_left]
         lines_right = [eolRemoval( line ) for line in lines_right]
 
-        matcher = difflib.SequenceMatcher( isLineJunk, lines_left, lines_right )
-        for tag, left_lo, left_hi, right_lo, right_hi in matcher.get_opcodes():
+        all_opcodes = getOpcodes( self.algorithm, lines_left, lines_right, self.checkCancelled )
+        for tag, left_lo, left_hi, right_lo, right_hi in all_opcodes:
+            self.checkCancelled()
+            if self.progress_callback is not None:
+                self.progress_callback( left_lo, len(lines_left) )
+
             if tag == 'replace':
                 self.fancy_replace( lines_left, left_lo, left_hi, lines_right, right_lo, right_hi )
             elif tag == 'delete':
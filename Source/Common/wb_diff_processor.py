@@ -12,20 +12,36 @@
 '''
 from PyQt5 import QtCore
 
+#
+#   The text, styles, indicators, fold levels and line numbers
+#   of one side of the diff are collected in memory and loaded
+#   into the widgets in a few bulk operations by addEnd()
+#
 class DiffOneSideProcessor:
-    def __init__( self, name, text_body ):
+    def __init__( self, name, text_body, first_line_number=0 ):
         self.name = name
         self.text_body = text_body
         self.diff_line_numbers = text_body.diff_line_numbers
 
-        self.line_number = 0
+        self.line_number = first_line_number
         self.last_line_number = -1
         self.changed_lines = []
         self.current_changed_block = -1
         self.current_change_marker = -1
 
+        # (utf-8 text, style_number)
+        self.all_styled_text = []
+        # (indic_number, position, length)
+        self.all_indicators = []
+        # fold level of each line - also the count of lines started
+        self.all_fold_levels = []
+        self.all_line_numbers = []
+
+        self.length = 0
+        self.fold_start = -1
+
     def _markChangeCurrentLine( self ):
-        line_number = self.text_body.getLineCount() - 1
+        line_number = len(self.all_fold_levels)
 
         if( self.last_line_number != line_number
         and self.last_line_number != (line_number - 1) ):
@@ -75,74 +91,117 @@ class DiffOneSideProcessor:
     def _addLineNumber( self ):
         self.line_number = self.line_number + 1
 
-        self.diff_line_numbers.insertStyledText( '%5d\n' % (self.line_number,),
-                        self.diff_line_numbers.style_line_numbers )
+        self.all_line_numbers.append( '%5d\n' % (self.line_number,) )
 
     def _addBlankLineNumber( self ):
-        self.diff_line_numbers.insertStyledText( '%5s\n' % '',
-                        self.diff_line_numbers.style_line_numbers )
+        self.all_line_numbers.append( '%5s\n' % '' )
+
+    def _addStyledText( self, text, style_number, indic_number=None ):
+        text = text.encode( 'utf-8' )
+        self.all_styled_text.append( (text, style_number) )
+
+        if indic_number is not None:
+            self.all_indicators.append( (indic_number, self.length, len(text)) )
+
+        self.length += len(text)
+
+    # start a new line that can be hidden in a fold if is_fold_line
+    def _startLine( self, is_fold_line ):
+        text_body = self.text_body
+
+        line_number = len(self.all_fold_levels)
+        if is_fold_line:
+            if self.fold_start == -1:
+                self.fold_start = line_number
+
+            elif line_number - self.fold_start == text_body.fold_minimum_length:
+                self.all_fold_levels[ self.fold_start ] = (text_body.SC_FOLDLEVELBASE+1) | text_body.SC_FOLDLEVELHEADERFLAG
+
+            self.all_fold_levels.append( text_body.SC_FOLDLEVELBASE+1 )
+
+        else:
+            self.all_fold_levels.append( text_body.SC_FOLDLEVELBASE )
+
+            self.fold_start = -1
 
     def addNormalLine( self, line ):
-        line_number = self.text_body.lineFromPosition( self.text_body.getLength() )
-        self.text_body.setFoldLine( line_number, True )
+        self._startLine( True )
         self._addLineNumber()
-        self.text_body.insertStyledText( line+'\n', self.text_body.style_line_normal )
+        self._addStyledText( line+'\n', self.text_body.style_line_normal )
 
     def addGapLine( self ):
         self._markChangeCurrentLine()
         self._markChangeCurrentLine()
         self._addBlankLineNumber()
 
-        line_number = self.text_body.lineFromPosition( self.text_body.getLength() )
-        self.text_body.setFoldLine( line_number, False )
-        self.text_body.insertStyledText( '\n', self.text_body.style_line_normal )
+        self._startLine( False )
+        self._addStyledText( '\n', self.text_body.style_line_normal )
 
     def addInsertedLine( self, line ):
         self._markChangeCurrentLine()
         self._addLineNumber()
-        line_number = self.text_body.lineFromPosition( self.text_body.getLength() )
-        self.text_body.setFoldLine(line_number, False)
-        self.text_body.insertStyledText( line+'\n', self.text_body.style_line_insert )
+        self._startLine( False )
+        self._addStyledText( line+'\n', self.text_body.style_line_insert )
 
     def addDeletedLine( self, line ):
         self._markChangeCurrentLine()
         self._addLineNumber()
-        line_number = self.text_body.lineFromPosition( self.text_body.getLength() )
-        self.text_body.setFoldLine(line_number, False)
-        self.text_body.insertStyledText( line+'\n', self.text_body.style_line_delete )
+        self._startLine( False )
+        self._addStyledText( line+'\n', self.text_body.style_line_delete )
 
     def addChangedLineBegin( self ):
         self._markChangeCurrentLine()
         self._addLineNumber()
-        line_number = self.text_body.lineFromPosition( self.text_body.getLength() )
-        self.text_body.setFoldLine( line_number, False )
+        self._startLine( False )
 
     def addChangedLineReplace( self, text ):
-        self.text_body.insertStyledText( text, self.text_body.style_line_change, self.text_body.indictor_char_changed )
+        self._addStyledText( text, self.text_body.style_line_change, self.text_body.indictor_char_changed )
 
     def addChangedLineDelete( self, old ):
-        self.text_body.insertStyledText( old, self.text_body.style_line_delete, self.text_body.indictor_char_delete )
+        self._addStyledText( old, self.text_body.style_line_delete, self.text_body.indictor_char_delete )
 
     def addChangedLineInsert( self, new ):
-        self.text_body.insertStyledText( new, self.text_body.style_line_insert, self.text_body.indictor_char_insert )
+        self._addStyledText( new, self.text_body.style_line_insert, self.text_body.indictor_char_insert )
 
     def addChangedLineEqual( self, text ):
-        self.text_body.insertStyledText( text, self.text_body.style_line_normal  )
+        self._addStyledText( text, self.text_body.style_line_normal  )
 
     def addChangedLineEnd( self ):
-        self.text_body.insertStyledText( '\n', self.text_body.style_line_normal )
+        self._addStyledText( '\n', self.text_body.style_line_normal )
 
     #--------------------------------------------------------------------------------
     def addEnd( self ):
-        self.text_body.setReadOnly( 1 )
+        text_body = self.text_body
+
+        text_body.addStyledText( self.all_styled_text )
+        self.diff_line_numbers.addStyledText( [(''.join( self.all_line_numbers ).encode( 'utf-8' ), self.diff_line_numbers.style_line_numbers)] )
+
+        for indic_number, pos, length in self.all_indicators:
+            text_body.setIndicatorCurrent( indic_number )
+            text_body.indicatorFillRange( pos, length )
+
+        # new lines start with the base level so only set the others
+        for line, level in enumerate( self.all_fold_levels ):
+            if level != text_body.SC_FOLDLEVELBASE:
+                text_body.setFoldLevel( line, level )
+                self.diff_line_numbers.setFoldLevel( line, level )
+
+        # free the memory
+        self.all_styled_text = []
+        self.all_indicators = []
+        self.all_fold_levels = []
+        self.all_line_numbers = []
+
+        text_body.setReadOnly( 1 )
 
 #--------------------------------------------------------------------------------
 
 class DiffProcessor:
     'DiffProcessor'
-    def __init__( self, text_body_left, text_body_right ):
-        self.processor_left = DiffOneSideProcessor( 'Diff Left',  text_body_left )
-        self.processor_right = DiffOneSideProcessor( 'Diff Right',  text_body_right )
+    # the first line numbers are used when only part of a diff is shown
+    def __init__( self, text_body_left, text_body_right, first_line_number_left=0, first_line_number_right=0 ):
+        self.processor_left = DiffOneSideProcessor( 'Diff Left',  text_body_left, first_line_number_left )
+        self.processor_right = DiffOneSideProcessor( 'Diff Right',  text_body_right, first_line_number_right )
 
     def addNormalLine( self, line ):
         self.processor_left.addNormalLine(  line )
@@ -10,6 +10,10 @@
     wb_diff_frame.py
 
 '''
+import time
+import threading
+import concurrent.futures
+
 from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
@@ -18,12 +22,29 @@ import wb_scintilla
 
 import wb_diff_difflib
 import wb_diff_processor
+import wb_diff_virtual
 
 import wb_main_window
 import wb_config
 import wb_tracked_qwidget
 
+__executor = None
+__executor_lock = threading.Lock()
+
+def _executor():
+    global __executor
+
+    with __executor_lock:
+        if __executor is None:
+            __executor = concurrent.futures.ThreadPoolExecutor( max_workers=2, thread_name_prefix='wb_diff' )
+
+        return __executor
+
 class DiffSideBySideView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedModeless):
+    progress_interval = 0.25    # seconds
+    # rows loaded into the editors when diff'ing virtually
+    virtual_page_rows = 2000
+
     def __init__( self, app, parent, title, file_left, header_left, file_right, header_right, ):
         super().__init__( app, app.debug_options.debugLogDiff, parent=parent )
 
@@ -62,23 +83,238 @@ class DiffSideBySideView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.splitter.addWidget( self.panel_left )
         self.splitter.addWidget( self.panel_right )
 
-        # Create the editor and calculate all the differences
         self.processor = wb_diff_processor.DiffProcessor( self.panel_left.ed, self.panel_right.ed )
-        self.diff = wb_diff_difflib.Difference( self.processor )
 
-        self.files_ok = self.diff.filecompare( file_left, file_right )
-        if not self.files_ok:
+        self.current_change_number = 0
+        self.total_change_number = 0
+
+        # very large files are diff'ed virtually and only a window of
+        # rows is loaded into the editors. This scroll bar covers all the rows
+        self.virtual_diff = None
+        self.virtual_first_row = 0
+        self.virtual_end_row = 0
+        self.virtual_current_change = -1
+        self.virtual_rendering = False
+
+        self.virtual_scroll_bar = QtWidgets.QScrollBar( QtCore.Qt.Vertical )
+        self.virtual_scroll_bar.valueChanged.connect( self.__virtualScrollTo )
+        self.virtual_scroll_bar.hide()
+
+        layout = QtWidgets.QBoxLayout( QtWidgets.QBoxLayout.LeftToRight )
+        layout.setContentsMargins( 0, 0, 0, 0 )
+        layout.addWidget( self.splitter )
+        layout.addWidget( self.virtual_scroll_bar )
+
+        self.central_widget = QtWidgets.QWidget()
+        self.central_widget.setLayout( layout )
+
+        self.setCentralWidget( self.central_widget )
+
+        # calculate all the differences on a worker thread
+        # so that a large diff does not freeze the app
+        self.diff_cancelled = threading.Event()
+        self.diff_last_progress_time = 0
+        self.status_message.setText( T_('Calculating differences...') )
+
+        _executor().submit( self.__calculateDiff, file_left, file_right )
+
+    def __calculateDiff( self, file_left, file_right ):
+        if wb_diff_virtual.isVirtualDiffNeeded( file_left, file_right ):
+            try:
+                virtual_diff = wb_diff_virtual.virtualDiff( file_left, file_right,
+                                    self.app.prefs.diff.algorithm, self.diff_cancelled.is_set )
+
+                self.app.runInForeground( self.__virtualDiffReady, (virtual_diff,) )
+                return
+
+            except wb_diff_difflib.DiffCancelled:
+                return
+
+            except (ValueError, OSError):
+                # fall back to the normal diff
+                self.app.log.info( 'cannot diff %s and %s virtually' % (file_left, file_right) )
+
+            except Exception:
+                self.app.log.exception( 'diff of %s and %s failed' % (file_left, file_right) )
+                return
+
+        try:
+            diff_result = wb_diff_difflib.DiffResult()
+            diff = wb_diff_difflib.Difference( diff_result, self.diff_cancelled.is_set, self.__diffProgress,
+                                                self.app.prefs.diff.algorithm )
+
+            files_ok = diff.filecompare( file_left, file_right )
+
+        except wb_diff_difflib.DiffCancelled:
             return
 
-        self.setChangeCounts( 0, self.processor.getChangeCount() )
+        except Exception:
+            self.app.log.exception( 'diff of %s and %s failed' % (file_left, file_right) )
+            return
+
+        self.app.runInForeground( self.__diffReady, (files_ok, diff_result) )
 
-        self.setCentralWidget( self.splitter )
+    def __diffProgress( self, lines_done, total_lines ):
+        now = time.time()
+        if now - self.diff_last_progress_time < self.progress_interval:
+            return
+
+        self.diff_last_progress_time = now
+        self.app.runInForeground( self.__showDiffProgress, (lines_done, total_lines) )
+
+    def __showDiffProgress( self, lines_done, total_lines ):
+        if self.diff_cancelled.is_set():
+            return
+
+        self.status_message.setText( T_('Calculating differences %(percent)d%%') %
+                                        {'percent': lines_done*100 // max( 1, total_lines )} )
+
+    def __diffReady( self, files_ok, diff_result ):
+        if self.diff_cancelled.is_set():
+            return
+
+        if not files_ok:
+            self.status_message.setText( T_('Cannot read the files to compare') )
+            return
+
+        diff_result.replay( self.processor )
+
+        self.setChangeCounts( 0, self.processor.getChangeCount() )
 
         # start with folds collapsed
         self.actionFoldsCollapse()
         # show first diff
         self.actionDiffNext()
 
+    #------------------------------------------------------------
+    def __virtualDiffReady( self, virtual_diff ):
+        if self.diff_cancelled.is_set():
+            virtual_diff.close()
+            return
+
+        self.virtual_diff = virtual_diff
+
+        for ed in (self.panel_left.ed, self.panel_right.ed):
+            ed.setVScrollBar( False )
+            ed.setScrollHandler( self.__virtualEditorScrolled )
+
+        self.virtual_scroll_bar.show()
+        self.__virtualUpdateScrollBar( 0 )
+        self.__virtualRenderRows( 0 )
+
+        self.setChangeCounts( 0, self.virtual_diff.getChangeCount() )
+
+        # show first diff
+        self.actionDiffNext()
+
+    def __virtualLinesOnScreen( self ):
+        return max( 1, self.panel_left.ed.linesOnScreen() )
+
+    def __virtualUpdateScrollBar( self, row ):
+        lines_on_screen = self.__virtualLinesOnScreen()
+
+        self.virtual_scroll_bar.blockSignals( True )
+        self.virtual_scroll_bar.setRange( 0, max( 0, self.virtual_diff.total_rows - lines_on_screen ) )
+        self.virtual_scroll_bar.setPageStep( lines_on_screen )
+        self.virtual_scroll_bar.setValue( row )
+        self.virtual_scroll_bar.blockSignals( False )
+
+    def __virtualRenderRows( self, first_row ):
+        self.virtual_rendering = True
+
+        all_widgets = (self.panel_left.ed, self.panel_left.ed.diff_line_numbers,
+                        self.panel_right.ed, self.panel_right.ed.diff_line_numbers)
+        for widget in all_widgets:
+            widget.setReadOnly( 0 )
+            widget.clearAll()
+
+        self.virtual_first_row = first_row
+        self.virtual_end_row = min( self.virtual_diff.total_rows, first_row + self.virtual_page_rows )
+
+        # line numbers carry on from the lines before the window
+        lines_left, lines_right = self.virtual_diff.linesBeforeRow( first_row )
+        self.processor = wb_diff_processor.DiffProcessor( self.panel_left.ed, self.panel_right.ed, lines_left, lines_right )
+
+        self.virtual_diff.renderRows( first_row, self.virtual_end_row, self.processor )
+
+        for widget in all_widgets:
+            widget.emptyUndoBuffer()
+
+        self.__virtualMarkCurrentChange()
+
+        self.virtual_rendering = False
+
+    def __virtualMarkCurrentChange( self, is_current=True ):
+        if self.virtual_current_change < 0:
+            return
+
+        row = self.virtual_diff.all_changed_rows[ self.virtual_current_change ]
+        if self.virtual_first_row <= row < self.virtual_end_row:
+            for ed in (self.panel_left.ed, self.panel_right.ed):
+                numbers = ed.diff_line_numbers
+                if is_current:
+                    numbers.changeLineStyle( row - self.virtual_first_row, numbers.style_line_numbers_for_diff )
+
+                else:
+                    numbers.changeLineStyle( row - self.virtual_first_row, numbers.style_line_numbers )
+
+    # make row the first visible row, loading a new window of rows if needed
+    def __virtualScrollTo( self, row ):
+        if self.virtual_diff is None:
+            return
+
+        lines_on_screen = self.__virtualLinesOnScreen()
+        if( row < self.virtual_first_row
+        or (row + lines_on_screen > self.virtual_end_row and self.virtual_end_row < self.virtual_diff.total_rows) ):
+            self.__virtualRenderRows( max( 0, row - self.virtual_page_rows // 2 ) )
+
+        self.virtual_rendering = True
+
+        line = row - self.virtual_first_row
+        for ed in (self.panel_left.ed, self.panel_right.ed):
+            ed.setFirstVisibleLine( line )
+            ed.diff_line_numbers.setFirstVisibleLine( line )
+
+        self.virtual_rendering = False
+
+        self.__virtualUpdateScrollBar( row )
+
+    # the editors have been scrolled by the keyboard or mouse wheel
+    def __virtualEditorScrolled( self, line ):
+        if self.virtual_rendering:
+            return
+
+        row = self.virtual_first_row + line
+        lines_on_screen = self.__virtualLinesOnScreen()
+
+        # move the window before the edge of the loaded rows is reached
+        if( (line < lines_on_screen and self.virtual_first_row > 0)
+        or (row + 2*lines_on_screen > self.virtual_end_row and self.virtual_end_row < self.virtual_diff.total_rows) ):
+            self.__virtualScrollTo( row )
+
+        else:
+            self.__virtualUpdateScrollBar( row )
+
+    def __virtualShowChange( self, change ):
+        all_changed_rows = self.virtual_diff.all_changed_rows
+        if len(all_changed_rows) == 0:
+            return
+
+        self.__virtualMarkCurrentChange( False )
+
+        self.virtual_current_change = change % len(all_changed_rows)
+        row = all_changed_rows[ self.virtual_current_change ]
+
+        self.__virtualScrollTo( max( 0, row - 3 ) )
+        self.__virtualMarkCurrentChange()
+
+        self.virtual_rendering = True
+        for ed in (self.panel_left.ed, self.panel_right.ed):
+            ed.gotoLine( row - self.virtual_first_row )
+        self.virtual_rendering = False
+
+        self.setChangeCounts( self.virtual_current_change + 1 )
+
     def processKeyHandler( self, key ):
         if key in ('n', 'N'):
             self.actionDiffNext()
@@ -175,12 +411,23 @@ class DiffSideBySideView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
     #------------------------------------------------------------
     def closeEvent( self, event ):
         #qqq# save geometry
+        # stop any diff that is still being calculated
+        self.diff_cancelled.set()
+
+        if self.virtual_diff is not None:
+            self.virtual_diff.close()
+            self.virtual_diff = None
+
         super().closeEvent( event )
 
     def actionDiffNext( self ):
         if self.total_change_number == 0:
             return
 
+        if self.virtual_diff is not None:
+            self.__virtualShowChange( self.virtual_current_change + 1 )
+            return
+
         self.processor.moveNextChange()
         self.setChangeCounts( self.processor.getCurrentChange() )
 
@@ -188,6 +435,10 @@ class DiffSideBySideView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         if self.total_change_number == 0:
             return
 
+        if self.virtual_diff is not None:
+            self.__virtualShowChange( self.virtual_current_change - 1 )
+            return
+
         self.processor.movePrevChange()
         self.setChangeCounts( self.processor.getCurrentChange() )
 
@@ -204,6 +455,10 @@ class DiffSideBySideView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.processor.showCurrentChange()
 
     def showAllFolds( self, show ):
+        # there are no folds when diff'ing virtually
+        if self.virtual_diff is not None:
+            return
+
         self.panel_left.ed.showAllFolds( show )
         self.panel_right.ed.showAllFolds( show )
 
@@ -239,6 +494,7 @@ class DiffBodyText(wb_scintilla.WbScintilla):
         self.text_body_other = None
 
         self.process_key_handler = None
+        self.scroll_handler = None
 
         super().__init__( parent )
 
@@ -247,7 +503,6 @@ class DiffBodyText(wb_scintilla.WbScintilla):
         self.diff_line_numbers = DiffLineNumbers( app, parent, name='%s-numbers' % (self.name,) )
 
         self.fold_margin = -1
-        self.fold_start = -1
         self.fold_context_border = 1
         self.fold_minimum_length = self.fold_context_border * 2 + 1
 
@@ -337,6 +592,9 @@ class DiffBodyText(wb_scintilla.WbScintilla):
     def setProcessKeyHandler( self, handler ):
         self.process_key_handler = handler
 
+    def setScrollHandler( self, handler ):
+        self.scroll_handler = handler
+
     def keyPressEvent( self, event ):
         if self.process_key_handler( event.text() ):
             return
@@ -360,6 +618,9 @@ class DiffBodyText(wb_scintilla.WbScintilla):
         self.debugLog( 'onSyncScroll (%s) set first line %d' % (self.text_body_other.diff_line_numbers.name, line_number) )
         self.text_body_other.diff_line_numbers.setFirstVisibleLine( line_number )
 
+        if self.scroll_handler is not None:
+            self.scroll_handler( line_number )
+
     def setMirrorEditor( self, text_body_other ):
         self.text_body_other = text_body_other
 
@@ -445,25 +706,6 @@ class DiffBodyText(wb_scintilla.WbScintilla):
             self.hideLines( start_line, end_line )
             self.diff_line_numbers.hideLines( start_line, end_line )
 
-    def setFoldLine( self, line_number, is_fold_line ):
-        if is_fold_line:
-            if self.fold_start == -1:
-                self.fold_start = line_number
-
-            elif line_number - self.fold_start == self.fold_minimum_length:
-                self.setFoldLevel( self.fold_start, (self.SC_FOLDLEVELBASE+1) | self.SC_FOLDLEVELHEADERFLAG )
-                self.diff_line_numbers.setFoldLevel( self.fold_start, (self.SC_FOLDLEVELBASE+1) | self.SC_FOLDLEVELHEADERFLAG )
-
-            self.setFoldLevel( line_number, self.SC_FOLDLEVELBASE+1 )
-            self.diff_line_numbers.setFoldLevel( line_number, self.SC_FOLDLEVELBASE+1 )
-
-        else:
-            self.setFoldLevel( line_number, self.SC_FOLDLEVELBASE )
-            self.diff_line_numbers.setFoldLevel( line_number, self.SC_FOLDLEVELBASE )
-
-            if self.fold_start != -1:
-                self.fold_start = -1
-
     def showAllFolds(self, show_folds):
         for line in range( self.getLineCount() ):
             if( self.getFoldLevel( line ) & self.SC_FOLDLEVELHEADERFLAG
@@ -0,0 +1,265 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_diff_virtual.py
+
+    diff of very large files that only keeps the hunks in memory
+    and reads the lines that are being shown from the files
+
+'''
+import os
+import mmap
+import array
+import bisect
+
+import wb_read_file
+import wb_diff_difflib
+
+# files bigger then this are diff'ed virtually
+virtual_min_file_size = 16*1024*1024
+virtual_min_lines = 250000
+
+# diff virtually if either side is large
+def isVirtualDiffNeeded( file_left, file_right ):
+    for file in (file_left, file_right):
+        if type(file) == type([]):
+            if len(file) >= virtual_min_lines:
+                return True
+
+        else:
+            try:
+                if os.stat( file ).st_size >= virtual_min_file_size:
+                    return True
+
+            except OSError:
+                pass
+
+    return False
+
+def linesFor( file, is_cancelled ):
+    if type(file) == type([]):
+        return ListLines( file )
+
+    else:
+        return MappedLines( file, is_cancelled )
+
+#
+#   The lines are hashed as bytes in the same way as MappedLines
+#   so that the keys of the two sides can be compared.
+#
+class ListLines:
+    # a list of text lines has no encoding of its own
+    encoding = None
+
+    def __init__( self, all_lines ):
+        self.all_lines = [wb_diff_difflib.eolRemoval( line ) for line in all_lines]
+
+    def close( self ):
+        pass
+
+    def __len__( self ):
+        return len(self.all_lines)
+
+    def line( self, index ):
+        return self.all_lines[ index ]
+
+    def lineKeys( self, encoding ):
+        return array.array( 'q', [hash( self.__encodeLine( line, encoding ) ) for line in self.all_lines] )
+
+    def __encodeLine( self, line, encoding ):
+        try:
+            # surrogateescape gives back the bytes of lines that were not valid when decoded
+            return line.encode( encoding, 'surrogateescape' )
+
+        except UnicodeEncodeError:
+            return line.encode( encoding, 'replace' )
+
+#
+#   The lines of the file are found once and only the offset
+#   of each line and a hash of its contents is kept.
+#   The text of a line is decoded when it is shown.
+#
+class MappedLines:
+    read_size = 16*1024*1024
+
+    def __init__( self, filename, is_cancelled ):
+        self.file = open( filename, 'rb' )
+
+        size = os.fstat( self.file.fileno() ).st_size
+        if size == 0:
+            self.contents = b''
+
+        else:
+            self.contents = mmap.mmap( self.file.fileno(), 0, access=mmap.ACCESS_READ )
+
+        self.encoding = wb_read_file.encodingFromContents( self.contents[:4] )
+        if self.encoding in ('utf-16', 'utf-32'):
+            # lines cannot be found by looking for b'\n'
+            self.close()
+            raise ValueError( 'cannot diff %s files virtually' % (self.encoding,) )
+
+        # offset of the start of each line and one more for the end
+        self.all_offsets = array.array( 'q', [0] )
+        self.all_keys = array.array( 'q' )
+
+        # a final line without a \n is still a line, which is
+        # the same as str.split( '\n' ) used for the normal diff
+        pending = b''
+        offset = 0
+        while offset < size:
+            if is_cancelled():
+                self.close()
+                raise wb_diff_difflib.DiffCancelled()
+
+            chunk = pending + self.contents[ offset:offset + self.read_size ]
+            offset += self.read_size
+
+            all_chunk_lines = chunk.split( b'\n' )
+            pending = all_chunk_lines.pop()
+
+            line_offset = self.all_offsets[-1]
+            for line in all_chunk_lines:
+                line_offset += len(line) + 1
+                self.all_offsets.append( line_offset )
+                self.all_keys.append( hash( line.rstrip( b'\r' ) ) )
+
+        self.all_offsets.append( size + 1 )
+        self.all_keys.append( hash( pending.rstrip( b'\r' ) ) )
+
+    def close( self ):
+        if type(self.contents) == mmap.mmap:
+            self.contents.close()
+
+        self.file.close()
+
+    def __len__( self ):
+        return len(self.all_keys)
+
+    def line( self, index ):
+        line = self.contents[ self.all_offsets[ index ]:self.all_offsets[ index + 1 ] - 1 ]
+        return wb_diff_difflib.eolRemoval( line.decode( self.encoding, 'replace' ) )
+
+    # lines are compared by the hash of their bytes in self.encoding
+    def lineKeys( self, encoding ):
+        return self.all_keys
+
+#
+#   VirtualDiff turns the diff opcodes into rows of the side by side view.
+#
+#   equal, delete and insert blocks have one row per line.
+#   replace blocks pair up the lines of each side as changed lines
+#   followed by the left over deleted or inserted lines.
+#
+class VirtualDiff:
+    def __init__( self, lines_left, lines_right, all_opcodes ):
+        self.lines_left = lines_left
+        self.lines_right = lines_right
+
+        self.all_opcodes = all_opcodes
+        self.all_block_first_rows = []
+        # first row of each change - the same as DiffOneSideProcessor.changed_lines
+        self.all_changed_rows = []
+
+        row = 0
+        for tag, i1, i2, j1, j2 in all_opcodes:
+            self.all_block_first_rows.append( row )
+            if tag != 'equal':
+                self.all_changed_rows.append( row )
+
+            row += max( i2 - i1, j2 - j1 )
+
+        self.total_rows = row
+
+    def close( self ):
+        self.lines_left.close()
+        self.lines_right.close()
+
+    def getChangeCount( self ):
+        return len(self.all_changed_rows)
+
+    # return the number of left and right lines before row
+    def linesBeforeRow( self, row ):
+        if self.total_rows == 0:
+            return 0, 0
+
+        block = bisect.bisect_right( self.all_block_first_rows, row ) - 1
+        tag, i1, i2, j1, j2 = self.all_opcodes[ block ]
+        offset = row - self.all_block_first_rows[ block ]
+
+        return i1 + min( offset, i2 - i1 ), j1 + min( offset, j2 - j1 )
+
+    # send the rows from first_row up to end_row to the text_body
+    # in the same way that Difference does
+    def renderRows( self, first_row, end_row, text_body ):
+        diff = wb_diff_difflib.Difference( text_body )
+
+        line = self.lines_left.line
+        line_right = self.lines_right.line
+
+        block = max( 0, bisect.bisect_right( self.all_block_first_rows, first_row ) - 1 )
+        row = first_row
+        while row < end_row and block < len(self.all_opcodes):
+            tag, i1, i2, j1, j2 = self.all_opcodes[ block ]
+            block_first_row = self.all_block_first_rows[ block ]
+            block_end_row = min( end_row, block_first_row + max( i2 - i1, j2 - j1 ) )
+
+            for offset in range( row - block_first_row, block_end_row - block_first_row ):
+                if tag == 'equal':
+                    text_body.addNormalLine( line( i1 + offset ) )
+
+                elif tag == 'delete':
+                    text_body.addDeletedLine( line( i1 + offset ) )
+
+                elif tag == 'insert':
+                    text_body.addInsertedLine( line_right( j1 + offset ) )
+
+                elif tag == 'replace':
+                    if offset < i2 - i1 and offset < j2 - j1:
+                        diff.addChangedLine( line( i1 + offset ), line_right( j1 + offset ) )
+
+                    elif offset < i2 - i1:
+                        text_body.addDeletedLine( line( i1 + offset ) )
+
+                    else:
+                        text_body.addInsertedLine( line_right( j1 + offset ) )
+
+                else:
+                    raise ValueError( 'unknown tag ' + str( tag ) )
+
+            row = block_end_row
+            block += 1
+
+        text_body.addEnd()
+
+# called on a worker thread
+def virtualDiff( file_left, file_right, algorithm, is_cancelled ):
+    lines_left = linesFor( file_left, is_cancelled )
+    try:
+        lines_right = linesFor( file_right, is_cancelled )
+
+    except:
+        lines_left.close()
+        raise
+
+    def checkCancelled():
+        if is_cancelled():
+            raise wb_diff_difflib.DiffCancelled()
+
+    # both sides must hash their lines as bytes in the same encoding
+    encoding = lines_left.encoding or lines_right.encoding or 'utf-8'
+
+    try:
+        all_opcodes = wb_diff_difflib.getOpcodesForKeys( algorithm, lines_left.lineKeys( encoding ), lines_right.lineKeys( encoding ), checkCancelled )
+
+    except:
+        lines_left.close()
+        lines_right.close()
+        raise
+
+    return VirtualDiff( lines_left, lines_right, all_opcodes )
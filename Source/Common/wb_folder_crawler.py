@@ -0,0 +1,119 @@
+'''
+ ====================================================================
+ Copyright (c) 2017 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_folder_crawler.py
+
+    find all the files and folders in a working copy
+
+'''
+import os
+import pathlib
+import threading
+import concurrent.futures
+
+__executor = None
+__executor_lock = threading.Lock()
+
+def _executor():
+    global __executor
+
+    with __executor_lock:
+        if __executor is None:
+            __executor = concurrent.futures.ThreadPoolExecutor(
+                                max_workers=min( 8, (os.cpu_count() or 1) + 4 ),
+                                thread_name_prefix='wb_folder_crawler' )
+
+        return __executor
+
+#
+#   crawlFolders returns a dict of all_listings with an entry for each folder
+#   in the working copy:
+#
+#       all_listings[ folder ] = (mtime_ns, all_entries)
+#
+#   where folder is the pathlib.Path relative to root and all_entries is
+#   a dict of name to is_dir for each file and folder in folder.
+#
+#   If all_previous_listings is given folders with an unchanged mtime that
+#   is before racy_time reuse the previous all_entries dict without
+#   reading the folder; callers can test with "is" to find changed folders.
+#
+#   The scm_dir_name folder at the top of the working copy is skipped.
+#
+#   The crawl starts from all_start_folders, default the top folder,
+#   and only descends into sub folders if recursive is True.
+#
+def crawlFolders( root, scm_dir_name, all_previous_listings=None, racy_time=0, all_start_folders=None, recursive=True ):
+    root = str( root )
+    if all_previous_listings is None:
+        all_previous_listings = {}
+
+    all_listings = {}
+
+    if all_start_folders is None:
+        all_folders = [pathlib.Path( '.' )]
+
+    else:
+        all_folders = list( all_start_folders )
+
+    while len(all_folders) > 0:
+        if len(all_folders) == 1:
+            all_results = [_readFolder( root, scm_dir_name, all_folders[0], all_previous_listings, racy_time )]
+
+        else:
+            all_results = _executor().map(
+                            lambda folder: _readFolder( root, scm_dir_name, folder, all_previous_listings, racy_time ),
+                            all_folders )
+
+        all_next_folders = []
+        for folder, listing in zip( all_folders, all_results ):
+            if listing is None:
+                continue
+
+            all_listings[ folder ] = listing
+            if not recursive:
+                continue
+
+            for name, is_dir in listing[1].items():
+                if is_dir:
+                    all_next_folders.append( folder / name )
+
+        all_folders = all_next_folders
+
+    return all_listings
+
+def _readFolder( root, scm_dir_name, folder, all_previous_listings, racy_time ):
+    abs_folder = os.path.join( root, *folder.parts )
+
+    try:
+        mtime = os.stat( abs_folder ).st_mtime_ns
+
+        previous_listing = all_previous_listings.get( folder )
+        if( previous_listing is not None
+        and previous_listing[0] == mtime
+        and mtime < racy_time ):
+            return previous_listing
+
+        is_top = folder.parts == ()
+
+        all_entries = {}
+        with os.scandir( abs_folder ) as all_dirents:
+            for dirent in all_dirents:
+                # is_dir() uses d_type and only needs a stat for symlinks
+                is_dir = dirent.is_dir()
+                if is_dir and is_top and dirent.name == scm_dir_name:
+                    continue
+
+                all_entries[ dirent.name ] = is_dir
+
+        return (mtime, all_entries)
+
+    except OSError:
+        # deleted while being scanned
+        return None
@@ -18,6 +18,7 @@ import os
 import time
 import logging
 import traceback
+import collections
 
 import wb_platform_specific
 
@@ -27,6 +28,9 @@ from PyQt5 import QtCore
 
 INFOHEADER = logging.INFO + 1
 
+def U_( s: str ) -> str:
+    return s
+
 class AppLoggingMixin:
     def __init__( self, extra_logger_names=None ):
         self.log = None
@@ -153,7 +157,8 @@ class ThreadSafeLogFacade:
             func( *args )
 
         else:
-            self.__app.runInForeground( func, args )
+            # many lines can be logged quickly so batch them up
+            self.__app.runInForegroundBatched( func, args )
 
     def setLevel( self, level ):
         assert self.__app.isForegroundThread()
@@ -231,7 +236,7 @@ class WbLog:
         return self.__log_widget
 
     def clearLog( self ):
-        self.__log_widget.clear()
+        self.__log_widget.clearText()
 
     #---------- look like a file object -------------------------
     def write( self, msg ):
@@ -285,7 +290,14 @@ class WidgetLogHandler(logging.Handler):
             self.log_widget.writeError( msg )
 
 #--------------------------------------------------------------------------------
-class WbLogTextWidget(QtWidgets.QTextEdit):
+#
+#   The log keeps the last max_records records in a ring buffer.
+#   The widget shows the records of the levels that are not hidden.
+#
+#   Records are added to the widget in one go on the next pass of
+#   the event loop so that a burst of records is only laid out once.
+#
+class WbLogTextWidget(QtWidgets.QPlainTextEdit):
     style_normal = 0
     style_error = 1
     style_info = 2
@@ -317,8 +329,19 @@ class WbLogTextWidget(QtWidgets.QTextEdit):
         (style_info,        '#f060f0', ''),  # light purple
         )
 
+    # the levels that can be hidden and the styles of each level
+    all_filter_levels = (
+        (U_('Critical'),    (style_critical,)),
+        (U_('Error'),       (style_error,)),
+        (U_('Warning'),     (style_warning,)),
+        (U_('Info'),        (style_info, style_infoheader, style_divider)),
+        (U_('Debug'),       (style_debug,)),
+        )
+
     divider_text = '\u2500'*60 + '\n'
 
+    max_records = 20000
+
     def __init__( self, app ):
         self.app = app
 
@@ -327,6 +350,16 @@ class WbLogTextWidget(QtWidgets.QTextEdit):
         super().__init__()
         self.setReadOnly( True )
         self.setTextInteractionFlags( QtCore.Qt.TextSelectableByMouse|QtCore.Qt.TextSelectableByKeyboard )
+        self.setMaximumBlockCount( self.max_records )
+
+        self.all_records = collections.deque( maxlen=self.max_records )
+        self.all_pending_records = []
+        self.all_hidden_styles = set()
+        self.find_text = ''
+
+        self.timer_flush = QtCore.QTimer()
+        self.timer_flush.timeout.connect( self.__flushPendingRecords )
+        self.timer_flush.setSingleShot( True )
 
     def initStyles( self ):
         if self.app.isDarkMode():
@@ -343,14 +376,34 @@ class WbLogTextWidget(QtWidgets.QTextEdit):
             self.all_text_formats[ style ] = fmt
 
     def __writeStyledText( self, text, style ):
-        self.moveCursor( QtGui.QTextCursor.End )
+        record = (style, text)
+        self.all_records.append( record )
+
+        if style not in self.all_hidden_styles:
+            self.all_pending_records.append( record )
+            if not self.timer_flush.isActive():
+                self.timer_flush.start( 0 )
 
-        cursor = self.textCursor()
+    def __flushPendingRecords( self ):
+        all_records = self.all_pending_records
+        self.all_pending_records = []
+
+        # older records are dropped by the ring buffer
+        # so there is no point in showing more then that
+        self.__insertRecords( all_records[-self.max_records:] )
+
+    def __insertRecords( self, all_records ):
+        if len(all_records) == 0:
+            return
+
+        cursor = QtGui.QTextCursor( self.document() )
+        cursor.movePosition( QtGui.QTextCursor.End )
         cursor.beginEditBlock()
-        cursor.setCharFormat( self.all_text_formats[ style ] )
-        cursor.insertText( text )
+        for style, text in all_records:
+            cursor.insertText( text, self.all_text_formats[ style ] )
         cursor.endEditBlock()
 
+        self.moveCursor( QtGui.QTextCursor.End )
         self.ensureCursorVisible()
 
     def writeNormal( self, text ):
@@ -376,7 +429,57 @@ class WbLogTextWidget(QtWidgets.QTextEdit):
         self.__writeStyledText( text, self.style_debug )
 
     def clearText( self ):
+        self.all_records.clear()
+        self.all_pending_records = []
+        self.clear()
+
+    #------------------------------------------------------------
+    def setStylesVisible( self, all_styles, visible ):
+        if visible:
+            self.all_hidden_styles.difference_update( all_styles )
+
+        else:
+            self.all_hidden_styles.update( all_styles )
+
+        # show the records from the buffer that match the new filter
+        self.all_pending_records = []
         self.clear()
+        self.__insertRecords( [record for record in self.all_records if record[0] not in self.all_hidden_styles] )
+
+    def findText( self, text, backward=False ):
+        self.find_text = text
+        if text == '':
+            return False
+
+        flags = QtGui.QTextDocument.FindBackward if backward else QtGui.QTextDocument.FindFlags()
+        if self.find( text, flags ):
+            return True
+
+        # wrap around to search the rest of the log
+        self.moveCursor( QtGui.QTextCursor.End if backward else QtGui.QTextCursor.Start )
+        return self.find( text, flags )
+
+    def contextMenuEvent( self, event ):
+        menu = self.createStandardContextMenu()
+
+        menu.addSeparator()
+        menu.addAction( T_('Find...'), self.__findDialog )
+        act = menu.addAction( T_('Find Next'), lambda: self.findText( self.find_text ) )
+        act.setEnabled( self.find_text != '' )
+
+        menu.addSection( T_('Show') )
+        for name, all_styles in self.all_filter_levels:
+            act = menu.addAction( T_(name) )
+            act.setCheckable( True )
+            act.setChecked( all_styles[0] not in self.all_hidden_styles )
+            act.toggled.connect( lambda checked, all_styles=all_styles: self.setStylesVisible( all_styles, checked ) )
+
+        menu.exec_( event.globalPos() )
+
+    def __findDialog( self ):
+        text, ok = QtWidgets.QInputDialog.getText( self, T_('Find in log'), T_('Find:'), text=self.find_text )
+        if ok:
+            self.findText( text )
 
 #--------------------------------------------------------------------------------
 #
@@ -103,8 +103,14 @@ class WbMainWindow(QtWidgets.QMainWindow):
         if group is not None:
             group.addAction( action )
 
-    def _addToolBar( self, name, style=None ):
-        bar = self.addToolBar( name )
+    def _addToolBar( self, name, style=None, before=None ):
+        if before is None:
+            bar = self.addToolBar( name )
+
+        else:
+            bar = QtWidgets.QToolBar( name, self )
+            self.insertToolBar( before, bar )
+
         bar.setIconSize( self.icon_size )
         if style is not None:
             bar.setStyleSheet( 'QToolButton{%s}' % (style,) )
@@ -51,6 +51,9 @@ def getLastCheckinMessageFilename():
 def getLastLockMessageFilename():
     return getPreferencesDir() / 'lock_message.txt'
 
+def getCacheDir():
+    return getPreferencesDir() / 'cache'
+
 def setupPlatform( all_name_parts, argv0 ):
     setupPlatformSpecific( all_name_parts, argv0 )
 
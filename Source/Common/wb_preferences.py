@@ -73,6 +73,7 @@ class Preferences(PreferencesNode):
         self.font_code = None                   # type: Font
         self.main_window = None                 # type: MainWindow
         self.diff_window = None                 # type: MainWindow
+        self.diff = None                        # type: Diff
         self.last_position = None               # type: LastPosition
         self.all_favorites = {}                 # type: Dict[str, Favorite]
         self.all_favorites_by_path = {}
@@ -218,6 +219,15 @@ class Colour(PreferencesNode):
         self.fg = fg
         self.bg = bg
 
+class Diff(PreferencesNode):
+    xml_attribute_info = ('algorithm',)
+
+    def __init__( self ) -> None:
+        super().__init__()
+
+        # one of wb_diff_difflib.all_diff_algorithms
+        self.algorithm = 'histogram'
+
 class Editor(PreferencesNode):
     xml_attribute_info = ('program', 'options')
 
@@ -339,6 +349,7 @@ scheme_nodes = (
         << SchemeNode( Colour, 'colour_delete_char', default_attributes={'fg': wb_config.diff_light_colour_delete_char} )
         << SchemeNode( Colour, 'colour_change_char', default_attributes={'fg': wb_config.diff_light_colour_change_char} )
         )
+    <<  SchemeNode( Diff, 'diff' )
     <<  (SchemeNode( ProjectCollection, 'projects', store_as='all_projects' )
         << SchemeNode( Project, 'project', key_attribute='name' )
         )
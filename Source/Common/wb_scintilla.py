@@ -50,9 +50,28 @@ class WbScintilla(Qsci.QsciScintilla):
     def insertText( self, pos, text ):
         self.SendScintilla( self.SCI_INSERTTEXT, pos, text.encode( 'utf-8' ) )
 
+    # all_styled_text is a list of (utf-8 bytes, style_number)
+    # and is added at the current position in one call
+    def addStyledText( self, all_styled_text ):
+        total_length = sum( len(text) for text, style_number in all_styled_text )
+
+        # cells are pairs of text byte then style byte
+        cells = bytearray( 2*total_length )
+        pos = 0
+        for text, style_number in all_styled_text:
+            end = pos + 2*len(text)
+            cells[ pos:end:2 ] = text
+            cells[ pos+1:end:2 ] = bytes( (style_number,) )*len(text)
+            pos = end
+
+        self.SendScintilla( self.SCI_ADDSTYLEDTEXT, len(cells), bytes( cells ) )
+
     def replaceSel( self, text ):
         self.SendScintilla( self.SCI_REPLACESEL, text.encode( 'utf-8' ) )
 
+    def clearAll( self ):
+        self.SendScintilla( self.SCI_CLEARALL )
+
     def setReadOnly( self, readonly ):
         self.SendScintilla( self.SCI_SETREADONLY, readonly )
 
@@ -94,6 +113,9 @@ class WbScintilla(Qsci.QsciScintilla):
     def getFirstVisibleLine( self ):
         return self.SendScintilla( self.SCI_GETFIRSTVISIBLELINE )
 
+    def linesOnScreen( self ):
+        return self.SendScintilla( self.SCI_LINESONSCREEN )
+
     def gotoLine( self, line ):
         self.SendScintilla( self.SCI_GOTOLINE, line )
 
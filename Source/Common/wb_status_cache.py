@@ -0,0 +1,121 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_status_cache.py
+
+    save the status of a project so that it can be shown
+    at start up while the real status is found
+
+'''
+import hashlib
+import sqlite3
+
+import wb_platform_specific
+
+FLAG_IS_DIR = 1
+FLAG_ON_DISK = 2
+FLAG_CONTROLLED = 4
+FLAG_UNTRACKED = 8
+
+class WbStatusCacheSnapshot:
+    def __init__( self ):
+        self.all_info = {}
+        # folder: mtime_ns
+        self.all_folders = {}
+        # (path, flags, staged, unstaged, renamed_from, renamed_to)
+        self.all_file_records = []
+
+class WbStatusCache:
+    version = '1'
+
+    def __init__( self, app, scm_type, project_path ):
+        self.app = app
+        self.debugLog = self.app.debug_options.debugLogStatusCache
+
+        key = hashlib.sha1( str( project_path ).encode( 'utf-8' ) ).hexdigest()
+        self.filename = wb_platform_specific.getCacheDir() / ('%s-status-%s.db' % (scm_type, key))
+
+        self.__project_path = str( project_path )
+
+    def __connect( self ):
+        if not self.filename.parent.exists():
+            self.filename.parent.mkdir( parents=True )
+
+        db = sqlite3.connect( str( self.filename ) )
+        db.execute( 'CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)' )
+        db.execute( 'CREATE TABLE IF NOT EXISTS folder (path TEXT PRIMARY KEY, mtime INTEGER)' )
+        db.execute( 'CREATE TABLE IF NOT EXISTS file_state'
+                    ' (path TEXT PRIMARY KEY, flags INTEGER, staged TEXT, unstaged TEXT, renamed_from TEXT, renamed_to TEXT)' )
+        return db
+
+    def load( self ):
+        if not self.filename.exists():
+            return None
+
+        try:
+            db = self.__connect()
+            try:
+                snapshot = WbStatusCacheSnapshot()
+                snapshot.all_info = dict( db.execute( 'SELECT name, value FROM info' ) )
+
+                if( snapshot.all_info.get( 'version' ) != self.version
+                or snapshot.all_info.get( 'project_path' ) != self.__project_path ):
+                    self.debugLog( 'load %s ignored info %r' % (self.filename, snapshot.all_info) )
+                    return None
+
+                snapshot.all_folders = dict( db.execute( 'SELECT path, mtime FROM folder' ) )
+                snapshot.all_file_records = db.execute( 'SELECT path, flags, staged, unstaged, renamed_from, renamed_to FROM file_state' ).fetchall()
+
+            finally:
+                db.close()
+
+        except sqlite3.Error as e:
+            self.app.log.error( T_('Cannot read status cache %(filename)s: %(error)s') %
+                                {'filename': self.filename, 'error': e} )
+            return None
+
+        self.debugLog( 'load %s %d folders %d files' %
+                        (self.filename, len(snapshot.all_folders), len(snapshot.all_file_records)) )
+        return snapshot
+
+    # all_file_records replace the saved records for the same paths
+    # and all_deleted_paths are removed. all_folders replaces all the saved folders
+    def save( self, all_info, all_folders, all_file_records, all_deleted_paths ):
+        self.debugLog( 'save %s %d folders %d files %d deleted' %
+                        (self.filename, len(all_folders), len(all_file_records), len(all_deleted_paths)) )
+
+        all_info = dict( all_info )
+        all_info['version'] = self.version
+        all_info['project_path'] = self.__project_path
+
+        try:
+            db = self.__connect()
+            try:
+                with db:
+                    db.executemany( 'INSERT OR REPLACE INTO info (name, value) VALUES (?, ?)',
+                                    [(name, str(value)) for name, value in all_info.items()] )
+
+                    db.execute( 'DELETE FROM folder' )
+                    db.executemany( 'INSERT INTO folder (path, mtime) VALUES (?, ?)', all_folders.items() )
+
+                    db.executemany( 'DELETE FROM file_state WHERE path = ?', [(path,) for path in all_deleted_paths] )
+                    db.executemany( 'INSERT OR REPLACE INTO file_state'
+                                    ' (path, flags, staged, unstaged, renamed_from, renamed_to) VALUES (?, ?, ?, ?, ?, ?)',
+                                    all_file_records )
+
+            finally:
+                db.close()
+
+        except sqlite3.Error as e:
+            self.app.log.error( T_('Cannot write status cache %(filename)s: %(error)s') %
+                                {'filename': self.filename, 'error': e} )
+
+    def clear( self ):
+        if self.filename.exists():
+            self.filename.unlink()
@@ -0,0 +1,218 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_git_cat_file.py
+
+    read blobs from long lived git cat-file processes
+    and keep the text lines of recently read blobs in memory
+
+'''
+import re
+import threading
+import subprocess
+import collections
+
+import git
+
+__all_cat_files = {}
+__all_cat_files_lock = threading.Lock()
+
+def catFileForRepo( repo ):
+    with __all_cat_files_lock:
+        key = repo.git_dir
+        if key not in __all_cat_files:
+            __all_cat_files[ key ] = WbGitCatFile( key )
+
+        return __all_cat_files[ key ]
+
+# stop the git cat-file processes of the repo
+def closeCatFileForRepo( repo ):
+    with __all_cat_files_lock:
+        cat_file = __all_cat_files.pop( repo.git_dir, None )
+
+    if cat_file is not None:
+        cat_file.close()
+
+def isObjectId( what ):
+    return re.match( '^[0-9a-f]{40}$', what ) is not None
+
+#
+#   return the text lines of the blob named by what, which can be
+#   a blob id or any name that git understands, such as commit:path.
+#   Raises KeyError if there is no such blob or what is not a blob.
+#
+def textLinesForObject( cat_file, what ):
+    if isObjectId( what ):
+        object_id = what
+
+    else:
+        info = cat_file.objectInfo( what )
+        if info is None:
+            raise KeyError( what )
+
+        object_id, object_type, size = info
+        if object_type != 'blob':
+            raise KeyError( what )
+
+    all_lines = blob_lines_cache.get( object_id )
+    if all_lines is None:
+        result = cat_file.readObject( object_id )
+        if result is None:
+            raise KeyError( what )
+
+        object_type, data = result
+        if object_type != 'blob':
+            raise KeyError( what )
+
+        # decode like git show does so that none utf-8 text can be shown
+        all_lines = data.decode( 'utf-8', 'surrogateescape' ).split( '\n' )
+        if all_lines[-1] == '':
+            del all_lines[-1]
+
+        blob_lines_cache.put( object_id, all_lines, len(data) )
+
+    # the cached list is shared so return a copy that the caller can change
+    return list( all_lines )
+
+#
+#   One git cat-file --batch-check process answers what an object is
+#   and one git cat-file --batch process returns the contents of objects.
+#   The processes are started when first needed and restarted if they exit.
+#
+class WbGitCatFile:
+    def __init__( self, git_dir ):
+        self.__git_dir = git_dir
+        self.__lock = threading.Lock()
+
+        self.__all_processes = {}
+
+    def close( self ):
+        with self.__lock:
+            for process in self.__all_processes.values():
+                self.__stopProcess( process )
+
+            self.__all_processes = {}
+
+    # return (object_id, object_type, size) or None if what does not exist
+    def objectInfo( self, what ):
+        with self.__lock:
+            return self.__request( '--batch-check', what )
+
+    # return (object_type, data) or None if what does not exist
+    def readObject( self, what ):
+        with self.__lock:
+            header = self.__request( '--batch', what )
+            if header is None:
+                return None
+
+            object_id, object_type, size = header
+            process = self.__all_processes[ '--batch' ]
+
+            data = process.stdout.read( size )
+            # the contents are followed by a \n
+            process.stdout.read( 1 )
+
+            if len(data) != size:
+                self.__stopProcess( self.__all_processes.pop( '--batch' ) )
+                raise IOError( 'git cat-file exited while reading %s' % (what,) )
+
+            return object_type, data
+
+    def __request( self, option, what ):
+        # try again with a new process if the old one has exited
+        for attempt in (1, 2):
+            process = self.__all_processes.get( option )
+            if process is None:
+                process = self.__startProcess( option )
+                self.__all_processes[ option ] = process
+
+            try:
+                process.stdin.write( what.encode( 'utf-8' ) + b'\n' )
+                process.stdin.flush()
+
+                header = process.stdout.readline()
+
+            except (IOError, ValueError):
+                header = b''
+
+            if header != b'':
+                break
+
+            self.__stopProcess( self.__all_processes.pop( option ) )
+
+        else:
+            raise IOError( 'git cat-file %s failed for %s' % (option, what) )
+
+        header = header.decode( 'utf-8' ).rstrip( '\n' )
+
+        # "<what> missing" or "<what> ambiguous"
+        if header.endswith( ' missing' ) or header.endswith( ' ambiguous' ):
+            return None
+
+        object_id, object_type, size = header.split( ' ' )
+        return object_id, object_type, int( size )
+
+    def __startProcess( self, option ):
+        return subprocess.Popen(
+                    [git.Git.GIT_PYTHON_GIT_EXECUTABLE, '--git-dir', self.__git_dir, 'cat-file', option],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    # do not show a console window on Windows
+                    creationflags=getattr( subprocess, 'CREATE_NO_WINDOW', 0 ) )
+
+    def __stopProcess( self, process ):
+        try:
+            # cat-file exits when its input is closed
+            process.stdin.close()
+            process.wait( 5 )
+
+        except (IOError, subprocess.TimeoutExpired):
+            process.kill()
+
+        process.stdout.close()
+
+#
+#   The text lines of blobs keyed by blob id.
+#   A blob never changes so the lines can be shared by all projects.
+#   The cache is limited by the total size of the blobs.
+#
+class WbGitBlobLinesCache:
+    def __init__( self, max_size ):
+        self.__max_size = max_size
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__all_lines = collections.OrderedDict()
+
+    def get( self, object_id ):
+        with self.__lock:
+            entry = self.__all_lines.get( object_id )
+            if entry is None:
+                return None
+
+            self.__all_lines.move_to_end( object_id )
+            return entry[0]
+
+    def put( self, object_id, all_lines, size ):
+        # do not let one huge blob empty the cache
+        if size > self.__max_size // 4:
+            return
+
+        with self.__lock:
+            if object_id in self.__all_lines:
+                return
+
+            self.__all_lines[ object_id ] = (all_lines, size)
+            self.__size += size
+
+            while self.__size > self.__max_size:
+                old_object_id, old_entry = self.__all_lines.popitem( last=False )
+                self.__size -= old_entry[1]
+
+blob_lines_cache = WbGitBlobLinesCache( 64*1024*1024 )
@@ -0,0 +1,205 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_git_commit_graph.py
+
+    an index of the parents of each commit in a repository
+    used to answer ancestry questions without walking
+    the history with GitPython Commit objects
+
+'''
+import heapq
+import tempfile
+import threading
+
+import git
+
+__all_graphs = {}
+__all_graphs_lock = threading.Lock()
+
+def commitGraphForRepo( repo ):
+    with __all_graphs_lock:
+        key = repo.git_dir
+        if key not in __all_graphs:
+            __all_graphs[ key ] = WbGitCommitGraph()
+
+        return __all_graphs[ key ]
+
+#
+#   Commits are given integer ids in the order they are added.
+#   Parents are always added before their children so the
+#   generation number of a commit, one more than the largest
+#   generation of its parents, is known when it is added.
+#
+#   Commits are never removed as a commit cannot change.
+#   The graph is extended when it is asked about a commit
+#   that it does not know.
+#
+class WbGitCommitGraph:
+    # flags used while walking the graph
+    __from_left = 1
+    __from_right = 2
+
+    def __init__( self ):
+        self.__lock = threading.Lock()
+
+        self.all_commit_ids = []
+        self.all_index_by_commit_id = {}
+        self.all_parents = []
+        self.all_generations = []
+
+        # commits given to rev-list - all other commits are reachable from these.
+        # No tip is an ancestor of another tip
+        self.__all_tip_indexes = set()
+
+    def __len__( self ):
+        return len(self.all_commit_ids)
+
+    def hasCommit( self, commit_id ):
+        return commit_id in self.all_index_by_commit_id
+
+    # return the commit ids reachable from commit_id that are not
+    # reachable from exclude_commit_id, newest first
+    def commitsOnlyIn( self, repo, commit_id, exclude_commit_id ):
+        with self.__lock:
+            self.__update( repo, [commit_id, exclude_commit_id] )
+
+            all_left, all_right = self.__paint( commit_id, exclude_commit_id )
+
+            return [self.all_commit_ids[ index ] for index in sorted( all_left, reverse=True )]
+
+    # return (ahead, behind) counts of commit_id compared to other_commit_id
+    def aheadBehind( self, repo, commit_id, other_commit_id ):
+        with self.__lock:
+            self.__update( repo, [commit_id, other_commit_id] )
+
+            all_left, all_right = self.__paint( commit_id, other_commit_id )
+
+            return len(all_left), len(all_right)
+
+    # return True if ancestor_commit_id is reachable from commit_id
+    def isAncestor( self, repo, ancestor_commit_id, commit_id ):
+        with self.__lock:
+            self.__update( repo, [ancestor_commit_id, commit_id] )
+
+            target = self.all_index_by_commit_id[ ancestor_commit_id ]
+            target_generation = self.all_generations[ target ]
+
+            # no need to look at commits older than the ancestor
+            all_seen = set()
+            all_to_visit = [self.all_index_by_commit_id[ commit_id ]]
+            while len(all_to_visit) > 0:
+                index = all_to_visit.pop()
+                if index == target:
+                    return True
+
+                if index in all_seen or self.all_generations[ index ] <= target_generation:
+                    continue
+
+                all_seen.add( index )
+                all_to_visit.extend( self.all_parents[ index ] )
+
+            return False
+
+    def __paint( self, left_commit_id, right_commit_id ):
+        # walk from both commits in generation order, newest first,
+        # marking which side each commit can be reached from.
+        # Stop when only commits reachable from the right are left
+        left = self.all_index_by_commit_id[ left_commit_id ]
+        right = self.all_index_by_commit_id[ right_commit_id ]
+
+        all_flags = {left: self.__from_left}
+        all_flags[ right ] = all_flags.get( right, 0 ) | self.__from_right
+
+        all_queue = [(-self.all_generations[ index ], -index) for index in all_flags]
+        heapq.heapify( all_queue )
+        all_queued = set( all_flags )
+
+        all_left = set()
+        all_right = set()
+
+        # count of queued commits that are not reachable from both sides
+        num_interesting = sum( 1 for flags in all_flags.values() if flags != (self.__from_left|self.__from_right) )
+
+        while len(all_queue) > 0 and num_interesting > 0:
+            _, negative_index = heapq.heappop( all_queue )
+            index = -negative_index
+            all_queued.discard( index )
+
+            flags = all_flags[ index ]
+            if flags != (self.__from_left|self.__from_right):
+                num_interesting -= 1
+
+                if flags == self.__from_left:
+                    all_left.add( index )
+
+                else:
+                    all_right.add( index )
+
+            for parent in self.all_parents[ index ]:
+                old_flags = all_flags.get( parent, 0 )
+                new_flags = old_flags | flags
+                if new_flags == old_flags:
+                    continue
+
+                all_flags[ parent ] = new_flags
+
+                if parent not in all_queued:
+                    all_queued.add( parent )
+                    heapq.heappush( all_queue, (-self.all_generations[ parent ], -parent) )
+                    if new_flags != (self.__from_left|self.__from_right):
+                        num_interesting += 1
+
+                elif new_flags == (self.__from_left|self.__from_right):
+                    num_interesting -= 1
+
+        return all_left, all_right
+
+    def __update( self, repo, all_commit_ids ):
+        all_new_tips = [commit_id for commit_id in all_commit_ids if commit_id not in self.all_index_by_commit_id]
+        if len(all_new_tips) == 0:
+            return
+
+        # rev-list lists the commits that are not already in the graph
+        # with parents before children
+        all_stdin_lines = ['%s\n' % (commit_id,) for commit_id in all_new_tips]
+        all_stdin_lines.extend( ['^%s\n' % (self.all_commit_ids[ index ],) for index in self.__all_tip_indexes] )
+
+        with tempfile.TemporaryFile() as f:
+            f.write( ''.join( all_stdin_lines ).encode( 'utf-8' ) )
+            f.seek( 0 )
+
+            stdout = repo.git.execute(
+                    [git.Git.GIT_PYTHON_GIT_EXECUTABLE, 'rev-list', '--parents', '--topo-order', '--reverse', '--stdin'],
+                    istream=f,
+                    universal_newlines=False,
+                    stdout_as_string=False )
+
+        all_new_parents = set()
+        for line in stdout.decode( 'utf-8' ).split( '\n' ):
+            if line == '':
+                continue
+
+            commit_id, *all_parent_ids = line.split( ' ' )
+            all_parents = tuple( self.all_index_by_commit_id[ parent_id ] for parent_id in all_parent_ids )
+            all_new_parents.update( all_parents )
+
+            index = len(self.all_commit_ids)
+            self.all_commit_ids.append( commit_id )
+            self.all_index_by_commit_id[ commit_id ] = index
+            self.all_parents.append( all_parents )
+            self.all_generations.append( 1 + max( [self.all_generations[ parent ] for parent in all_parents], default=0 ) )
+
+        for commit_id in all_new_tips:
+            self.__all_tip_indexes.add( self.all_index_by_commit_id[ commit_id ] )
+
+        # a tip that is an ancestor of a new tip is not needed.
+        # As old commits are all reachable from the old tips
+        # such a tip is always the parent of a new commit
+        self.__all_tip_indexes.difference_update( all_new_parents )
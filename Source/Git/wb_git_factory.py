@@ -10,9 +10,6 @@
     wb_git_factory.py
 
 '''
-import wb_git_log_history_view
-import wb_git_ui_components
-import wb_git_ui_actions
 import wb_git_preferences
 
 import wb_scm_project_dialogs
@@ -54,22 +51,22 @@ class WbGitFactory(wb_scm_factory_abc.WbScmFactoryABC):
         return self.__git_debug
 
     def setupAppDebug( self ):
-        # turn on GitPython debug as required
-        import git
-        import logging
-
+        # turn on GitPython debug as required.
+        # GitPython is only imported when needed as it is slow to import
         if self.__git_debug:
+            import git
+            import logging
+
             git.Git.GIT_PYTHON_TRACE = 'full'
             git_log = logging.getLogger( 'git.cmd' )
             git_log.setLevel( logging.DEBUG )
 
-        else:
-            git.Git.GIT_PYTHON_TRACE = False
-
     def uiComponents( self ):
+        import wb_git_ui_components
         return wb_git_ui_components.GitMainWindowComponents( self )
 
     def uiActions( self ):
+        import wb_git_ui_actions
         return wb_git_ui_actions.GitMainWindowActions( self )
 
     def projectSettingsDialog( self, app, main_window, prefs_project, scm_project ):
@@ -88,6 +85,7 @@ class WbGitFactory(wb_scm_factory_abc.WbScmFactoryABC):
         return [('.git', 'git')]
 
     def logHistoryView( self, app, title ):
+        import wb_git_log_history_view
         return wb_git_log_history_view.WbGitLogHistoryView( app, title )
 
     def setupPreferences( self, scheme_nodes ):
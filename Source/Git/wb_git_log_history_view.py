@@ -15,8 +15,10 @@ from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
+import wb_background_thread
 from wb_background_thread import thread_switcher
 
+import wb_date
 import wb_tracked_qwidget
 import wb_main_window
 import wb_table_view
@@ -76,17 +78,6 @@ class GitLogHistoryWindowComponents(wb_ui_components.WbMainWindowComponents):
     def getChangedFilesContextMenu( self ):
         return self.changed_files_context_menu
 
-    def deferedLogHistoryProgress( self ):
-        return self.app.deferRunInForeground( self.__logHistoryProgress )
-
-    def __logHistoryProgress( self, count, total ):
-        if total > 0:
-            if count == 0:
-                self.progress.start( '%(count)s of %(total)d commits loaded. %(percent)d%%', total )
-
-            else:
-                self.progress.incEventCount()
-
 class WbTagNameDialog(wb_dialog_bases.WbDialog):
     def __init__( self, app, parent, git_project ):
         self.app = app
@@ -174,6 +165,9 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
         self.git_project = None
         self.reload_commit_log_options = None
 
+        # a new load of the log or closing the window stops any load in progress
+        self.load_cancel_token = wb_background_thread.CancelToken()
+
         self.ui_component = GitLogHistoryWindowComponents( self.app.getScmFactory( 'git' ), self )
 
         self.log_model = WbGitLogHistoryModel( self.app )
@@ -356,22 +350,11 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
             return
 
         # reload the commit history to pick up the rebase changes
-        yield self.app.switchToBackground
-
         options = self.reload_commit_log_options
-        self.log_model.loadCommitLogForRepository(
-                    self.ui_component.deferedLogHistoryProgress(), self.git_project,
-                    options.getLimit(), options.getSince(), options.getUntil(), self.__revFromOptions( options ), '' )
-
-        yield self.app.switchToForeground
-
-        self.log_table.resizeColumnToContents( self.log_model.col_date )
-
-        self.log_table.setCurrentIndex( self.log_model.index( row_to_select, 0, QtCore.QModelIndex() ) )
-
-        self.ui_component.progress.end()
-        self.updateEnableStates()
-        self.show()
+        yield from self.__loadCommitLog_Bg(
+                    self.git_project.cmdCommitLogChunksForRepository(
+                        options.getLimit(), options.getSince(), options.getUntil(), self.__revFromOptions( options ), '' ),
+                    row_to_select )
 
     def __revFromOptions( self, options ):
         tag = options.getTag()
@@ -517,38 +500,100 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
         self.reload_commit_log_options = options
         self.git_project = git_project
 
-        yield self.app.switchToBackground
+        yield from self.__loadCommitLog_Bg(
+                    git_project.cmdCommitLogChunksForRepository(
+                        options.getLimit(), options.getSince(), options.getUntil(), self.__revFromOptions( options ), '' ) )
 
-        self.log_model.loadCommitLogForRepository(
-                    self.ui_component.deferedLogHistoryProgress(), git_project,
-                    options.getLimit(), options.getSince(), options.getUntil(), self.__revFromOptions( options ), '' )
+    @thread_switcher
+    def showCommitLogForFile_Bg( self, git_project, filename, options ):
+        self.filename = filename
+        self.git_project = git_project
+
+        yield from self.__loadCommitLog_Bg(
+                    git_project.cmdCommitLogChunksForFile(
+                        filename, options.getLimit(), options.getSince(), options.getUntil() ) )
+
+    # show the commits as they are read from the log
+    def __loadCommitLog_Bg( self, all_commit_chunks, row_to_select=None ):
+        self.load_cancel_token.cancel()
+        self.load_cancel_token = wb_background_thread.CancelToken()
+        cancel_token = self.load_cancel_token
+
+        self.ui_component.progress.start( T_('%(count)d commits loaded'), 0 )
+
+        # let other projects and interactive work run while the log loads
+        switchToHistoryBackground = self.app.switchToBackgroundLane(
+                    wb_background_thread.projectLane( self.git_project ), wb_background_thread.PRIORITY_BULK )
+
+        yield switchToHistoryBackground
+
+        all_tags_by_id = self.git_project.cmdTagsForRepository()
+        all_unpushed_commit_ids = set( self.git_project.getUnpushedCommitIds() )
+        all_commit_nodes = next( all_commit_chunks, None )
 
         yield self.app.switchToForeground
 
-        self.log_table.resizeColumnToContents( self.log_model.col_date )
+        # stop if another load has started
+        if cancel_token.isCancelled():
+            all_commit_chunks.close()
+            return
+
+        self.log_model.clearCommitLog( all_tags_by_id, all_unpushed_commit_ids )
+
+        if all_commit_nodes is not None:
+            row_to_select = self.__appendCommitNodes( all_commit_nodes, row_to_select )
+            self.log_table.resizeColumnToContents( self.log_model.col_date )
 
-        self.ui_component.progress.end()
         self.updateEnableStates()
         self.show()
 
+        if all_commit_nodes is None:
+            # no commits in the log
+            self.ui_component.progress.end()
+            return
+
+        # read the rest of the log while the first commits are shown
+        self.app.wrapWithThreadSwitcher( self.__loadRemainingCommitLog_Bg, 'log history',
+                    lane=wb_background_thread.projectLane( self.git_project ),
+                    priority=wb_background_thread.PRIORITY_BULK,
+                    cancel_token=cancel_token )( all_commit_chunks, row_to_select )
+
     @thread_switcher
-    def showCommitLogForFile_Bg( self, git_project, filename, options ):
-        self.filename = filename
-        self.git_project = git_project
+    def __loadRemainingCommitLog_Bg( self, all_commit_chunks, row_to_select ):
+        try:
+            while True:
+                yield self.app.switchToBackground
 
-        yield self.app.switchToBackground
+                all_commit_nodes = next( all_commit_chunks, None )
 
-        self.log_model.loadCommitLogForFile(
-                    self.ui_component.deferedLogHistoryProgress(), git_project,
-                    filename, options.getLimit(), options.getSince(), options.getUntil() )
+                yield self.app.switchToForeground
 
-        yield self.app.switchToForeground
+                if all_commit_nodes is None:
+                    break
+
+                row_to_select = self.__appendCommitNodes( all_commit_nodes, row_to_select )
 
-        self.log_table.resizeColumnToContents( self.log_model.col_date )
+        finally:
+            # stops git log if the load is cancelled
+            all_commit_chunks.close()
 
         self.ui_component.progress.end()
-        self.updateEnableStates()
-        self.show()
+
+    def __appendCommitNodes( self, all_commit_nodes, row_to_select ):
+        self.log_model.appendCommitNodes( all_commit_nodes )
+        self.ui_component.progress.setEventCount( self.log_model.rowCount( QtCore.QModelIndex() ) )
+
+        if row_to_select is not None and row_to_select < self.log_model.rowCount( QtCore.QModelIndex() ):
+            self.log_table.setCurrentIndex( self.log_model.index( row_to_select, 0, QtCore.QModelIndex() ) )
+            row_to_select = None
+
+        return row_to_select
+
+    def closeEvent( self, event ):
+        # stop reading the log
+        self.load_cancel_token.cancel()
+
+        super().closeEvent( event )
 
     def selectionChangedCommit( self ):
         self.current_commit_selections = [index.row() for index in self.log_table.selectedIndexes() if index.column() == 0]
@@ -567,10 +612,49 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
         self.commit_message.clear()
         self.commit_message.insertPlainText( node.commitMessage() )
 
-        self.changes_model.loadChanges( node.commitFileChanges() )
+        # only find the changed files of the commits that are looked at
+        if node.hasCommitFileChanges():
+            self.changes_model.loadChanges( node.commitFileChanges() )
+
+        else:
+            self.changes_model.loadChanges( [] )
+            self.app.wrapWithThreadSwitcher( self.__loadCommitChanges_Bg, 'log history changes',
+                        lane=wb_background_thread.projectLane( self.git_project ),
+                        priority=wb_background_thread.PRIORITY_INTERACTIVE )( node )
 
         self.updateEnableStates()
 
+    @thread_switcher
+    def __loadCommitChanges_Bg( self, node ):
+        # one git diff-tree finds the changes of the selected and visible commits
+        all_rows = set( self.current_commit_selections )
+        all_rows.update( self.__visibleCommitRows() )
+        all_nodes = [node] + [self.log_model.commitNode( row ) for row in sorted( all_rows )]
+
+        yield self.app.switchToBackground
+
+        self.git_project.cmdAddCommitChangeInformation( all_nodes )
+
+        yield self.app.switchToForeground
+
+        # the selection may have moved on while the changes were found
+        if( len(self.current_commit_selections) > 0
+        and self.current_commit_selections[0] < self.log_model.rowCount( QtCore.QModelIndex() )
+        and self.log_model.commitNode( self.current_commit_selections[0] ) is node ):
+            self.changes_model.loadChanges( node.commitFileChanges() )
+            self.updateEnableStates()
+
+    def __visibleCommitRows( self ):
+        first_row = self.log_table.rowAt( 0 )
+        if first_row < 0:
+            return range( 0 )
+
+        last_row = self.log_table.rowAt( self.log_table.viewport().height() - 1 )
+        if last_row < 0:
+            last_row = self.log_model.rowCount( QtCore.QModelIndex() ) - 1
+
+        return range( first_row, last_row + 1 )
+
     def selectionChangedFile( self ):
         self.current_file_selection = [index.row() for index in self.changes_table.selectedIndexes() if index.column() == 0]
         self.updateEnableStates()
@@ -624,6 +708,7 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
         super().__init__()
 
         self.all_commit_nodes  = []
+        self.date_strings = wb_date.WbTableDateStrings( self.app.formatDatetime, lambda row: self.all_commit_nodes[ row ].commitDate() )
         self.all_tags_by_id = {}
         self.all_unpushed_commit_ids = set()
 
@@ -634,19 +719,19 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
             self.__brush_is_tag = QtGui.QBrush( QtGui.QColor( 0, 0, 255 ) )
             self.__brush_is_unpushed = QtGui.QBrush( QtGui.QColor( 192, 0, 192 ) )
 
-    def loadCommitLogForRepository( self, progress_callback, git_project, limit, since, until, rev=None, path='' ):
+    def clearCommitLog( self, all_tags_by_id, all_unpushed_commit_ids ):
         self.beginResetModel()
-        self.all_commit_nodes = git_project.cmdCommitLogForRepository( progress_callback, limit, since, until, rev, path )
-        self.all_tags_by_id = git_project.cmdTagsForRepository()
-        self.all_unpushed_commit_ids = set( [commit.hexsha for commit in git_project.getUnpushedCommits()] )
+        self.all_commit_nodes = []
+        self.date_strings.clear()
+        self.all_tags_by_id = all_tags_by_id
+        self.all_unpushed_commit_ids = all_unpushed_commit_ids
         self.endResetModel()
 
-    def loadCommitLogForFile( self, progress_callback, git_project, filename, limit, since, until, rev=None ):
-        self.beginResetModel()
-        self.all_commit_nodes = git_project.cmdCommitLogForFile( progress_callback, filename, limit, since, until, rev=rev )
-        self.all_tags_by_id = git_project.cmdTagsForRepository()
-        self.all_unpushed_commit_ids = set( git_project.getUnpushedCommits() )
-        self.endResetModel()
+    def appendCommitNodes( self, all_commit_nodes ):
+        first_row = len(self.all_commit_nodes)
+        self.beginInsertRows( QtCore.QModelIndex(), first_row, first_row + len(all_commit_nodes) - 1 )
+        self.all_commit_nodes.extend( all_commit_nodes )
+        self.endInsertRows()
 
     def updateTags( self, git_project ):
         self.beginResetModel()
@@ -661,8 +746,7 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
         return self.commitForRow( row ) in self.all_unpushed_commit_ids
 
     def dateStringForRow( self, row ):
-        node = self.all_commit_nodes[ row ]
-        return self.app.formatDatetime( node.commitDate() )
+        return self.date_strings.dateString( row )
 
     def rowCount( self, parent ):
         return len( self.all_commit_nodes )
@@ -699,7 +783,7 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
                 return '%s <%s>' % (node.commitAuthor(), node.commitAuthorEmail())
 
             elif col == self.col_date:
-                return self.app.formatDatetime( node.commitDate() )
+                return self.date_strings.dateString( index.row() )
 
             elif col == self.col_tag:
                 return self.all_tags_by_id.get( node.commitIdString(), '' )
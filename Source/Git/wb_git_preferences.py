@@ -13,23 +13,26 @@
 
 '''
 import pathlib
-import git
 
 from PyQt5 import QtWidgets
 
 from xml_preferences import SchemeNode, PreferencesNode
 
+import wb_preferences
 import wb_pick_path_dialogs
 import wb_dialog_bases
 
+Bool = wb_preferences.Bool
+
 class GitPreferences(PreferencesNode):
-    xml_attribute_info = (('program', pathlib.Path),)
+    xml_attribute_info = (('program', pathlib.Path), ('lazy_status', Bool))
 
     def __init__( self, program=None ):
         super().__init__()
 
         assert program is None or isinstance( program, str )
         self.program = program
+        self.lazy_status = False
 
 def setupPreferences( scheme_nodes ):
     (scheme_nodes
@@ -52,6 +55,7 @@ class GitPreferencesTab(wb_dialog_bases.WbTabBase):
 
         else:
             # show the default
+            import git
             self.git_program.setText( git.Git.GIT_PYTHON_GIT_EXECUTABLE )
 
         self.browse_program = QtWidgets.QPushButton( T_('Browse...') )
@@ -59,6 +63,10 @@ class GitPreferencesTab(wb_dialog_bases.WbTabBase):
 
         self.addRow( T_('Git Program'), self.git_program, self.browse_program )
 
+        self.lazy_status = QtWidgets.QCheckBox( T_('Only find the status of folders as they are viewed') )
+        self.lazy_status.setChecked( self.prefs.lazy_status )
+        self.addRow( T_('Status'), self.lazy_status )
+
     def savePreferences( self ):
         path = self.git_program.text()
         if path == '':
@@ -67,6 +75,8 @@ class GitPreferencesTab(wb_dialog_bases.WbTabBase):
         else:
             self.prefs.program = pathlib.Path( self.git_program.text() )
 
+        self.prefs.lazy_status = self.lazy_status.isChecked()
+
     def __pickProgram( self ):
         program = wb_pick_path_dialogs.pickExecutable( self, pathlib.Path( self.git_program.text() ) )
         if program is not None:
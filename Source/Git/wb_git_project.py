@@ -12,11 +12,22 @@
 '''
 import sys
 import os
+import glob
 import pathlib
+import time
+import datetime
+import tempfile
+import subprocess
+import threading
+import collections
 
 import wb_annotate_node
 import wb_platform_specific
+import wb_folder_crawler
+import wb_status_cache
 import wb_git_callback_server
+import wb_git_commit_graph
+import wb_git_cat_file
 
 import git
 import git.exc
@@ -82,6 +93,13 @@ def setCallbackRebaseEditorHandler( handler ):
 def setCallbackReply( code, value ):
     __callback_server.setReply( code, value )
 
+def folderFilesPathSpec( folder ):
+    # match the files in folder but not in its sub folders
+    if folder.parts == ():
+        return ':(glob)*'
+
+    return ':(glob)%s/*' % (glob.escape( folder.as_posix() ),)
+
 class GitProject:
     def __init__( self, app, prefs_project, ui_components ):
         self.app = app
@@ -95,10 +113,10 @@ class GitProject:
         self.__repo = None
         self.index = None
 
-        self.tree = GitProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = GitProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
+        # only the project shown in the main window uses the status cache
+        self.__status_cache = None
 
-        self.all_file_state = {}
+        self.__resetState()
 
         self.__stale_index = False
 
@@ -143,6 +161,11 @@ class GitProject:
     def scmType( self ):
         return 'git'
 
+    # called when the project is no longer shown
+    def closeProject( self ):
+        if self.__repo is not None:
+            wb_git_cat_file.closeCatFileForRepo( self.__repo )
+
     # return a new GitProject that can be used in another thread
     def newInstance( self ):
         return GitProject( self.app, self.prefs_project, self.ui_components )
@@ -249,126 +272,520 @@ class GitProject:
             self.updateState( 'QQQ' )
             self.__stale_index = False
 
-    def updateState( self, tree_leaf ):
+    def updateState( self, tree_leaf, all_dirty_paths=None ):
         self.debugLog( 'updateState( %r ) repo=%s' % (tree_leaf, self.projectPath()) )
 
-        # rebuild the tree
-        self.tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
-
         if not self.projectPath().exists():
             self.app.log.error( T_('Project %(name)s folder %(folder)s has been deleted') %
                             {'name': self.projectName()
                             ,'folder': self.projectPath()} )
 
-            self.all_file_state = {}
+            self.__resetState()
 
         else:
-            self.__calculateStatus()
+            if self.__lazy_status != self.app.prefs.git.lazy_status:
+                # the snapshot is only valid for the mode it was made in
+                self.__resetState()
 
-        for path in self.all_file_state:
-            self.__updateTree( path )
+            if self.__lazy_status and isinstance( tree_leaf, pathlib.Path ):
+                self.__addLazyFolder( tree_leaf )
+
+            self.__calculateStatus( all_dirty_paths )
 
         self.dumpTree()
 
-    def __calculateStatus( self ):
+    def updateTreeNodeState( self, tree_node ):
+        # only lazy status needs to find the status of folders as they are visited
+        if not self.__lazy_status or tree_node.isByPath():
+            return
+
+        folder = tree_node.relativePath()
+        if folder in self.__all_lazy_folders:
+            return
+
+        self.debugLogTree( 'updateTreeNodeState( %r )', tree_node )
+        self.__addLazyFolder( folder )
+        self.__calculateStatus()
+
+    def __addLazyFolder( self, folder ):
+        # the ancestors are needed to show the folder in the tree
+        self.__all_lazy_folders.add( folder )
+        self.__all_lazy_folders.update( folder.parents )
+
+    def __resetState( self ):
+        self.tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
+        self.flat_tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
+
         self.all_file_state = {}
 
-        repo_root = self.projectPath()
+        # with lazy status only the folders that have been visited are scanned
+        self.__lazy_status = self.app.prefs.git.lazy_status
+        self.__all_lazy_folders = set( [pathlib.Path( '.' )] )
 
-        git_dir = repo_root / '.git'
+        # snapshot of the last scan used to work out what has changed
+        self.__all_folder_listings = {}
+        self.__scan_start_time = 0
+        self.__racy_time = 0
+        self.__index_signature = None
 
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
+        self.__all_index_entries = {}
+        self.__all_staged_diffs = {}
+        self.__all_staged_paths = set()
+        self.__all_unstaged_diffs = {}
+        self.__all_untracked_paths = set()
 
-            for filename in folder.iterdir():
-                abs_path = folder / filename
+        # paths loaded from the status cache that need their real state
+        self.__all_cached_paths = set()
 
-                repo_relative = abs_path.relative_to( repo_root )
+    def loadStatusCache( self ):
+        # lazy status does not scan the whole project so is not cached
+        if self.app.prefs.git.lazy_status:
+            return
 
-                if abs_path.is_dir():
-                    if abs_path != git_dir:
-                        all_folders.add( abs_path )
+        self.__status_cache = wb_status_cache.WbStatusCache( self.app, self.scmType(), self.projectPath() )
 
-                        self.all_file_state[ repo_relative ] = WbGitFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
+        snapshot = self.__status_cache.load()
+        if snapshot is None:
+            return
 
-                else:
-                    self.all_file_state[ repo_relative ] = WbGitFileState( self, repo_relative )
+        all_folder_entries = {}
+        for str_path, flags, staged, unstaged, renamed_from, renamed_to in snapshot.all_file_records:
+            path = pathlib.Path( str_path )
 
-        # ----------------------------------------
-        # can only get info from the index if there is at least 1 commit
-        self.index = git.index.IndexFile( self.repo() )
+            self.all_file_state[ path ] = WbGitCachedFileState( self, path, flags, staged, unstaged, renamed_from, renamed_to )
+            self.__updateTree( path )
+
+            if flags&wb_status_cache.FLAG_ON_DISK:
+                all_folder_entries.setdefault( path.parent, {} )[ path.name ] = flags&wb_status_cache.FLAG_IS_DIR != 0
+
+        # unchanged folders will not be reread by the first scan
+        for str_folder, mtime in snapshot.all_folders.items():
+            folder = pathlib.Path( str_folder )
+            self.__all_folder_listings[ folder ] = (mtime, all_folder_entries.get( folder, {} ))
+
+        self.__scan_start_time = int( snapshot.all_info.get( 'scan_start_time', 0 ) )
+        self.__num_staged_files = int( snapshot.all_info.get( 'num_staged_files', 0 ) )
+        self.__num_modified_files = int( snapshot.all_info.get( 'num_modified_files', 0 ) )
+
+        self.__all_cached_paths = set( self.all_file_state )
+
+    def __saveStatusCache( self, all_changed_paths ):
+        all_file_records = []
+        all_deleted_paths = []
+        for path in all_changed_paths:
+            if path not in self.all_file_state:
+                all_deleted_paths.append( str( path ) )
+                continue
+
+            file_state = self.all_file_state[ path ]
+
+            flags = 0
+            if file_state.isDir():
+                flags |= wb_status_cache.FLAG_IS_DIR
+
+            if self.__isOnDisk( path ) is not None:
+                flags |= wb_status_cache.FLAG_ON_DISK
+
+            if file_state.isControlled():
+                flags |= wb_status_cache.FLAG_CONTROLLED
+
+            if file_state.isUncontrolled():
+                flags |= wb_status_cache.FLAG_UNTRACKED
+
+            if file_state.isStagedRenamed():
+                renamed_from = str( file_state.renamedFromFilename() )
+                renamed_to = str( file_state.renamedToFilename() )
+
+            else:
+                renamed_from = None
+                renamed_to = None
+
+            all_file_records.append( (str( path ), flags,
+                                      file_state.getStagedAbbreviatedStatus(), file_state.getUnstagedAbbreviatedStatus(),
+                                      renamed_from, renamed_to) )
+
+        all_folders = {}
+        for folder, (mtime, all_entries) in self.__all_folder_listings.items():
+            all_folders[ str( folder ) ] = mtime
+
+        all_info = {'scan_start_time': self.__scan_start_time
+                   ,'num_staged_files': self.__num_staged_files
+                   ,'num_modified_files': self.__num_modified_files}
+
+        self.__status_cache.save( all_info, all_folders, all_file_records, all_deleted_paths )
+
+    def __calculateStatus( self, all_dirty_paths=None ):
+        # The previous scan is kept and patched in place.
+        # Only paths that have changed on disk, in the index or
+        # in the status from git have their WbGitFileState replaced.
+        #
+        # all_dirty_paths, if known, are the only paths in the working
+        # tree that can have changed since the previous scan.
+        # That needs a complete previous scan to patch.
+        if( self.__lazy_status
+        or len(self.__all_cached_paths) > 0
+        or len(self.__all_folder_listings) == 0 ):
+            all_dirty_paths = None
+
+        all_changed_paths = self.__all_cached_paths
+        self.__all_cached_paths = set()
+
+        if all_dirty_paths is None:
+            self.__scanFolders( all_changed_paths )
+            self.__scanIndex( all_changed_paths )
+            self.__scanWorking( all_changed_paths )
+
+        else:
+            dirty_scope = self.__scanDirtyFolders( all_changed_paths, all_dirty_paths )
+            if self.__scanIndex( all_changed_paths ):
+                # the status of any file can change with the index
+                dirty_scope = None
+
+            self.__scanWorking( all_changed_paths, dirty_scope )
+
+        self.debugLog( '__calculateStatus %d changed paths' % (len(all_changed_paths),) )
+
+        for path in all_changed_paths:
+            self.__updateFileState( path )
+
+        if self.__status_cache is not None and not self.__lazy_status and len(all_changed_paths) > 0:
+            self.__saveStatusCache( all_changed_paths )
+
+    def __scanFolders( self, all_changed_paths ):
+        # folders modified after the previous scan started may have
+        # changed again within the mtime resolution so always reread them
+        self.__racy_time = self.__scan_start_time
+        self.__scan_start_time = time.time_ns()
+
+        all_old_listings = self.__all_folder_listings
+        if self.__lazy_status:
+            all_new_listings = wb_folder_crawler.crawlFolders( self.projectPath(), '.git', all_old_listings, self.__racy_time,
+                                    all_start_folders=self.__all_lazy_folders, recursive=False )
 
+        else:
+            all_new_listings = wb_folder_crawler.crawlFolders( self.projectPath(), '.git', all_old_listings, self.__racy_time )
+
+        if self.__lazy_status:
+            # forget visited folders that have been deleted
+            self.__all_lazy_folders.intersection_update( all_new_listings )
+            self.__all_lazy_folders.add( pathlib.Path( '.' ) )
+
+        self.__diffFolderListings( all_changed_paths, all_old_listings, all_new_listings )
+
+    def __scanDirtyFolders( self, all_changed_paths, all_dirty_paths ):
+        # reread only the dirty folders, any folders that are new
+        # and forget folders that have been deleted
+        all_old_listings = self.__all_folder_listings
+
+        dirty_scope = WbGitDirtyScope()
+        all_dirty_folders = set()
+        for path in all_dirty_paths:
+            if path in all_old_listings or (self.projectPath() / path).is_dir():
+                all_dirty_folders.add( path )
+
+            else:
+                dirty_scope.all_files.add( path )
+
+        # a racy_time of 0 rereads every folder
+        all_read_listings = wb_folder_crawler.crawlFolders( self.projectPath(), '.git', all_old_listings, 0,
+                                all_start_folders=all_dirty_folders, recursive=False )
+
+        all_new_folders = set()
+        all_gone_folders = all_dirty_folders - set( all_read_listings )
+        for folder, (mtime, all_entries) in all_read_listings.items():
+            if folder not in all_old_listings:
+                all_new_folders.add( folder )
+                continue
+
+            dirty_scope.all_flat_folders.add( folder )
+
+            for name, is_dir in all_entries.items():
+                if is_dir and folder / name not in all_old_listings:
+                    all_new_folders.add( folder / name )
+
+            for name, was_dir in all_old_listings[ folder ][1].items():
+                if was_dir and not all_entries.get( name, False ):
+                    all_gone_folders.add( folder / name )
+
+        all_new_listings = {}
+        for folder, listing in all_old_listings.items():
+            if folder in all_gone_folders or not all_gone_folders.isdisjoint( folder.parents ):
+                continue
+
+            all_new_listings[ folder ] = listing
+
+        all_new_listings.update( all_read_listings )
+        all_new_listings.update( wb_folder_crawler.crawlFolders( self.projectPath(), '.git', all_old_listings, 0,
+                                    all_start_folders=all_new_folders, recursive=True ) )
+
+        dirty_scope.all_deep_folders = all_new_folders | all_gone_folders
+
+        self.debugLog( '__scanDirtyFolders %d folders %d new %d gone %d files' %
+                        (len(dirty_scope.all_flat_folders), len(all_new_folders), len(all_gone_folders), len(dirty_scope.all_files)) )
+
+        self.__diffFolderListings( all_changed_paths, all_old_listings, all_new_listings )
+
+        return dirty_scope
+
+    def __diffFolderListings( self, all_changed_paths, all_old_listings, all_new_listings ):
+        for folder, (mtime, all_entries) in all_new_listings.items():
+            old_listing = all_old_listings.get( folder )
+            if old_listing is None:
+                all_changed_paths.update( folder / name for name in all_entries )
+                continue
+
+            all_old_entries = old_listing[1]
+            if all_entries is all_old_entries:
+                continue
+
+            for name, is_dir in all_entries.items():
+                if all_old_entries.get( name ) != is_dir:
+                    all_changed_paths.add( folder / name )
+
+            for name in all_old_entries:
+                if name not in all_entries:
+                    all_changed_paths.add( folder / name )
+
+        # everything in a folder that has gone has also gone
+        for folder, (mtime, all_entries) in all_old_listings.items():
+            if folder not in all_new_listings:
+                all_changed_paths.update( folder / name for name in all_entries )
+
+        self.__all_folder_listings = all_new_listings
+
+    def __scanIndex( self, all_changed_paths ):
+        # can only get info from the index if there is at least 1 commit
         if self.hasCommits():
-            head_vs_index = self.index.diff( self.repo().head.commit )
-            index_vs_working = self.index.diff( None )
+            head_commit_id = self.repo().head.commit.hexsha
 
         else:
-            head_vs_index = []
-            index_vs_working = []
+            head_commit_id = None
+
+        # which index entries are used depends on the lazy folders
+        lazy_folders = frozenset( self.__all_lazy_folders ) if self.__lazy_status else None
 
-        # each ref to self.repo().untracked_files creates a new object
-        # cache the value once/update
-        untracked_files = self.repo().untracked_files
+        try:
+            stat = os.stat( os.path.join( self.repo().git_dir, 'index' ) )
+            index_signature = (stat.st_mtime_ns, stat.st_size, head_commit_id, lazy_folders)
 
+        except OSError:
+            index_signature = (0, 0, head_commit_id, lazy_folders)
+
+        if( self.index is not None
+        and index_signature == self.__index_signature
+        and index_signature[0] < self.__racy_time ):
+            self.debugLog( '__scanIndex index and HEAD unchanged' )
+            return False
+
+        self.__index_signature = index_signature
+        self.index = git.index.IndexFile( self.repo() )
+
+        all_index_entries = {}
         for entry in self.index.entries.values():
             filepath = pathlib.Path( entry.path )
-            if filepath not in self.all_file_state:
-                # filepath has been deleted
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
+            if lazy_folders is None or filepath.parent in lazy_folders:
+                all_index_entries[ filepath ] = entry
 
-            self.all_file_state[ filepath ].setIndexEntry( entry )
+        for path, entry in all_index_entries.items():
+            if self.__all_index_entries.get( path ) != entry:
+                all_changed_paths.add( path )
 
-        self.__num_staged_files = 0
+        for path in self.__all_index_entries:
+            if path not in all_index_entries:
+                all_changed_paths.add( path )
+
+        self.__all_index_entries = all_index_entries
+
+        if head_commit_id is not None:
+            head_vs_index = self.index.diff( self.repo().head.commit )
+
+        else:
+            head_vs_index = []
+
+        all_staged_diffs = {}
+        all_staged_paths = set()
         for diff in head_vs_index:
-            self.__num_staged_files += 1
             filepath = pathlib.Path( diff.b_path )
-
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
+            all_staged_paths.add( filepath )
 
             if diff.renamed:
-                self.all_file_state[ pathlib.Path( diff.rename_from ) ]._addStaged( diff )
+                all_staged_diffs[ pathlib.Path( diff.rename_from ) ] = diff
 
             else:
-                self.all_file_state[ filepath ]._addStaged( diff )
+                all_staged_diffs[ filepath ] = diff
 
-        self.__num_modified_files = 0
+        all_changed_paths.update( self.__all_staged_diffs )
+        all_changed_paths.update( self.__all_staged_paths )
+        all_changed_paths.update( all_staged_diffs )
+        all_changed_paths.update( all_staged_paths )
+
+        self.__all_staged_diffs = all_staged_diffs
+        self.__all_staged_paths = all_staged_paths
+        self.__num_staged_files = len(head_vs_index)
+
+        return True
+
+    def __scanWorking( self, all_changed_paths, dirty_scope=None ):
+        if self.__lazy_status:
+            all_paths = [folderFilesPathSpec( folder ) for folder in sorted( self.__all_lazy_folders )]
+
+        elif dirty_scope is not None:
+            all_paths = dirty_scope.allPathSpecs()
+
+        else:
+            all_paths = None
+
+        # git uses the stat data in the index entries to
+        # avoid reading unchanged files
+        if self.hasCommits() and all_paths != []:
+            index_vs_working = self.index.diff( None, paths=all_paths )
+
+        else:
+            index_vs_working = []
+
+        all_unstaged_diffs = {}
         for diff in index_vs_working:
-            self.__num_modified_files += 1
-            filepath = pathlib.Path( diff.a_path )
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
-            self.all_file_state[ filepath ]._addUnstaged( diff )
+            all_unstaged_diffs[ pathlib.Path( diff.a_path ) ] = diff
+
+        if all_paths is None:
+            # each ref to self.repo().untracked_files creates a new object
+            # cache the value once/update
+            all_untracked_files = self.repo().untracked_files
+
+        elif all_paths == []:
+            all_untracked_files = []
 
-        for path in untracked_files:
-            filepath = pathlib.Path( path )
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
+        else:
+            all_untracked_files = self.repo().git.ls_files( '--others', '--exclude-standard', '-z', '--', *all_paths ).split( '\0' )
+
+        all_untracked_paths = set( pathlib.Path( path ) for path in all_untracked_files if path != '' )
+
+        if dirty_scope is not None:
+            # paths outside of the dirty scope are unchanged
+            for path, diff in self.__all_unstaged_diffs.items():
+                if path not in all_unstaged_diffs and not dirty_scope.contains( path ):
+                    all_unstaged_diffs[ path ] = diff
 
-            self.all_file_state[ filepath ]._setUntracked()
+            all_untracked_paths.update( path for path in self.__all_untracked_paths if not dirty_scope.contains( path ) )
+
+        all_changed_paths.update( self.__all_unstaged_diffs )
+        all_changed_paths.update( all_unstaged_diffs )
+        all_changed_paths.update( self.__all_untracked_paths ^ all_untracked_paths )
+
+        self.__all_unstaged_diffs = all_unstaged_diffs
+        self.__all_untracked_paths = all_untracked_paths
+        self.__num_modified_files = len(all_unstaged_diffs)
+
+    def __isOnDisk( self, path ):
+        # returns None if path is not on disk otherwise True for folders
+        listing = self.__all_folder_listings.get( path.parent )
+        if listing is None:
+            return None
+
+        return listing[1].get( path.name )
+
+    def __updateFileState( self, path ):
+        is_dir = self.__isOnDisk( path )
+        index_entry = self.__all_index_entries.get( path )
+        staged_diff = self.__all_staged_diffs.get( path )
+        unstaged_diff = self.__all_unstaged_diffs.get( path )
+        is_untracked = path in self.__all_untracked_paths
+
+        if( is_dir is None
+        and index_entry is None
+        and staged_diff is None
+        and unstaged_diff is None
+        and not is_untracked
+        and path not in self.__all_staged_paths ):
+            if path in self.all_file_state:
+                del self.all_file_state[ path ]
+                self.__removeFromTree( path )
+
+            return
+
+        file_state = WbGitFileState( self, path )
+        if is_dir:
+            file_state.setIsDir()
+
+            if self.__lazy_status:
+                # sub folders have to be in the tree before their status is known
+                self.__addTreeFolder( path )
+
+        if index_entry is not None:
+            file_state.setIndexEntry( index_entry )
+
+        if staged_diff is not None:
+            file_state._addStaged( staged_diff )
+
+        if unstaged_diff is not None:
+            file_state._addUnstaged( unstaged_diff )
+
+        if is_untracked:
+            file_state._setUntracked()
+
+        is_new_path = path not in self.all_file_state
+        self.all_file_state[ path ] = file_state
+
+        if is_new_path:
+            self.__updateTree( path )
 
     def __updateTree( self, path ):
         assert isinstance( path, pathlib.Path ), 'path %r' % (path,)
-        self.debugLogTree( '__updateTree path %r' % (path,) )
+        self.debugLogTree( '__updateTree path %r', path )
         node = self.tree
 
-        self.debugLogTree( '__updateTree path.parts %r' % (path.parts,) )
+        self.debugLogTree( '__updateTree path.parts %r', path.parts )
 
         for index, name in enumerate( path.parts[0:-1] ):
-            self.debugLogTree( '__updateTree name %r at node %r' % (name,node) )
+            self.debugLogTree( '__updateTree name %r at node %r', name, node )
 
             if not node.hasFolder( name ):
                 node.addFolder( name, GitProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
 
             node = node.getFolder( name )
 
-        self.debugLogTree( '__updateTree addFile %r to node %r' % (path, node) )
+        self.debugLogTree( '__updateTree addFile %r to node %r', path, node )
         node.addFileByName( path )
         self.flat_tree.addFileByPath( path )
 
+    def __addTreeFolder( self, path ):
+        node = self.tree
+
+        for index, name in enumerate( path.parts ):
+            if not node.hasFolder( name ):
+                node.addFolder( name, GitProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
+
+            node = node.getFolder( name )
+
+    def __removeFromTree( self, path ):
+        self.debugLogTree( '__removeFromTree path %r', path )
+        self.flat_tree.delFileByPath( path )
+
+        all_nodes = [self.tree]
+        for name in path.parts[0:-1]:
+            if not all_nodes[-1].hasFolder( name ):
+                return
+
+            all_nodes.append( all_nodes[-1].getFolder( name ) )
+
+        all_nodes[-1].delFileByName( path )
+
+        if all_nodes[-1].hasFolder( path.name ) and self.__canRemoveTreeFolder( all_nodes[-1].getFolder( path.name ) ):
+            all_nodes[-1].delFolder( path.name )
+
+        # remove folders left empty as a full rebuild would not create them
+        while len(all_nodes) > 1 and self.__canRemoveTreeFolder( all_nodes[-1] ):
+            node = all_nodes.pop()
+            self.debugLogTree( '__removeFromTree delFolder %r', node )
+            all_nodes[-1].delFolder( node.name )
+
+    def __canRemoveTreeFolder( self, node ):
+        if not node.isEmpty():
+            return False
+
+        # with lazy status folders are in the tree before their contents are known
+        return not self.__lazy_status or self.__isOnDisk( node.relativePath() ) is None
+
     def dumpTree( self ):
         if self.debugLogTree.isEnabled():
             self.tree._dumpTree( 0 )
@@ -422,34 +839,42 @@ class GitProject:
         if not self.hasCommits():
             return False
 
-        remote_commit = self.getTrackingBranchCommit()
-        if remote_commit is None:
+        tracking_commit = self.getTrackingBranchCommit()
+        if tracking_commit is None:
             return False
 
-        head_commit = self.repo().head.ref.commit
-
-        return head_commit != remote_commit
+        # there is something to push unless HEAD is already in the tracking branch
+        return not self.commitGraph().isAncestor( self.repo(), self.getHeadCommit().hexsha, tracking_commit.hexsha )
 
     def canPull( self ):
         return self.repo().head.ref.tracking_branch() is not None
 
-    def getUnpushedCommits( self ):
+    def commitGraph( self ):
+        return wb_git_commit_graph.commitGraphForRepo( self.repo() )
+
+    # return (ahead, behind) commit counts of HEAD compared to the tracking branch
+    def getTrackingBranchAheadBehind( self ):
+        if not self.hasCommits():
+            return (0, 0)
+
         tracking_commit = self.getTrackingBranchCommit()
         if tracking_commit is None:
-            return []
+            return (0, 0)
 
-        last_pushed_commit_id = tracking_commit.hexsha
+        return self.commitGraph().aheadBehind( self.repo(), self.getHeadCommit().hexsha, tracking_commit.hexsha )
 
-        all_unpushed_commits = []
-        for commit in self.repo().iter_commits( None ):
-            commit_id = commit.hexsha
+    def getUnpushedCommitIds( self ):
+        if not self.hasCommits():
+            return []
 
-            if last_pushed_commit_id == commit_id:
-                break
+        tracking_commit = self.getTrackingBranchCommit()
+        if tracking_commit is None:
+            return []
 
-            all_unpushed_commits.append( commit )
+        return self.commitGraph().commitsOnlyIn( self.repo(), self.getHeadCommit().hexsha, tracking_commit.hexsha )
 
-        return all_unpushed_commits
+    def getUnpushedCommits( self ):
+        return [self.repo().commit( commit_id ) for commit_id in self.getUnpushedCommitIds()]
 
     #------------------------------------------------------------
     #
@@ -466,45 +891,118 @@ class GitProject:
 
     def cmdStage( self, filename ):
         self.debugLog( 'cmdStage( %r )' % (filename,) )
+        self.cmdStageFiles( [filename] )
+
+    # stage all the files with as few git commands as possible
+    def cmdStageFiles( self, all_filenames ):
+        self.debugLog( 'cmdStageFiles( %d files )' % (len(all_filenames),) )
+
+        self.__runForFilenameBatches( self.repo().git.add, ['--'], all_filenames )
 
-        self.repo().git.add( filename )
         self.__stale_index = True
 
     def cmdUnstage( self, rev, filename ):
         self.debugLog( 'cmdUnstage( %r )' % (filename,) )
+        self.cmdUnstageFiles( rev, [filename] )
+
+    def cmdUnstageFiles( self, rev, all_filenames ):
+        self.debugLog( 'cmdUnstageFiles( %d files )' % (len(all_filenames),) )
+
+        self.__runForFilenameBatches( self.repo().git.reset, ['HEAD', '--'], all_filenames, mixed=True )
 
-        self.repo().git.reset( 'HEAD', filename, mixed=True )
         self.__stale_index = True
 
     def cmdRevert( self, rev, file_state ):
         self.debugLog( 'cmdRevert( %r, %s:%r )' % (rev, file_state.relativePath(), file_state) )
+        self.cmdRevertFiles( rev, [file_state] )
 
-        try:
+    # revert all the files with one reset and one checkout
+    # except for staged renames that need to be undone one at a time
+    def cmdRevertFiles( self, rev, all_file_states ):
+        self.debugLog( 'cmdRevertFiles( %r, %d files )' % (rev, len(all_file_states)) )
+
+        all_reset_filenames = []
+        all_checkout_filenames = []
+
+        # rev of "--" means the index
+        if rev == '--':
+            all_rev_args = ['--']
+
+        else:
+            all_rev_args = [rev, '--']
+
+        for file_state in all_file_states:
             if file_state.isStagedRenamed():
-                self.debugLog( 'cmdRevert renamedFromFilename %r renamedToFilename %r' %
+                self.debugLog( 'cmdRevertFiles renamedFromFilename %r renamedToFilename %r' %
                     (file_state.renamedFromFilename(), file_state.renamedToFilename()) )
 
-                self.repo().git.reset( rev, file_state.renamedFromFilename(), mixed=True )
-                self.repo().git.reset( rev, file_state.renamedToFilename(), mixed=True )
-                self.repo().git.checkout( rev, file_state.renamedFromFilename() )
-                self.cmdDelete( file_state.renamedToFilename() )
+                try:
+                    self.repo().git.reset( rev, file_state.renamedFromFilename(), mixed=True )
+                    self.repo().git.reset( rev, file_state.renamedToFilename(), mixed=True )
+                    self.repo().git.checkout( rev, file_state.renamedFromFilename() )
+                    self.cmdDelete( file_state.renamedToFilename() )
+
+                except GitCommandError as e:
+                    self.__logGitCommandError( e )
 
             elif( file_state.isStagedNew()
             or file_state.isStagedModified() ):
-                self.repo().git.reset( rev, file_state.relativePath(), mixed=True )
+                all_reset_filenames.append( file_state.relativePath() )
 
             else:
-                self.repo().git.checkout( rev, file_state.relativePath() )
+                all_checkout_filenames.append( file_state.relativePath() )
 
-        except GitCommandError as e:
-            if e.stderr is not None:
-                # stderr unfortuently is prefixed with "\n  stderr: '"
-                self.app.log.error( e.stderr.split( "'", 1 )[1][:-1] )
-            else:
-                self.app.log.error( str(e) )
+        self.__runForFilenameBatches( self.repo().git.reset, all_rev_args, all_reset_filenames, mixed=True )
+        self.__runForFilenameBatches( self.repo().git.checkout, all_rev_args, all_checkout_filenames )
 
         self.__stale_index = True
 
+    # keep each command line well below the limits of the OS
+    max_filenames_length = 16*1024
+
+    def __filenameBatches( self, all_filenames ):
+        all_batch_filenames = []
+        length = 0
+        for filename in all_filenames:
+            filename = str( filename )
+            if len(all_batch_filenames) > 0 and length + len(filename) > self.max_filenames_length:
+                yield all_batch_filenames
+                all_batch_filenames = []
+                length = 0
+
+            all_batch_filenames.append( filename )
+            length += len(filename) + 1
+
+        if len(all_batch_filenames) > 0:
+            yield all_batch_filenames
+
+    # when a batch fails run its files one at a time so that
+    # one path git cannot handle does not stop the rest
+    def __runForFilenameBatches( self, git_function, all_args, all_filenames, **kwargs ):
+        for all_batch_filenames in self.__filenameBatches( all_filenames ):
+            try:
+                git_function( *all_args, *all_batch_filenames, **kwargs )
+
+            except GitCommandError as e:
+                if len(all_batch_filenames) == 1:
+                    self.__logGitCommandError( e )
+                    continue
+
+                for filename in all_batch_filenames:
+                    try:
+                        git_function( *all_args, filename, **kwargs )
+
+                    except GitCommandError as e:
+                        self.__logGitCommandError( e )
+
+    def __logGitCommandError( self, e ):
+        if e.stderr is not None:
+            # stderr unfortuently is prefixed with "\n  stderr: '"
+            self.app.log.error( e.stderr.split( "'", 1 )[1][:-1] )
+
+        else:
+            self.app.log.error( str(e) )
+
     def cmdDelete( self, filename ):
         (self.prefs_project.path / filename).unlink()
         self.__stale_index = True
@@ -622,17 +1120,29 @@ class GitProject:
     def cmdShow( self, what ):
         return self.repo().git.show( what )
 
+    def catFile( self ):
+        return wb_git_cat_file.catFileForRepo( self.repo() )
+
+    # return the full message of the commit or None if there is no such commit
+    def getCommitMessage( self, commit_id ):
+        result = self.catFile().readObject( commit_id )
+        if result is None:
+            return None
+
+        # the message follows the blank line after the headers
+        object_type, data = result
+        return data.decode( 'utf-8', 'replace' ).partition( '\n\n' )[2]
+
+    # what is a blob id or a name like commit:path
+    def getTextLinesForObject( self, what ):
+        return wb_git_cat_file.textLinesForObject( self.catFile(), what )
+
     def getTextLinesForCommit( self, filepath, commit_id ):
         assert isinstance( filepath, pathlib.Path ), 'expecting pathlib.Path got %r' % (filepath,)
 
-        # git show wants a posix path, it does not work with '\' path seperators
+        # git wants a posix path, it does not work with '\' path seperators
         git_filepath = pathlib.PurePosixPath( filepath )
-        text = self.cmdShow( '%s:%s' % (commit_id, git_filepath) )
-        all_lines = text.split('\n')
-        if all_lines[-1] == '':
-            return all_lines[:-1]
-        else:
-            return all_lines
+        return self.getTextLinesForObject( '%s:%s' % (commit_id, git_filepath) )
 
     def cmdCommit( self, message ):
         self.__stale_index = True
@@ -642,43 +1152,47 @@ class GitProject:
         if not self.hasCommits():
             return []
 
-        all_commit_logs = []
-
-        for commit in self.repo().iter_commits( None ):
-            if commit.hexsha == commit_id:
-                break
+        all_commit_ids = self.commitGraph().commitsOnlyIn( self.repo(), self.getHeadCommit().hexsha, commit_id )
 
-            all_commit_logs.append( GitCommitLogNode( commit ) )
+        return [GitCommitLogNode( self.repo().commit( commit_id ) ) for commit_id in all_commit_ids]
 
-        return all_commit_logs
+    log_first_chunk_size = 100
+    log_chunk_size = 1000
 
-    def cmdCommitLogForRepository( self, progress_callback, limit=None, since=None, until=None, rev=None, paths='' ):
+    # yields lists of GitCommitLogNode so that the first commits
+    # can be shown while the rest of the log is read.
+    # Use cmdAddCommitChangeInformation to find the changed files
+    def cmdCommitLogChunksForRepository( self, limit=None, since=None, until=None, rev=None, paths='' ):
         if not self.hasCommits():
-            return []
-
-        all_commit_logs = []
+            return
 
         kwds = {}
         if limit is not None:
             kwds['max_count'] = limit
         if since is not None:
             kwds['since'] = since
-        if since is not None:
+        if until is not None:
             kwds['until'] = until
 
+        chunk_size = self.log_first_chunk_size
+        all_commit_logs = []
+
         for commit in self.repo().iter_commits( rev, paths, **kwds ):
-            all_commit_logs.append( GitCommitLogNode( commit ) )
+            # read the commit details now so that the UI does not have to
+            commit.parents
 
-        total = len(all_commit_logs)
-        progress_callback( 0, total )
+            all_commit_logs.append( GitCommitLogNode( commit ) )
+            if len(all_commit_logs) >= chunk_size:
+                yield all_commit_logs
 
-        self.__addCommitChangeInformation( progress_callback, all_commit_logs )
-        progress_callback( total, total )
+                all_commit_logs = []
+                chunk_size = self.log_chunk_size
 
-        return all_commit_logs
+        if len(all_commit_logs) > 0:
+            yield all_commit_logs
 
-    def cmdCommitLogForFile( self, progress_callback, filename, limit=None, since=None, until=None, rev=None ):
-        return self.cmdCommitLogForRepository( progress_callback, paths=filename, limit=limit, since=since, until=until, rev=rev )
+    def cmdCommitLogChunksForFile( self, filename, limit=None, since=None, until=None, rev=None ):
+        return self.cmdCommitLogChunksForRepository( paths=filename, limit=limit, since=since, until=until, rev=rev )
 
     def cmdTagsForRepository( self ):
         tag_name_by_id = {}
@@ -695,110 +1209,214 @@ class GitProject:
     def doesTagExist( self, tag_name ):
         return tag_name in self.repo().tags
 
-    def __addCommitChangeInformation( self, progress_callback, all_commit_logs ):
-        # now calculate what was added, deleted and modified in each commit
-        total = len(all_commit_logs)
-        for offset in range( total ):
-            progress_callback( offset, total )
-            all_files = all_commit_logs[ offset ].commitStats().files
-            new_tree = all_commit_logs[ offset ].commitTree()
-            old_tree = all_commit_logs[ offset ].commitPreviousTree()
+    def cmdAddCommitChangeInformation( self, all_commit_logs ):
+        # calculate what was added, deleted, renamed and modified in each commit
+        all_uncached_commit_logs = []
+        for commit_log in all_commit_logs:
+            if commit_log.hasCommitFileChanges():
+                continue
+
+            all_changes = commit_changes_cache.get( commit_log.commitId() )
+            if all_changes is None:
+                all_uncached_commit_logs.append( commit_log )
+
+            else:
+                commit_log._setChanges( all_changes )
+
+        self.debugLog( 'cmdAddCommitChangeInformation %d commits %d not cached' % (len(all_commit_logs), len(all_uncached_commit_logs)) )
 
-            all_new = {}
-            self.__treeToDict( all_files, new_tree, all_new )
-            new_set = set(all_new)
+        # one git diff-tree finds the changes of a batch of commits
+        for offset in range( 0, len(all_uncached_commit_logs), self.diff_tree_batch_size ):
+            all_batch_commit_logs = all_uncached_commit_logs[offset:offset+self.diff_tree_batch_size]
+            all_changes_by_id = self.__diffTreeNameStatus( all_batch_commit_logs )
 
-            if old_tree is None:
-                all_commit_logs[ offset ]._addChanges( new_set, set(), [], set() )
+            for commit_log in all_batch_commit_logs:
+                all_changes = all_changes_by_id.get( commit_log.commitId(), [] )
+                commit_changes_cache.put( commit_log.commitId(), all_changes )
+                commit_log._setChanges( all_changes )
+
+    diff_tree_batch_size = 500
+
+    def __diffTreeNameStatus( self, all_commit_logs ):
+        # compare each commit with its first parent, as "git log" does
+        all_stdin_lines = []
+        for commit_log in all_commit_logs:
+            parent_id = commit_log.commitFirstParentId()
+            if parent_id is None:
+                all_stdin_lines.append( '%s\n' % (commit_log.commitId(),) )
 
             else:
-                all_old = {}
-                self.__treeToDict( all_files, old_tree, all_old )
-
-                old_set = set(all_old)
-
-                all_added = new_set - old_set
-                all_deleted = old_set - new_set
-
-                all_renamed = []
-
-                # look for renames
-                if len(all_added) > 0 and len(all_deleted) > 0:
-                    all_old_id_to_name = {}
-                    for name in all_deleted:
-                        all_old_id_to_name[ all_old[ name ] ] = name
-
-                    for name in list(all_added):
-                        id_ = all_new[ name ]
-
-                        if id_ in all_old_id_to_name:
-                            old_name = all_old_id_to_name[ id_ ]
-
-                            # converted svn repos can have trees that cannot
-                            # be used to figure out the rename
-                            # for example when the checkin deletes a folder
-                            # which cannot be expressed in git trees
-                            if( old_name in all_added
-                            and old_name in all_deleted ):
-                                all_added.remove( name )
-                                all_deleted.remove( old_name )
-                                all_renamed.append( (name, old_name) )
-
-                all_modified = set()
-
-                for key in all_new:
-                    if( key in all_old
-                    and all_new[ key ] != all_old[ key ] ):
-                        all_modified.add( key )
-
-                all_commit_logs[ offset ]._addChanges( all_added, all_deleted, all_renamed, all_modified )
-
-    def __treeToDict( self, all_files, tree, all_entries ):
-        for file in all_files:
-            all_parts = file.split('/')
-            node = tree
-
-            # walk down the tree (aka folders) until we have
-            # the tree that has the blob (aka file) in it
-
-            # tree.path is the full name of the folder
-            for index in range(1, len(all_parts)):
-                prefix = '/'.join( all_parts[:index] )
-                for child in node.trees:
-                    if child.path == prefix:
-                        node = child
-                        break
-
-            # blob.path is the full path to the file
-            for blob in node:
-                if blob.path == file:
-                    all_entries[ blob.path ] = blob.hexsha
-                    break
+                all_stdin_lines.append( '%s %s\n' % (commit_log.commitId(), parent_id) )
+
+        with tempfile.TemporaryFile() as f:
+            f.write( ''.join( all_stdin_lines ).encode( 'utf-8' ) )
+            f.seek( 0 )
+
+            rc, stdout, stderr = self.repo().git.execute(
+                    [git.Git.GIT_PYTHON_GIT_EXECUTABLE, 'diff-tree', '--stdin', '-r', '-M', '--name-status', '-z', '--root', '--always'],
+                    istream=f,
+                    with_extended_output=True,
+                    with_exceptions=False,
+                    universal_newlines=False,
+                    stdout_as_string=False )
+
+        if rc != 0:
+            self.app.log.error( 'git diff-tree failed - %s' % (stderr.decode( 'utf-8', 'replace' ),) )
+            return {}
+
+        # output is the commit id followed by the changes, all NUL terminated
+        #   <id> NUL { <status> NUL <path> NUL | R<score> NUL <old-path> NUL <new-path> NUL }
+        all_changes_by_id = {}
+        all_changes = None
+
+        # a path that is not utf-8 must not lose the changes of the whole batch
+        all_fields = stdout.decode( 'utf-8', 'replace' ).split( '\0' )
+        index = 0
+        while index < len(all_fields):
+            field = all_fields[ index ]
+            index += 1
+
+            if field == '':
+                continue
+
+            if len(field) in (40, 64) and field.strip( '0123456789abcdef' ) == '':
+                all_changes = all_changes_by_id.setdefault( field, [] )
+
+            elif field[0] in ('R', 'C'):
+                old_name = all_fields[ index ]
+                new_name = all_fields[ index+1 ]
+                index += 2
+
+                if field[0] == 'R':
+                    all_changes.append( ('R', new_name, old_name) )
+
+                else:
+                    all_changes.append( ('A', new_name, '') )
+
+            else:
+                name = all_fields[ index ]
+                index += 1
+
+                if field[0] in ('A', 'D'):
+                    all_changes.append( (field[0], name, '') )
 
-    def cmdAnnotationForFile( self, filename, rev=None ):
+                else:
+                    # M and T (type change)
+                    all_changes.append( ('M', name, '') )
+
+        return all_changes_by_id
+
+    # the lines of the file at rev with no commit ids.
+    # cmdAnnotationChunksForFile finds the commit of each line
+    def cmdAnnotationLinesForFile( self, filename, rev=None ):
+        if rev is None:
+            rev = 'HEAD'
+
+        all_lines = self.getTextLinesForCommit( filename, rev )
+        return [wb_annotate_node.AnnotateNode( line_num, line_text, None )
+                for line_num, line_text in enumerate( all_lines, 1 )]
+
+    # the annotation of a file only changes when a commit changes the file
+    # so the last commit that changed it and its blob id identify the annotation
+    def cmdAnnotationIdentityForFile( self, filename, rev=None ):
         if rev is None:
             rev = 'HEAD'
 
-        all_annotate_nodes = []
+        git_filepath = pathlib.PurePosixPath( filename )
+        info = self.catFile().objectInfo( '%s:%s' % (rev, git_filepath) )
+        if info is None:
+            return None
+
+        commit_id = self.repo().git.log( '-1', '--format=%H', rev, '--', str( git_filepath ) )
+        if commit_id == '':
+            return None
 
-        line_num = 0
-        for commit, all_lines in self.repo().blame( rev, self.pathForGit( filename ) ):
-            commit_id = commit.hexsha
-            for line_text in all_lines:
-                line_num += 1
-                all_annotate_nodes.append(
-                    wb_annotate_node.AnnotateNode( line_num, line_text, commit_id ) )
+        return '%s:%s' % (commit_id, info[0])
 
-        return all_annotate_nodes
+    annotate_chunk_size = 1000      # lines
+    annotate_chunk_interval = 0.2   # seconds
 
-    def cmdCommitLogForAnnotateFile( self, filename, all_commit_ids ):
+    # run git blame --incremental yielding (all_blame_entries, all_commit_logs)
+    # as the commit of each line is found. all_blame_entries is a list of
+    # (commit_id, first_line_num, num_lines) and all_commit_logs has a
+    # GitBlameCommitLogNode for the commits not seen in an earlier chunk
+    def cmdAnnotationChunksForFile( self, filename, rev=None ):
+        if rev is None:
+            rev = 'HEAD'
+
+        cmd = [git.Git.GIT_PYTHON_GIT_EXECUTABLE, 'blame', '--incremental', rev, '--', self.pathForGit( filename )]
+        self.debugLog( 'cmdAnnotationChunksForFile %r' % (cmd,) )
+
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                        cmd,
+                        cwd=str( self.projectPath() ),
+                        stdout=subprocess.PIPE,
+                        stderr=stderr,
+                        creationflags=getattr( subprocess, 'CREATE_NO_WINDOW', 0 ) )
+
+            try:
+                yield from self.__parseBlameIncremental( process.stdout )
+
+                if process.wait() != 0:
+                    stderr.seek( 0 )
+                    raise GitCommandError( cmd, process.returncode, stderr.read() )
+
+            finally:
+                # the caller may stop before all the output has been read
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+                process.stdout.close()
+
+    def __parseBlameIncremental( self, stdout ):
+        all_known_commit_ids = set()
+
+        all_blame_entries = []
         all_commit_logs = {}
+        num_lines_pending = 0
+        last_yield_time = time.time()
+
+        # each entry is a "<commit_id> <orig_line> <final_line> <num_lines>" line
+        # then the details of the commit, only the first time the commit is seen,
+        # and ends with a "filename <name>" line
+        entry = None
+        all_headers = {}
+        for line in stdout:
+            line = line.decode( 'utf-8', 'replace' ).rstrip( '\n' )
+
+            if entry is None:
+                commit_id, orig_line_num, first_line_num, num_lines = line.split( ' ' )
+                entry = (commit_id, int( first_line_num ), int( num_lines ))
+                all_headers = {}
+                continue
+
+            name, _, value = line.partition( ' ' )
+            if name != 'filename':
+                all_headers[ name ] = value
+                continue
 
-        for commit_id in all_commit_ids:
-            commit = self.repo().commit( commit_id )
-            all_commit_logs[ commit_id ] = GitCommitLogNode( commit )
+            commit_id = entry[0]
+            if commit_id not in all_known_commit_ids:
+                all_known_commit_ids.add( commit_id )
+                all_commit_logs[ commit_id ] = GitBlameCommitLogNode( self, commit_id, all_headers )
 
-        return all_commit_logs
+            all_blame_entries.append( entry )
+            num_lines_pending += entry[2]
+            entry = None
+
+            if( num_lines_pending >= self.annotate_chunk_size
+            or time.time() - last_yield_time >= self.annotate_chunk_interval ):
+                yield all_blame_entries, all_commit_logs
+
+                all_blame_entries = []
+                all_commit_logs = {}
+                num_lines_pending = 0
+                last_yield_time = time.time()
+
+        if len(all_blame_entries) > 0:
+            yield all_blame_entries, all_commit_logs
 
     def cmdPull( self, progress_callback, info_callback ):
         tracking_branch = self.repo().head.ref.tracking_branch()
@@ -912,6 +1530,38 @@ class GitProject:
         return all_stashes
 
 
+#
+#   The paths in the working tree that have to be
+#   scanned to find all the changes seen by the
+#   change watcher
+#
+class WbGitDirtyScope:
+    def __init__( self ):
+        # folders whose files, but not sub folders, are scanned
+        self.all_flat_folders = set()
+        # folders scanned with all their sub folders
+        self.all_deep_folders = set()
+        self.all_files = set()
+
+    def contains( self, path ):
+        if path in self.all_files or path.parent in self.all_flat_folders:
+            return True
+
+        return not self.all_deep_folders.isdisjoint( path.parents )
+
+    def allPathSpecs( self ):
+        all_path_specs = []
+        for folder in sorted( self.all_flat_folders ):
+            all_path_specs.append( folderFilesPathSpec( folder ) )
+
+        for folder in sorted( self.all_deep_folders ):
+            all_path_specs.append( ':(glob)%s/**' % (glob.escape( folder.as_posix() ),) )
+
+        for path in sorted( self.all_files ):
+            all_path_specs.append( ':(literal)%s' % (path.as_posix(),) )
+
+        return all_path_specs
+
 class WbGitStashInfo:
     def __init__( self, stash_id, stash_branch, stash_message ):
         self.stash_id = stash_id
@@ -1128,28 +1778,13 @@ class WbGitFileState:
                 return all_lines
 
     def getTextLinesHead( self ):
-        return self.__getTextLinesFromBlob( self.getHeadBlob() )
+        return self.__project.getTextLinesForObject( self.getHeadBlob().hexsha )
 
     def getTextLinesStaged( self ):
-        return self.__getTextLinesFromBlob( self.getStagedBlob() )
-
-    def __getTextLinesFromBlob( self, blob ):
-        data = blob.data_stream.read()
-        text = data.decode( 'utf-8' )
-        all_lines = text.split('\n')
-        if all_lines[-1] == '':
-            return all_lines[:-1]
-        else:
-            return all_lines
+        return self.__project.getTextLinesForObject( self.getStagedBlob().hexsha )
 
     def getTextLinesForCommit( self, commit_id ):
-        git_filepath = pathlib.PurePosixPath( self.__filepath )
-        text = self.__project.cmdShow( '%s:%s' % (commit_id, git_filepath) )
-        all_lines = text.split('\n')
-        if all_lines[-1] == '':
-            return all_lines[:-1]
-        else:
-            return all_lines
+        return self.__project.getTextLinesForCommit( self.__filepath, commit_id )
 
     def getHeadBlob( self ):
         return self.__head_blob
@@ -1157,36 +1792,125 @@ class WbGitFileState:
     def getStagedBlob( self ):
         return self.__staged_blob
 
-class GitCommitLogNode:
-    def __init__( self, commit ):
-        self.__commit = commit
-        self.__all_changes = []
+#
+#   WbGitCachedFileState has the state of a file from the status cache.
+#   It is replaced by a WbGitFileState once the status is known.
+#
+class WbGitCachedFileState:
+    def __init__( self, project, filepath, flags, staged_abbrev, unstaged_abbrev, renamed_from, renamed_to ):
+        self.__project = project
+        self.__filepath = filepath
 
-    def _addChanges( self, all_added, all_deleted, all_renamed, all_modified ):
-        for name in all_added:
-            self.__all_changes.append( ('A', name, '' ) )
+        self.__flags = flags
+        self.__staged_abbrev = staged_abbrev
+        self.__unstaged_abbrev = unstaged_abbrev
+        self.__renamed_from = renamed_from
+        self.__renamed_to = renamed_to
 
-        for name in all_deleted:
-            self.__all_changes.append( ('D', name, '' ) )
+    def __repr__( self ):
+        return ('<WbGitCachedFileState: S=%r, U=%r' %
+                (self.__staged_abbrev, self.__unstaged_abbrev))
 
-        for name, old_name in all_renamed:
-            self.__all_changes.append( ('R', name, old_name ) )
+    def relativePath( self ):
+        return self.__filepath
 
-        for name in all_modified:
-            self.__all_changes.append( ('M', name, '' ) )
+    def absolutePath( self ):
+        return self.__project.projectPath() / self.__filepath
 
-    def commitStats( self ):
-        return self.__commit.stats
+    def renamedToFilename( self ):
+        assert self.isStagedRenamed()
+        return pathlib.Path( self.__renamed_to )
 
-    def commitTree( self ):
-        return self.__commit.tree
+    def renamedFromFilename( self ):
+        assert self.isStagedRenamed()
+        return pathlib.Path( self.__renamed_from )
+
+    def isDir( self ):
+        return self.__flags&wb_status_cache.FLAG_IS_DIR != 0
 
-    def commitPreviousTree( self ):
+    def getStagedAbbreviatedStatus( self ):
+        return self.__staged_abbrev
+
+    def getUnstagedAbbreviatedStatus( self ):
+        return self.__unstaged_abbrev
+
+    #------------------------------------------------------------
+    def isControlled( self ):
+        return self.__flags&wb_status_cache.FLAG_CONTROLLED != 0
+
+    def isUncontrolled( self ):
+        return self.__flags&wb_status_cache.FLAG_UNTRACKED != 0
+
+    def isIgnored( self ):
+        return not self.isControlled() and not self.isUncontrolled()
+
+    # ------------------------------
+    def isStagedNew( self ):
+        return self.__staged_abbrev == 'A'
+
+    def isStagedModified( self ):
+        return self.__staged_abbrev == 'M'
+
+    def isStagedDeleted( self ):
+        return self.__staged_abbrev == 'D'
+
+    def isStagedRenamed( self ):
+        return self.__staged_abbrev == 'R'
+
+    def isUnstagedModified( self ):
+        return self.__unstaged_abbrev == 'M'
+
+    def isUnstagedDeleted( self ):
+        return self.__unstaged_abbrev == 'D'
+
+    # ------------------------------------------------------------
+    def canCommit( self ):
+        return self.__staged_abbrev != ''
+
+    def canStage( self ):
+        return self.__unstaged_abbrev != '' or self.isUncontrolled()
+
+    def canUnstage( self ):
+        return self.__staged_abbrev != ''
+
+    def canRevert( self ):
+        return (self.isUnstagedDeleted()
+               or self.isUnstagedModified()
+               or self.isStagedNew()
+               or self.isStagedRenamed()
+               or self.isStagedDeleted()
+               or self.isStagedModified())
+
+    # ------------------------------------------------------------
+    # the blobs are not known until the status has been found
+    def canDiffHeadVsStaged( self ):
+        return False
+
+    def canDiffStagedVsWorking( self ):
+        return False
+
+    def canDiffHeadVsWorking( self ):
+        return False
+
+    def getHeadBlob( self ):
+        return None
+
+    def getStagedBlob( self ):
+        return None
+
+class GitCommitLogNode:
+    def __init__( self, commit ):
+        self.__commit = commit
+        self.__all_changes = None
+
+    def _setChanges( self, all_changes ):
+        self.__all_changes = all_changes
+
+    def commitFirstParentId( self ):
         if len(self.__commit.parents) == 0:
             return None
 
-        previous_commit = self.__commit.parents[0]
-        return previous_commit.tree
+        return self.__commit.parents[0].hexsha
 
     def commitId( self ):
         return self.__commit.hexsha
@@ -1209,9 +1933,92 @@ class GitCommitLogNode:
     def commitMessageHeadline( self ):
         return self.__commit.message.split('\n')[0]
 
+    def hasCommitFileChanges( self ):
+        return self.__all_changes is not None
+
     def commitFileChanges( self ):
+        assert self.__all_changes is not None, 'use cmdAddCommitChangeInformation'
         return self.__all_changes
 
+#
+#   The details of a commit that git blame reports the first time it sees
+#   the commit. The full message is only read if it is needed.
+#
+class GitBlameCommitLogNode:
+    def __init__( self, project, commit_id, all_headers ):
+        self.__project = project
+        self.__commit_id = commit_id
+
+        self.__author = all_headers.get( 'author', '' )
+        self.__author_email = all_headers.get( 'author-mail', '' ).strip( '<>' )
+        self.__date = datetimeFromGitTime( all_headers.get( 'committer-time', '0' ), all_headers.get( 'committer-tz', '+0000' ) )
+        self.__summary = all_headers.get( 'summary', '' )
+        self.__message = None
+
+    def commitId( self ):
+        return self.__commit_id
+
+    def commitIdString( self ):
+        return self.__commit_id
+
+    def commitAuthor( self ):
+        return self.__author
+
+    def commitAuthorEmail( self ):
+        return self.__author_email
+
+    def commitDate( self ):
+        return self.__date
+
+    def commitMessage( self ):
+        if self.__message is None:
+            message = self.__project.getCommitMessage( self.__commit_id )
+            if message is None:
+                return self.__summary
+
+            self.__message = message
+
+        return self.__message
+
+    def commitMessageHeadline( self ):
+        return self.__summary
+
+# timestamp is seconds since the epoch and tz is like +0100
+def datetimeFromGitTime( timestamp, tz ):
+    offset = int( tz[1:3] )*3600 + int( tz[3:5] )*60
+    if tz.startswith( '-' ):
+        offset = -offset
+
+    return datetime.datetime.fromtimestamp( int( timestamp ), datetime.timezone( datetime.timedelta( seconds=offset ) ) )
+
+#
+#   The changes made by a commit never change so they are
+#   kept in a cache shared by all projects keyed by commit id
+#
+class WbGitCommitChangesCache:
+    def __init__( self, max_size ):
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__all_changes = collections.OrderedDict()
+
+    def get( self, commit_id ):
+        with self.__lock:
+            all_changes = self.__all_changes.get( commit_id )
+            if all_changes is not None:
+                self.__all_changes.move_to_end( commit_id )
+
+            return all_changes
+
+    def put( self, commit_id, all_changes ):
+        with self.__lock:
+            self.__all_changes[ commit_id ] = all_changes
+            self.__all_changes.move_to_end( commit_id )
+
+            while len(self.__all_changes) > self.__max_size:
+                self.__all_changes.popitem( last=False )
+
+commit_changes_cache = WbGitCommitChangesCache( 20000 )
+
 class GitProjectTreeNode:
     def __init__( self, project, name, path ):
         self.project = project
@@ -1225,7 +2032,7 @@ class GitProjectTreeNode:
         return '<GitProjectTreeNode: project %r, path %s>' % (self.project, self.__path)
 
     def updateTreeNode( self ):
-        pass
+        self.project.updateTreeNodeState( self )
 
     def isByPath( self ):
         return self.is_by_path
@@ -1240,6 +2047,12 @@ class GitProjectTreeNode:
         path = path
         self.__all_files[ path ] = path
 
+    def delFileByName( self, path ):
+        self.__all_files.pop( path.name, None )
+
+    def delFileByPath( self, path ):
+        self.__all_files.pop( path, None )
+
     def getAllFileNames( self ):
         return self.__all_files.keys()
 
@@ -1248,6 +2061,13 @@ class GitProjectTreeNode:
         assert isinstance( node, GitProjectTreeNode )
         self.__all_folders[ name ] = node
 
+    def delFolder( self, name ):
+        assert type(name) == str
+        del self.__all_folders[ name ]
+
+    def isEmpty( self ):
+        return len(self.__all_files) == 0 and len(self.__all_folders) == 0
+
     def getFolder( self, name ):
         assert type(name) == str
         return self.__all_folders[ name ]
@@ -16,6 +16,7 @@ import pathlib
 import wb_log_history_options_dialog
 import wb_ui_actions
 import wb_common_dialogs
+import wb_annotate_cache
 
 import wb_git_project
 import wb_git_status_view
@@ -23,6 +24,7 @@ import wb_git_commit_dialog
 import wb_git_annotate
 import wb_git_stash_dialogs
 
+import wb_background_thread
 from wb_background_thread import thread_switcher
 
 #
@@ -355,14 +357,8 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
                                 {'project_name': git_project.projectName()
                                 ,'branch': git_project.getTrackingBranchName()} )
 
-        commit_id = git_project.getTrackingBranchCommit()
-        if commit_id is None:
-            commit_id = git_project.getHeadCommit().hexsha
-
-        else:
-            commit_id = commit_id.hexsha
-
-        num_unpushed = len( git_project.getUnpushedCommits() )
+        # the pulled commits are the ones that HEAD did not have before the pull
+        old_head_commit_id = git_project.getHeadCommit().hexsha
 
         yield self.switchToBackground
 
@@ -376,7 +372,7 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
                 self.deferRunInForeground( self.pullProgressHandler ),
                 self.deferRunInForeground( self.pullInfoHandler ) )
 
-            for commit in git_project.cmdCommitLogAfterCommitId( commit_id )[num_unpushed:]:
+            for commit in git_project.cmdCommitLogAfterCommitId( old_head_commit_id ):
                 self.log.info( 'pulled "%s" id %s' % (commit.commitMessageHeadline(), commit.commitIdString()) )
 
             if need_to_stash:
@@ -483,16 +479,16 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
     @thread_switcher
     def tableActionGitStage_Bg( self, checked=None ):
         self.debugLog( 'tableActionGitStage_Bg start' )
-        yield from self._tableActionChangeRepo_Bg( self._actionGitStage )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitStageAll_Bg )
         self.debugLog( 'tableActionGitStage_Bg done' )
 
     @thread_switcher
     def tableActionGitUnstage_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitUnstage )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitUnstageAll_Bg )
 
     @thread_switcher
     def tableActionGitRevert_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitRevert, self._areYouSureRevert )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitRevertAll_Bg, self._areYouSureRevert )
 
     @thread_switcher
     def tableActionGitDelete_Bg( self, checked=None ):
@@ -534,25 +530,49 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield from commit_log_view.showCommitLogForFile_Bg( git_project, filename, options )
 
-    def _actionGitStage( self, git_project, filename ):
-        self.debugLog( '_actionGitStage( %r, %s )' )
-        git_project.cmdStage( filename )
+    # the whole selection is acted on by one git command
+    @thread_switcher
+    def _actionGitStageAll_Bg( self, git_project, all_filenames ):
+        self.debugLog( '_actionGitStageAll_Bg( %r, %d files )' % (git_project, len(all_filenames)) )
 
-    def _actionGitUnstage( self, git_project, filename ):
-        self.debugLog( '_actionGitUnstage( %r, %s )' )
-        git_project.cmdUnstage( 'HEAD', filename )
+        yield self.switchToBackground
+        git_project.cmdStageFiles( all_filenames )
+        yield self.switchToForeground
 
-    def _actionGitRevert( self, git_project, filename ):
-        file_state = git_project.getFileState( filename )
-        if( file_state.isStagedModified()
-        and (file_state.isUnstagedModified()
-            or file_state.isUnstagedDeleted()) ):
-            # revert to staged (--)
-            git_project.cmdRevert( '--', file_state )
+    @thread_switcher
+    def _actionGitUnstageAll_Bg( self, git_project, all_filenames ):
+        self.debugLog( '_actionGitUnstageAll_Bg( %r, %d files )' % (git_project, len(all_filenames)) )
 
-        else:
-            # revert to HEAD
-            git_project.cmdRevert( 'HEAD', file_state )
+        yield self.switchToBackground
+        git_project.cmdUnstageFiles( 'HEAD', all_filenames )
+        yield self.switchToForeground
+
+    @thread_switcher
+    def _actionGitRevertAll_Bg( self, git_project, all_filenames ):
+        all_staged_file_states = []
+        all_head_file_states = []
+
+        for filename in all_filenames:
+            file_state = git_project.getFileState( filename )
+            if( file_state.isStagedModified()
+            and (file_state.isUnstagedModified()
+                or file_state.isUnstagedDeleted()) ):
+                # revert to staged (--)
+                all_staged_file_states.append( file_state )
+
+            else:
+                # revert to HEAD
+                all_head_file_states.append( file_state )
+
+        yield self.switchToBackground
+
+        if len(all_staged_file_states) > 0:
+            git_project.cmdRevertFiles( '--', all_staged_file_states )
+
+        if len(all_head_file_states) > 0:
+            git_project.cmdRevertFiles( 'HEAD', all_head_file_states )
+
+        yield self.switchToForeground
 
     def _actionGitDelete( self, git_project, filename ):
         file_state = git_project.getFileState( filename )
@@ -635,6 +655,13 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
         yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function, self._tableActionChangeRepo_finalise_Bg )
         self.debugLog( '_tableActionChangeRepo_Bg done' )
 
+    @thread_switcher
+    def _tableActionChangeRepoAll_Bg( self, execute_all_function, are_you_sure_function=None ):
+        self.debugLog( '_tableActionChangeRepoAll_Bg start' )
+
+        yield from self.table_view.tableActionViewRepoAll_Bg( execute_all_function, are_you_sure_function, self._tableActionChangeRepo_finalise_Bg )
+        self.debugLog( '_tableActionChangeRepoAll_Bg done' )
+
     @thread_switcher
     def _tableActionChangeRepo_finalise_Bg( self, git_project ):
         self.debugLog( '_tableActionChangeRepo_finalise_Bg' )
@@ -688,34 +715,74 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield self.switchToBackground
 
-        # when we know that exception can be raised catch it...
-        all_annotation_nodes = git_project.cmdAnnotationForFile( filename )
+        # the full message of a commit is only read when its line is selected
+        annotate_cache = wb_annotate_cache.WbAnnotateCache( self.app, 'git', git_project.projectPath(),
+                                                            git_project.getCommitMessage )
+        annotation_identity = git_project.cmdAnnotationIdentityForFile( filename )
+        cached_annotation = annotate_cache.load( filename, annotation_identity )
+
+        if cached_annotation is not None:
+            all_annotation_nodes, all_commit_logs = cached_annotation
 
-        all_annotate_commit_ids = set()
-        for node in all_annotation_nodes:
-            all_annotate_commit_ids.add( node.log_id )
+        else:
+            # when we know that exception can be raised catch it...
+            all_annotation_nodes = git_project.cmdAnnotationLinesForFile( filename )
+            all_commit_logs = {}
 
         yield self.switchToForeground
 
-        self.progress.end()
-        self.progress.start( T_('Annotate Commit Logs %(count)d'), 0 )
+        # show the lines now and fill in the commits as git blame finds them
+        annotate_view = wb_git_annotate.WbGitAnnotateView(
+                            self.app,
+                            T_('Annotation of %s') % (filename,) )
+        annotate_view.showAnnotationForFile( all_annotation_nodes, dict( all_commit_logs ) )
+        annotate_view.show()
 
-        yield self.switchToBackground
+        if cached_annotation is not None:
+            self.__endAnnotate()
+            return
 
-        # when we know that exception can be raised catch it...
-        all_commit_logs = git_project.cmdCommitLogForAnnotateFile( filename, all_annotate_commit_ids )
+        # git blame runs until it is done or the view is closed
+        self.app.wrapWithThreadSwitcher( self.__actionGitAnnotateChunks_Bg, 'annotate',
+                    lane=wb_background_thread.projectLane( git_project ),
+                    cancel_token=annotate_view.cancel_token )(
+                        git_project, filename, annotate_view, annotate_cache, annotation_identity, all_annotation_nodes )
 
-        yield self.switchToForeground
+    @thread_switcher
+    def __actionGitAnnotateChunks_Bg( self, git_project, filename, annotate_view, annotate_cache, annotation_identity, all_annotation_nodes ):
+        num_lines_annotated = 0
+        all_commit_logs = {}
+        all_annotation_chunks = None
+
+        try:
+            yield self.switchToBackground
+
+            all_annotation_chunks = git_project.cmdAnnotationChunksForFile( filename )
+            for all_blame_entries, all_chunk_commit_logs in all_annotation_chunks:
+                yield self.switchToForeground
+
+                annotate_view.updateAnnotationForFile( all_blame_entries, all_chunk_commit_logs )
+                all_commit_logs.update( all_chunk_commit_logs )
 
+                num_lines_annotated += sum( num_lines for commit_id, first_line_num, num_lines in all_blame_entries )
+                self.progress.setEventCount( num_lines_annotated )
+
+                yield self.switchToBackground
+
+            # the view has set the log_id of all the nodes
+            annotate_cache.save( filename, annotation_identity, all_annotation_nodes, all_commit_logs )
+
+        finally:
+            # stops git blame if the view is closed
+            if all_annotation_chunks is not None:
+                all_annotation_chunks.close()
+
+            self.app.runInForeground( self.__endAnnotate, () )
+
+    def __endAnnotate( self ):
         self.setStatusAction()
         self.progress.end()
 
-        annotate_view = wb_git_annotate.WbGitAnnotateView(
-                            self.app,
-                            T_('Annotation of %s') % (filename,) )
-        annotate_view.showAnnotationForFile( all_annotation_nodes, all_commit_logs )
-        annotate_view.show()
-
     commit_key = 'git-commit-dialog'
     def treeActionGitCommit( self ):
         if self.app.hasSingleton( self.commit_key ):
@@ -771,29 +838,33 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
     #============================================================
     @thread_switcher
     def tableActionGitStageAndInclude_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitStageAndInclude )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitStageAndIncludeAll_Bg )
 
-    def _actionGitStageAndInclude( self, git_project, filename ):
-        self._actionGitStage( git_project, filename )
-        self.main_window.all_included_files.add( filename )
+    @thread_switcher
+    def _actionGitStageAndIncludeAll_Bg( self, git_project, all_filenames ):
+        yield from self._actionGitStageAll_Bg( git_project, all_filenames )
+        self.main_window.all_included_files.update( all_filenames )
 
     @thread_switcher
     def tableActionGitUnstageAndExclude_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitUnstageAndExclude )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitUnstageAndExcludeAll_Bg )
 
-    def _actionGitUnstageAndExclude( self, git_project, filename ):
-        self._actionGitUnstage( git_project, filename )
-        self.main_window.all_included_files.discard( filename )
+    @thread_switcher
+    def _actionGitUnstageAndExcludeAll_Bg( self, git_project, all_filenames ):
+        yield from self._actionGitUnstageAll_Bg( git_project, all_filenames )
+        self.main_window.all_included_files.difference_update( all_filenames )
 
     @thread_switcher
     def tableActionGitRevertAndExclude_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitRevertAndExclude, self._areYouSureRevert )
+        yield from self._tableActionChangeRepoAll_Bg( self._actionGitRevertAndExcludeAll_Bg, self._areYouSureRevert )
 
-    def _actionGitRevertAndExclude( self, git_project, filename ):
-        self._actionGitRevert( git_project, filename )
+    @thread_switcher
+    def _actionGitRevertAndExcludeAll_Bg( self, git_project, all_filenames ):
+        yield from self._actionGitRevertAll_Bg( git_project, all_filenames )
 
-        if not git_project.getFileState( filename ).canCommit():
-            self.main_window.all_included_files.discard( filename )
+        for filename in all_filenames:
+            if not git_project.getFileState( filename ).canCommit():
+                self.main_window.all_included_files.discard( filename )
 
     @thread_switcher
     def tableActionCommitInclude_Bg( self, checked ):
@@ -42,7 +42,10 @@ class GitMainWindowComponents(wb_ui_components.WbMainWindowComponents):
             return None
 
         try:
-            return wb_git_project.GitProject( self.app, project, self )
+            git_project = wb_git_project.GitProject( self.app, project, self )
+            # show the last known status until the real status is found
+            git_project.loadStatusCache()
+            return git_project
 
         except git.exc.InvalidGitRepositoryError as e:
             self.log.error( 'Failed to add Git repo %r' % (project.path,) )
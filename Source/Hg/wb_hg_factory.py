@@ -10,9 +10,6 @@
     wb_hg_factory.py
 
 '''
-import wb_hg_ui_components
-import wb_hg_ui_actions
-import wb_hg_log_history_view
 import wb_hg_preferences
 
 import wb_scm_project_dialogs
@@ -44,9 +41,11 @@ class WbHgFactory(wb_scm_factory_abc.WbScmFactoryABC):
         pass
 
     def uiComponents( self ):
+        import wb_hg_ui_components
         return wb_hg_ui_components.HgMainWindowComponents( self )
 
     def uiActions( self ):
+        import wb_hg_ui_actions
         return wb_hg_ui_actions.HgMainWindowActions( self )
 
     def projectSettingsDialog( self, app, main_window, prefs_project, scm_project ):
@@ -65,6 +64,7 @@ class WbHgFactory(wb_scm_factory_abc.WbScmFactoryABC):
         return [('.hg', 'hg')]
 
     def logHistoryView( self, app, title ):
+        import wb_hg_log_history_view
         return wb_hg_log_history_view.WbHgLogHistoryView( app, title )
 
     def setupPreferences( self, scheme_nodes ):
@@ -15,11 +15,13 @@ from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
+import wb_date
 import wb_tracked_qwidget
 import wb_main_window
 import wb_ui_components
 import wb_table_view
 
+import wb_background_thread
 from wb_background_thread import thread_switcher
 
 def U_( s: str ) -> str:
@@ -54,15 +56,16 @@ class HgLogHistoryWindowComponents(wb_ui_components.WbMainWindowComponents):
         addMenu( m, T_('Diff'), act.tableActionHgDiffLogHistory, act.enablerTableHgDiffLogHistory, 'toolbar_images/diff.png' )
 
     def deferedLogHistoryProgress( self ):
-        return self.app.deferRunInForeground( self.__logHistoryProgress )
+        return self.__logHistoryProgress
 
+    # called on the background thread for each commit
     def __logHistoryProgress( self, count, total ):
         if total > 0:
             if count == 0:
-                self.progress.start( '%(count)s of %(total)d commits loaded. %(percent)d%%', total )
+                self.app.runInForegroundBatched( self.progress.start, ('%(count)s of %(total)d commits loaded. %(percent)d%%', total) )
 
             else:
-                self.progress.incEventCount()
+                self.app.countInForeground( self.progress.incEventCount )
 
 
 class WbHgLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedModeless):
@@ -196,7 +199,8 @@ class WbHgLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.filename = None
         self.hg_project = hg_project
 
-        yield self.app.switchToBackground
+        # let other projects and interactive work run while the log loads
+        yield self.app.switchToBackgroundLane( wb_background_thread.projectLane( hg_project ), wb_background_thread.PRIORITY_BULK )
 
         self.log_model.loadCommitLogForRepository( self.ui_component.deferedLogHistoryProgress(), hg_project, options.getLimit(), options.getSince(), options.getUntil() )
 
@@ -213,7 +217,8 @@ class WbHgLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.filename = filename
         self.hg_project = hg_project
 
-        yield self.app.switchToBackground
+        # let other projects and interactive work run while the log loads
+        yield self.app.switchToBackgroundLane( wb_background_thread.projectLane( hg_project ), wb_background_thread.PRIORITY_BULK )
 
         self.log_model.loadCommitLogForFile( self.ui_component.deferedLogHistoryProgress(), hg_project, filename, options.getLimit(), options.getSince(), options.getUntil() )
 
@@ -293,6 +298,7 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
         super().__init__()
 
         self.all_commit_nodes  = []
+        self.date_strings = wb_date.WbTableDateStrings( self.app.formatDatetime, lambda row: self.all_commit_nodes[ row ].date )
         self.all_tags_by_rev = {}
 
         if app.isDarkMode():
@@ -303,12 +309,14 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
     def loadCommitLogForRepository( self, progress_callback, hg_project, limit, since, until ):
         self.beginResetModel()
         self.all_commit_nodes = hg_project.cmdCommitLogForRepository( limit, since, until )
+        self.date_strings.clear()
         self.all_tags_by_rev = hg_project.cmdTagsForRepository()
         self.endResetModel()
 
     def loadCommitLogForFile( self, progress_callback, hg_project, filename, limit, since, until ):
         self.beginResetModel()
         self.all_commit_nodes = hg_project.cmdCommitLogForFile( filename, limit, since, until )
+        self.date_strings.clear()
         self.all_tags_by_rev = hg_project.cmdTagsForRepository()
         self.endResetModel()
 
@@ -317,8 +325,7 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
         return node.rev
 
     def dateStringForRow( self, row ):
-        node = self.all_commit_nodes[ row ]
-        return self.app.formatDatetime( node.date )
+        return self.date_strings.dateString( row )
 
     def rowCount( self, parent ):
         return len( self.all_commit_nodes )
@@ -355,7 +362,7 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
                 return node.author
 
             elif col == self.col_date:
-                return self.app.formatDatetime( node.date )
+                return self.date_strings.dateString( index.row() )
 
             elif col == self.col_tag:
                 return self.all_tags_by_rev.get( node.rev, '' )
@@ -13,7 +13,6 @@
 
 '''
 import pathlib
-import hglib
 
 from PyQt5 import QtWidgets
 
@@ -52,6 +51,7 @@ class HgPreferencesTab(wb_dialog_bases.WbTabBase):
 
         else:
             # show the default
+            import hglib
             self.hg_program.setText( hglib.HGPATH )
 
         self.browse_program = QtWidgets.QPushButton( T_('Browse...') )
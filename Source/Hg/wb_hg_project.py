@@ -13,10 +13,12 @@
 from typing import List
 import pathlib
 import sys
+import datetime
 import pytz
 
 import wb_background_thread
 import wb_annotate_node
+import wb_folder_crawler
 
 import hglib
 import hglib.util
@@ -88,6 +90,9 @@ class HgProject:
     def scmType( self ):
         return 'hg'
 
+    def closeProject( self ):
+        pass
+
     def switchToBranch( self, branch ):
         pass
 
@@ -129,7 +134,7 @@ class HgProject:
     def numModifiedFiles( self ):
         return self.__num_modified_files
 
-    def updateState( self, tree_leaf ):
+    def updateState( self, tree_leaf, all_dirty_paths=None ):
         # rebuild the tree
         self.tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
         self.flat_tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
@@ -152,28 +157,14 @@ class HgProject:
     def __calculateStatus( self ):
         self.all_file_state = {}
 
-        repo_root = self.projectPath()
-
-        hg_dir = repo_root / '.hg'
-
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
-
-            for filename in folder.iterdir():
-                abs_path = folder / filename
-
-                repo_relative = abs_path.relative_to( repo_root )
-
-                if abs_path.is_dir():
-                    if abs_path != hg_dir:
-                        all_folders.add( abs_path )
+        all_listings = wb_folder_crawler.crawlFolders( self.projectPath(), '.hg' )
+        for folder, (mtime, all_entries) in all_listings.items():
+            for name, is_dir in all_entries.items():
+                repo_relative = folder / name
 
-                        self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
-
-                else:
-                    self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
+                self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
+                if is_dir:
+                    self.all_file_state[ repo_relative ].setIsDir()
 
         for nodeid, permission, executable, symlink, filepath in self.repo().manifest():
             filepath = self.pathForWb( filepath )
@@ -197,20 +188,20 @@ class HgProject:
                 self.__num_modified_files += 1
 
     def __updateTree( self, path ):
-        self.debugLogTree( '__updateTree path %r' % (path,) )
+        self.debugLogTree( '__updateTree path %r', path )
         node = self.tree
 
-        self.debugLogTree( '__updateTree path.parts %r' % (path.parts,) )
+        self.debugLogTree( '__updateTree path.parts %r', path.parts )
 
         for index, name in enumerate( path.parts[0:-1] ):
-            self.debugLogTree( '__updateTree name %r at node %r' % (name,node) )
+            self.debugLogTree( '__updateTree name %r at node %r', name, node )
 
             if not node.hasFolder( name ):
                 node.addFolder( name, HgProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
 
             node = node.getFolder( name )
 
-        self.debugLogTree( '__updateTree addFile %r to node %r' % (path, node) )
+        self.debugLogTree( '__updateTree addFile %r to node %r', path, node )
         node.addFileByName( path )
         self.flat_tree.addFileByPath( path )
 
@@ -305,9 +296,15 @@ class HgProject:
     def cmdAdd( self, filename ):
         self.repo().add( self.pathForHg( filename ) )
 
+    def cmdAddFiles( self, all_filenames ):
+        self.repo().add( [self.pathForHg( filename ) for filename in all_filenames] )
+
     def cmdRevert( self, filename ):
         self.repo().revert( self.pathForHg( filename ) )
 
+    def cmdRevertFiles( self, all_filenames ):
+        self.repo().revert( [self.pathForHg( filename ) for filename in all_filenames] )
+
     def cmdDelete( self, filename ):
         self.repo().delete( self.pathForHg( filename ) )
 
@@ -340,12 +337,25 @@ class HgProject:
 
         return all_annotate_nodes
 
+    # the annotation of a file only changes when a commit changes the file
+    # so the node of the last commit that changed it identifies the annotation
+    def cmdAnnotationIdentityForFile( self, filename ):
+        all_logs = self.repo().log( revrange=b'reverse(::.)', files=[self.pathForHg( filename )], limit=1 )
+        if len(all_logs) == 0:
+            return None
+
+        return all_logs[0].node.decode( 'utf-8' )
+
     def cmdCommitLogForAnnotateFile( self, filename, all_revs ):
-        all_commit_logs = {}
+        # annotate pads the revs with spaces so find the rev to use as the key
+        all_revs_by_number = dict( [(int( rev ), rev) for rev in all_revs] )
+        if len(all_revs_by_number) == 0:
+            return {}
 
-        for rev in all_revs:
-            data = self.repo().log( rev )[0]
-            all_commit_logs[ rev ] = WbHgLogBasic( data, self.repo() )
+        # one hg log for all the revs
+        all_commit_logs = {}
+        for data in self.repo().log( revrange=[b'%d' % (rev_num,) for rev_num in sorted( all_revs_by_number )] ):
+            all_commit_logs[ all_revs_by_number[ int( data.rev ) ] ] = WbHgLogBasic( data, self.repo() )
 
         return all_commit_logs
 
@@ -362,9 +372,7 @@ class HgProject:
         else:
             date = None
 
-        all_logs = [WbHgLogFull( data, self.repo() ) for data in self.repo().log( limit=limit, date=date )]
-
-        return all_logs
+        return self.__logFull( [], limit, date )
 
     def cmdCommitLogForFile( self, filename, limit=None, since=None, until=None ):
         if since is not None and until is not None:
@@ -379,8 +387,30 @@ class HgProject:
         else:
             date = None
 
-        all_logs = [WbHgLogFull( data, self.repo() )
-                    for data in self.repo().log( files=[self.pathForHg( filename )], limit=limit, date=date )]
+        return self.__logFull( [self.pathForHg( filename )], limit, date )
+
+    # hg log with the fields of hglib.templates.changeset followed by the
+    # files modified, added and removed, one per line, compared to the first parent
+    log_full_template = (b'{rev}\\0{node}\\0{tags}\\0{branch}\\0{author}\\0{desc}\\0{date}\\0'
+                         b'{join(file_mods, "\\n")}\\0{join(file_adds, "\\n")}\\0{join(file_dels, "\\n")}\\0')
+
+    # one hg log finds the commits and the files that each commit changed
+    def __logFull( self, all_files, limit, date ):
+        args = hglib.util.cmdbuilder( b'log', template=self.log_full_template, d=date, l=limit, *all_files )
+        all_fields = self.repo().rawcommand( args ).split( b'\0' )[:-1]
+
+        all_logs = []
+        for fields in hglib.util.grouper( 10, all_fields ):
+            # same as hglib truncate the timezone and convert to a local datetime
+            posixtime = float( fields[6].split( b'.', 1 )[0] )
+            data = hglib.client.revision( *fields[:6], datetime.datetime.fromtimestamp( posixtime ) )
+
+            all_changed_files = []
+            for state, all_paths in zip( ('M', 'A', 'R'), fields[7:] ):
+                if all_paths != b'':
+                    all_changed_files.extend( [(state, path.decode('utf-8')) for path in all_paths.split( b'\n' )] )
+
+            all_logs.append( WbHgLogFull( data, all_changed_files ) )
 
         return all_logs
 
@@ -587,15 +617,11 @@ class WbHgLogBasic:
         return '%d:%s' % (self.rev, self.node)
 
 class WbHgLogFull(WbHgLogBasic):
-    def __init__( self, data, repo ):
-        super().__init__( data, repo )
-
-        if self.rev == 0:
-            rev= '0'
-        else:
-            rev = '%d:%d' % (self.rev-1, self.rev)
+    def __init__( self, data, all_changed_files ):
+        super().__init__( data, None )
 
-        self.all_changed_files = [(state.decode('utf-8'), path.decode('utf-8')) for state, path in repo.status( rev=rev )]
+        # list of (state, path)
+        self.all_changed_files = all_changed_files
 
 class WbHgFileState:
     def __init__( self, project : HgProject, filepath : 'pathlib.Path' ) -> None:
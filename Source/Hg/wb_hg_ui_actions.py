@@ -16,6 +16,7 @@ import pathlib
 import wb_log_history_options_dialog
 import wb_ui_actions
 import wb_common_dialogs
+import wb_annotate_cache
 
 import wb_hg_commit_dialog
 import wb_hg_project
@@ -352,11 +353,11 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
     # ------------------------------------------------------------
     @thread_switcher
     def tableActionHgAdd_Bg( self, checked=None ):
-        yield from self.__tableActionChangeRepo_Bg( self.__actionHgAdd )
+        yield from self.__tableActionChangeRepoAll_Bg( self.__actionHgAddAll )
 
     @thread_switcher
     def tableActionHgRevert_Bg( self, checked=None ):
-        yield from self.__tableActionChangeRepo_Bg( self.__actionHgRevert, self.__areYouSureRevert )
+        yield from self.__tableActionChangeRepoAll_Bg( self.__actionHgRevertAll, self.__areYouSureRevert )
 
     @thread_switcher
     def tableActionHgDelete_Bg( self, checked=None ):
@@ -370,11 +371,20 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
         self.debugLog( 'tableActionHgDiffHeadVsWorking()' )
         self.table_view.tableActionViewRepo( self.__actionHgDiffHeadVsWorking )
 
-    def __actionHgAdd( self, hg_project, filename ):
-        hg_project.cmdAdd( filename )
+    # hg acts on every file it can and reports the others as an error
+    def __actionHgAddAll( self, hg_project, all_filenames ):
+        try:
+            hg_project.cmdAddFiles( all_filenames )
+
+        except wb_hg_project.HgCommandError as e:
+            self.__logHgCommandError( e )
 
-    def __actionHgRevert( self, hg_project, filename ):
-        hg_project.cmdRevert( filename )
+    def __actionHgRevertAll( self, hg_project, all_filenames ):
+        try:
+            hg_project.cmdRevertFiles( all_filenames )
+
+        except wb_hg_project.HgCommandError as e:
+            self.__logHgCommandError( e )
 
     def __actionHgDelete( self, hg_project, filename ):
         file_state = hg_project.getFileState( filename )
@@ -422,6 +432,15 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function, finalise )
 
+    @thread_switcher
+    def __tableActionChangeRepoAll_Bg( self, execute_all_function, are_you_sure_function=None ):
+        @thread_switcher
+        def finalise( hg_project ):
+            # take account of the change
+            yield from self.top_window.updateTableView_Bg()
+
+        yield from self.table_view.tableActionViewRepoAll_Bg( execute_all_function, are_you_sure_function, finalise )
+
     # ------------------------------------------------------------
     def selectedHgProjectTreeNode( self ):
         if not self.main_window.isScmTypeActive( 'hg' ):
@@ -464,22 +483,32 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield self.switchToBackground
 
-        # when we know that exception can be raised catch it...
-        all_annotation_nodes = hg_project.cmdAnnotationForFile( filename )
+        annotate_cache = wb_annotate_cache.WbAnnotateCache( self.app, 'hg', hg_project.projectPath() )
+        annotation_identity = hg_project.cmdAnnotationIdentityForFile( filename )
+        cached_annotation = annotate_cache.load( filename, annotation_identity )
 
-        all_annotate_revs = set()
-        for node in all_annotation_nodes:
-            all_annotate_revs.add( node.log_id )
+        if cached_annotation is not None:
+            all_annotation_nodes, all_commit_logs = cached_annotation
 
-        yield self.switchToForeground
+        else:
+            # when we know that exception can be raised catch it...
+            all_annotation_nodes = hg_project.cmdAnnotationForFile( filename )
 
-        self.progress.end()
-        self.progress.start( T_('Annotate Commit Logs %(count)d'), 0 )
+            all_annotate_revs = set()
+            for node in all_annotation_nodes:
+                all_annotate_revs.add( node.log_id )
 
-        yield self.switchToBackground
+            yield self.switchToForeground
+
+            self.progress.end()
+            self.progress.start( T_('Annotate Commit Logs %(count)d'), 0 )
+
+            yield self.switchToBackground
+
+            # when we know that exception can be raised catch it...
+            all_commit_logs = hg_project.cmdCommitLogForAnnotateFile( filename, all_annotate_revs )
 
-        # when we know that exception can be raised catch it...
-        all_commit_logs = hg_project.cmdCommitLogForAnnotateFile( filename, all_annotate_revs )
+            annotate_cache.save( filename, annotation_identity, all_annotation_nodes, all_commit_logs )
 
         yield self.switchToForeground
 
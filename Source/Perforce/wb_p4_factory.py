@@ -10,9 +10,6 @@
     wb_p4_factory.py
 
 '''
-import wb_p4_ui_components
-import wb_p4_ui_actions
-import wb_p4_log_history_view
 import wb_p4_preferences
 
 import wb_scm_project_dialogs
@@ -44,9 +41,11 @@ class WbP4Factory(wb_scm_factory_abc.WbScmFactoryABC):
         pass
 
     def uiComponents( self ):
+        import wb_p4_ui_components
         return wb_p4_ui_components.P4MainWindowComponents( self )
 
     def uiActions( self ):
+        import wb_p4_ui_actions
         return wb_p4_ui_actions.P4MainWindowActions( self )
 
     def projectSettingsDialog( self, app, main_window, prefs_project, scm_project ):
@@ -65,6 +64,7 @@ class WbP4Factory(wb_scm_factory_abc.WbScmFactoryABC):
         return []
 
     def logHistoryView( self, app, title ):
+        import wb_p4_log_history_view
         return wb_p4_log_history_view.WbP4LogHistoryView( app, title )
 
     def setupPreferences( self, scheme_nodes ):
@@ -15,11 +15,13 @@ from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
+import wb_date
 import wb_tracked_qwidget
 import wb_main_window
 import wb_ui_components
 import wb_table_view
 
+import wb_background_thread
 from wb_background_thread import thread_switcher
 
 def U_( s: str ) -> str:
@@ -65,15 +67,16 @@ class P4LogHistoryWindowComponents(wb_ui_components.WbMainWindowComponents):
         return self.changed_files_context_menu
 
     def deferedLogHistoryProgress( self ):
-        return self.app.deferRunInForeground( self.__logHistoryProgress )
+        return self.__logHistoryProgress
 
+    # called on the background thread for each commit
     def __logHistoryProgress( self, count, total ):
         if total > 0:
             if count == 0:
-                self.progress.start( '%(count)s of %(total)d commits loaded. %(percent)d%%', total )
+                self.app.runInForegroundBatched( self.progress.start, ('%(count)s of %(total)d commits loaded. %(percent)d%%', total) )
 
             else:
-                self.progress.incEventCount()
+                self.app.countInForeground( self.progress.incEventCount )
 
 
 class WbP4LogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrackedModeless):
@@ -207,7 +210,8 @@ class WbP4LogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.filename = None
         self.p4_project = p4_project
 
-        yield self.app.switchToBackground
+        # let other projects and interactive work run while the log loads
+        yield self.app.switchToBackgroundLane( wb_background_thread.projectLane( p4_project ), wb_background_thread.PRIORITY_BULK )
 
         self.log_model.loadChangeLogForFolder( self.ui_component.deferedLogHistoryProgress(), p4_project, folder, options.getLimit(), options.getSince(), options.getUntil() )
 
@@ -224,7 +228,8 @@ class WbP4LogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.filename = filename
         self.p4_project = p4_project
 
-        yield self.app.switchToBackground
+        # let other projects and interactive work run while the log loads
+        yield self.app.switchToBackgroundLane( wb_background_thread.projectLane( p4_project ), wb_background_thread.PRIORITY_BULK )
 
         self.log_model.loadChangeLogForFile( self.ui_component.deferedLogHistoryProgress(), p4_project, filename, options.getLimit(), options.getSince(), options.getUntil() )
 
@@ -314,6 +319,7 @@ class WbP4LogHistoryModel(QtCore.QAbstractTableModel):
         super().__init__()
 
         self.all_change_nodes  = []
+        self.date_strings = wb_date.WbTableDateStrings( self.app.formatDatetime, lambda row: self.all_change_nodes[ row ].date )
         self.all_tags_by_change = {}
 
         self.__brush_is_tag = QtGui.QBrush( QtGui.QColor( 0, 0, 255 ) )
@@ -321,12 +327,14 @@ class WbP4LogHistoryModel(QtCore.QAbstractTableModel):
     def loadChangeLogForFolder( self, progress_callback, p4_project, folder, limit, since, until ):
         self.beginResetModel()
         self.all_change_nodes = p4_project.cmdChangeLogForFolder( folder, limit, since, until )
+        self.date_strings.clear()
         self.all_tags_by_rev = p4_project.cmdTagsForRepository()
         self.endResetModel()
 
     def loadChangeLogForFile( self, progress_callback, p4_project, filename, limit, since, until ):
         self.beginResetModel()
         self.all_change_nodes = p4_project.cmdChangeLogForFile( filename, limit, since, until )
+        self.date_strings.clear()
         self.all_tags_by_change = p4_project.cmdTagsForRepository()
         self.endResetModel()
 
@@ -335,8 +343,7 @@ class WbP4LogHistoryModel(QtCore.QAbstractTableModel):
         return node.change
 
     def dateStringForRow( self, row ):
-        node = self.all_change_nodes[ row ]
-        return self.app.formatDatetime( node.date )
+        return self.date_strings.dateString( row )
 
     def rowCount( self, parent ):
         return len( self.all_change_nodes )
@@ -373,7 +380,7 @@ class WbP4LogHistoryModel(QtCore.QAbstractTableModel):
                 return node.author
 
             elif col == self.col_date:
-                return self.app.formatDatetime( node.date )
+                return self.date_strings.dateString( index.row() )
 
             elif col == self.col_tag:
                 return self.all_tags_by_change.get( node.change, '' )
@@ -148,6 +148,9 @@ class P4Project:
     def scmType( self ):
         return 'p4'
 
+    def closeProject( self ):
+        pass
+
     def switchToBranch( self, branch ):
         pass
 
@@ -183,7 +186,7 @@ class P4Project:
     def numModifiedFiles( self ):
         return self.__num_modified_files
 
-    def updateState( self, tree_leaf ):
+    def updateState( self, tree_leaf, all_dirty_paths=None ):
         self.debugLog( '-'*80 )
         self.debugLog( 'updateState( %r ) repo=%s' % (tree_leaf, self.projectPath()) )
 
@@ -209,9 +212,9 @@ class P4Project:
 
     def updateTreeNodeState( self, tree_node ):
         # incrementally update the file state
-        self.debugLogTree( 'updateTreeNodeState( %r )' % (tree_node,) )
+        self.debugLogTree( 'updateTreeNodeState( %r )', tree_node )
 
-        self.__calculateFolderStatus( tree_node.absolutePath() )
+        self.__calculateFoldersStatus( [tree_node.absolutePath()] )
 
         for path, file_state in self.all_file_state.items():
             self.__updateTree( path, file_state )
@@ -231,38 +234,39 @@ class P4Project:
 
         self.debugLogTree( '__calculateStatus() all_folders %r' % (all_folders,) )
 
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
-            self.debugLogTree( '__calculateStatus() folder %s' % (folder,) )
+        self.__calculateFoldersStatus( sorted( all_folders ) )
 
-            self.__calculateFolderStatus( folder )
-
-    def __calculateFolderStatus( self, folder ):
-        self.debugLogTree( '__calculateFolderStatus( %s )' % (folder,) )
+    def __calculateFoldersStatus( self, all_folders ):
+        self.debugLogTree( '__calculateFoldersStatus( %r )' % (all_folders,) )
         repo_root = self.projectPath()
 
-        # files all the files in the folder
-        for filename in folder.iterdir():
-            abs_path = folder / filename
-            self.debugLogTree( '__calculateFolderStatus() abs_path %s' % (abs_path,) )
+        for folder in all_folders:
+            # files all the files in the folder
+            for filename in folder.iterdir():
+                abs_path = folder / filename
+                self.debugLogTree( '__calculateFoldersStatus() abs_path %s' % (abs_path,) )
 
-            repo_relative = abs_path.relative_to( repo_root )
+                repo_relative = abs_path.relative_to( repo_root )
 
-            if abs_path.is_dir():
-                self.all_file_state[ repo_relative ] = WbP4FileState( self, repo_relative )
-                self.all_file_state[ repo_relative ].setIsDir()
+                if abs_path.is_dir():
+                    self.all_file_state[ repo_relative ] = WbP4FileState( self, repo_relative )
+                    self.all_file_state[ repo_relative ].setIsDir()
 
 
-            else:
-                if repo_relative not in self.all_file_state:
-                    self.all_file_state[ repo_relative ] = WbP4FileState( self, repo_relative )
+                else:
+                    if repo_relative not in self.all_file_state:
+                        self.all_file_state[ repo_relative ] = WbP4FileState( self, repo_relative )
 
-        # get the p4 file status for all the files in this folder
+        # get the p4 file status for all the files in all the folders
+        # with one fstat for each batch of folders
         try:
-            all_fstat = self._run( 'fstat', '-Rc', '%s/*' % (self.pathForP4( folder ),), handler=SkipEmptyWarnings( self.app.log ) )
-            # sometimes fstat returns False (??!)
-            if type(all_fstat) == bool:
-                all_fstat = []
+            all_fstat = []
+            for all_batch_folders in self.__argBatches( all_folders ):
+                all_batch_fstat = self._run( 'fstat', '-Rc', *['%s/*' % (self.pathForP4( folder ),) for folder in all_batch_folders],
+                                                handler=SkipEmptyWarnings( self.app.log ) )
+                # sometimes fstat returns False (??!)
+                if type(all_batch_fstat) != bool:
+                    all_fstat.extend( all_batch_fstat )
 
             for fstat in all_fstat:
                 # not interested in delete files
@@ -280,19 +284,53 @@ class P4Project:
 
         except P4.P4Exception as e:
             self.app.log.error( 'P4 fstat error: %s' % (e,) )
-            self.debugLogTree( '__calculateFolderStatus() fstat error %r' % (e,) )
+            self.debugLogTree( '__calculateFoldersStatus() fstat error %r' % (e,) )
+
+    # p4 commands are given at most this many files or changes
+    max_args_per_command = 500
+
+    def __argBatches( self, all_args ):
+        all_args = list( all_args )
+        for start in range( 0, len(all_args), self.max_args_per_command ):
+            yield all_args[ start:start + self.max_args_per_command ]
+
+    # return the describe -s of each change keyed by change number
+    # with one describe for each batch of changes
+    def __describeChanges( self, all_changes ):
+        all_describe = {}
+        for all_batch_changes in self.__argBatches( all_changes ):
+            for describe in self._run( 'describe', '-s', *all_batch_changes ):
+                all_describe[ int( describe['change'] ) ] = describe
+
+        return all_describe
+
+    def __changeLogFull( self, cmd ):
+        all_changes = self._run( 'changes', cmd )
+        all_describe = self.__describeChanges( [data['change'] for data in all_changes] )
+
+        all_log = []
+        for data in all_changes:
+            describe = all_describe.get( int( data['change'] ) )
+            if describe is None:
+                # fall back to the short description from p4 changes
+                self.app.log.warning( 'P4 describe did not return change %s' % (data['change'],) )
+                describe = data
+
+            all_log.append( WbP4LogFull( data, describe ) )
+
+        return all_log
 
     def __updateTree( self, path, file_state ):
-        self.debugLogTree( '__updateTree( %r, %r )' % (path, file_state) )
+        self.debugLogTree( '__updateTree( %r, %r )', path, file_state )
         node = self.tree
 
-        self.debugLogTree( '__updateTree path.parts %r' % (path.parts,) )
+        self.debugLogTree( '__updateTree path.parts %r', path.parts )
 
         for index, name in enumerate( path.parts[0:-1] ):
-            self.debugLogTree( '__updateTree name %r at node %r' % (name, node) )
+            self.debugLogTree( '__updateTree name %r at node %r', name, node )
 
             if not node.hasFolder( name ):
-                self.debugLogTree( '__updateTree addFolder 1 %r to node %r' % (name, node) )
+                self.debugLogTree( '__updateTree addFolder 1 %r to node %r', name, node )
                 node.addFolder( name, P4ProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
 
             node = node.getFolder( name )
@@ -300,10 +338,10 @@ class P4Project:
         if file_state.isDir():
             name = file_state.relativePath().name
             if not node.hasFolder( name ):
-                self.debugLogTree( '__updateTree addFolder 2 %r to node %r' % (name, node) )
+                self.debugLogTree( '__updateTree addFolder 2 %r to node %r', name, node )
                 node.addFolder( name, P4ProjectTreeNode( self, name, file_state.relativePath() ) )
 
-        self.debugLogTree( '__updateTree addFile %r to node %r' % (path, node) )
+        self.debugLogTree( '__updateTree addFile %r to node %r', path, node )
         node.addFileByName( path )
         self.flat_tree.addFileByPath( path )
 
@@ -448,7 +486,7 @@ class P4Project:
         self._run( 'edit', self.pathForP4( filename ) )
 
     def cmdAdd( self, filename ):
-        self_run( 'add', self.pathForP4( filename ) )
+        self._run( 'add', self.pathForP4( filename ) )
 
     def cmdRevert( self, filename ):
         self._run( 'revert', self.pathForP4( filename ) )
@@ -515,10 +553,22 @@ class P4Project:
 
         return all_annotate_nodes
 
+    # the annotation of a file only changes when a change submits the file
+    # so the depot file and its head change identify the annotation
+    def cmdAnnotationIdentityForFile( self, filename, rev=None ):
+        if rev is None:
+            rev = '#head'
+
+        all_fstat = self._run( 'fstat', self.pathForP4( filename ) + rev, handler=SkipEmptyWarnings( self.app.log ) )
+        if len(all_fstat) == 0 or 'headChange' not in all_fstat[0]:
+            return None
+
+        return '%s@%s' % (all_fstat[0]['depotFile'], all_fstat[0]['headChange'])
+
     def cmdChangeLogForAnnotateFile( self, filename, all_revs ):
         all_change_logs = {}
 
-        for desc in self._run( 'describe', '-s', *all_revs ):
+        for desc in self.__describeChanges( all_revs ).values():
             all_change_logs[ desc['change'] ] = WbP4LogBasic( desc, self.repo() )
 
         return all_change_logs
@@ -536,9 +586,7 @@ class P4Project:
             cmd = ['%s/...' % (folder,)]
 
         try:
-            all_logs = [WbP4LogFull( data, self.repo() )
-                            for data in self._run( 'changes', cmd )]
-            return all_logs
+            return self.__changeLogFull( cmd )
 
         except P4.P4Exception as e:
             self.app.log.error( 'p4 changes for %s failed: %r' % (folder, e) )
@@ -557,10 +605,7 @@ class P4Project:
             cmd = [self.pathForP4( filename )]
 
         try:
-            all_logs = [WbP4LogFull( data, self.repo() )
-                            for data in self._run( 'changes', cmd )]
-
-            return all_logs
+            return self.__changeLogFull( cmd )
 
         except P4.P4Exception as e:
             self.app.log.error( 'p4 changes for %s failed: %r' % (filename, e) )
@@ -621,10 +666,25 @@ class P4Project:
 
     def cmdOpenedFiles( self ):
         all_opened_files = self._run( 'opened' )
+
+        # one fstat for each batch of opened files
+        all_client_files = {}
+        for all_batch_files in self.__argBatches( [ofile[ 'depotFile' ] for ofile in all_opened_files] ):
+            for fstat in self._run( 'fstat', *all_batch_files ):
+                if 'clientFile' in fstat:
+                    all_client_files[ fstat[ 'depotFile' ] ] = fstat[ 'clientFile' ]
+
+        all_opened_client_files = []
         for ofile in all_opened_files:
-            fstat = self._run( 'fstat', ofile[ 'depotFile' ] )[0]
-            ofile[ 'clientFile' ] = fstat[ 'clientFile' ]
-        return all_opened_files
+            client_file = all_client_files.get( ofile[ 'depotFile' ] )
+            if client_file is None:
+                self.app.log.warning( 'P4 fstat did not return the client file of %s' % (ofile[ 'depotFile' ],) )
+                continue
+
+            ofile[ 'clientFile' ] = client_file
+            all_opened_client_files.append( ofile )
+
+        return all_opened_client_files
 
     def cmdChangesPending( self ):
         cmd = ['-u', os.getlogin(), '-s', 'pending', '-c', self.getClientName()]
@@ -660,13 +720,13 @@ class WbP4LogBasic:
         return '%d' % (self.change,)
 
 class WbP4LogFull(WbP4LogBasic):
-    def __init__( self, data, repo ):
-        super().__init__( data, repo )
+    def __init__( self, data, describe ):
+        super().__init__( data, None )
 
-        data = repo.run_describe( '-s', self.change )[0]
-        self.message = data['desc']
+        # describe is the describe -s of the change
+        self.message = describe['desc']
         # could add in 'type', 'rev' and 'fileSize'
-        self.all_changed_files = list( zip( data['action'], data['depotFile'] ) )
+        self.all_changed_files = list( zip( describe.get( 'action', [] ), describe.get( 'depotFile', [] ) ) )
 
 class WbP4FileState:
     map_p4_action_to_state = {
@@ -677,7 +737,7 @@ class WbP4FileState:
         }
 
     def __init__( self, project : P4Project, filepath : 'pathlib.Path' ) -> None:
-        project.debugLog('WbP4FileState.__init__( %r )' % (filepath,) )
+        project.debugLog( 'WbP4FileState.__init__( %r )', filepath )
         self.__project = project
         self.__filepath = filepath
         self.__fstat = {}
@@ -702,11 +762,11 @@ class WbP4FileState:
         return self.__is_dir
 
     def setFStat( self, fstat ) -> None:
-        self.__project.debugLog('WbP4FileState.setFStat() %r: fstat: %r' % (self.__filepath, fstat) )
+        self.__project.debugLog( 'WbP4FileState.setFStat() %r: fstat: %r', self.__filepath, fstat )
         self.__fstat = fstat
         self.__is_ignored = False
         self.__state = self.map_p4_action_to_state.get( self.__fstat.get( 'action', '' ), '?' )
-        self.__project.debugLog('WbP4FileState.setFStat() isControlled %r state %r' % (self.isControlled(), self.__state) )
+        self.__project.debugLog( 'WbP4FileState.setFStat() isControlled %r state %r', self.isControlled(), self.__state )
 
     def setState( self, state : str ):
         self.__state = state
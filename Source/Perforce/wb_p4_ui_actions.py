@@ -17,6 +17,7 @@ import pathlib
 import wb_log_history_options_dialog
 import wb_ui_actions
 import wb_common_dialogs
+import wb_annotate_cache
 
 import wb_p4_change_dialog
 import wb_p4_project
@@ -464,22 +465,32 @@ class P4MainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield self.switchToBackground
 
-        # when we know that exception can be raised catch it...
-        all_annotation_nodes = p4_project.cmdAnnotationForFile( filename )
+        annotate_cache = wb_annotate_cache.WbAnnotateCache( self.app, 'p4', p4_project.projectPath() )
+        annotation_identity = p4_project.cmdAnnotationIdentityForFile( filename )
+        cached_annotation = annotate_cache.load( filename, annotation_identity )
 
-        all_annotate_revs = set()
-        for node in all_annotation_nodes:
-            all_annotate_revs.add( node.log_id )
+        if cached_annotation is not None:
+            all_annotation_nodes, all_change_logs = cached_annotation
 
-        yield self.switchToForeground
+        else:
+            # when we know that exception can be raised catch it...
+            all_annotation_nodes = p4_project.cmdAnnotationForFile( filename )
 
-        self.progress.end()
-        self.progress.start( T_('Annotate Change Logs %(count)d'), 0 )
+            all_annotate_revs = set()
+            for node in all_annotation_nodes:
+                all_annotate_revs.add( node.log_id )
 
-        yield self.switchToBackground
+            yield self.switchToForeground
+
+            self.progress.end()
+            self.progress.start( T_('Annotate Change Logs %(count)d'), 0 )
+
+            yield self.switchToBackground
+
+            # when we know that exception can be raised catch it...
+            all_change_logs = p4_project.cmdChangeLogForAnnotateFile( filename, all_annotate_revs )
 
-        # when we know that exception can be raised catch it...
-        all_change_logs = p4_project.cmdChangeLogForAnnotateFile( filename, all_annotate_revs )
+            annotate_cache.save( filename, annotation_identity, all_annotation_nodes, all_change_logs )
 
         yield self.switchToForeground
 
@@ -34,6 +34,7 @@ if getattr( typing, 'TYPE_CHECKING', False ):
 class WbScmApp(wb_app.WbApp):
     def __init__( self, args:List[str] ) -> None:
         self.__all_singletons = {}  # type: dict[str, None]
+        self.__date_formatter = wb_date.WbDateFormatter( '%Y-%m-%d %H:%M:%S' )
 
         all_factories, all_messages = wb_scm_factories.allScmFactories()
         # convert to a dict
@@ -55,9 +56,7 @@ class WbScmApp(wb_app.WbApp):
             self.log.info( msg )
 
     def formatDatetime( self, datetime_or_timestamp:Union[float, 'datetime.datetime'] ) -> str:
-        dt = wb_date.localDatetime( datetime_or_timestamp )
-
-        return dt.strftime( '%Y-%m-%d %H:%M:%S' )
+        return self.__date_formatter.format( datetime_or_timestamp )
 
     def getAppQIcon( self ):
         return self.getQIcon( 'wb.png' )
@@ -149,6 +148,6 @@ class WbScmApp(wb_app.WbApp):
     def createMainWindow( self ):
         self.setAppStyles()
 
-        self.top_window = wb_scm_main_window.WbScmMainWindow( self, self.all_factories )
+        self.top_window = wb_scm_main_window.WbScmMainWindow( self )
 
         return self.top_window
@@ -0,0 +1,205 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_scm_change_watcher.py
+
+    watch the selected project for changes so that
+    a refresh is only done when something has changed
+
+'''
+import os
+import pathlib
+import time
+
+from PyQt5 import QtCore
+
+# scm types that keep all their working copy state on the local disk
+# other scm types, like p4, can change state on the server
+all_local_state_scm_types = ('git', 'hg', 'svn')
+
+# the folders that the scm updates when its state changes
+all_scm_metadata_folders = ('.git', '.hg', '.svn')
+
+class WbScmChangeWatcher(QtCore.QObject):
+    debounce_interval = 300     # mS
+    # each watch uses OS resources so larger projects are not watched
+    max_watched_paths = 10000
+
+    def __init__( self, app, refresh_handler ):
+        super().__init__()
+
+        self.app = app
+        self.debugLog = self.app.debug_options.debugLogChangeWatcher
+
+        self.refresh_handler = refresh_handler
+
+        self.watcher = QtCore.QFileSystemWatcher()
+        self.watcher.directoryChanged.connect( self.__pathChanged )
+        self.watcher.fileChanged.connect( self.__pathChanged )
+
+        # coalesce a burst of changes, like a checkout, into one refresh
+        self.timer_debounce = QtCore.QTimer()
+        self.timer_debounce.timeout.connect( self.__debounceTimeout )
+        self.timer_debounce.setSingleShot( True )
+        self.timer_debounce.setInterval( self.debounce_interval )
+
+        self.__project_path = None
+        self.__is_complete = False
+        self.__all_metadata_folders = set()
+        self.__all_dirty_paths = set()
+
+        self.__refresh_running = False
+        self.__refresh_start_time = None
+
+    def needsRefresh( self ):
+        # if some changes cannot be seen always refresh
+        if not self.__is_complete:
+            return True
+
+        return len(self.__all_dirty_paths) > 0
+
+    # called as the refresh of scm_project starts.
+    # returns the paths, relative to the project, that have changed since
+    # the last refresh or None if changes may have been missed or the scm
+    # metadata has changed, which needs all of the project refreshed
+    def refreshStarted( self, scm_project ):
+        all_dirty_paths = self.__relativeDirtyPaths( scm_project )
+
+        # changes from now on need another refresh
+        self.__all_dirty_paths = set()
+        self.__refresh_running = True
+        self.__refresh_start_time = time.time_ns()
+        self.timer_debounce.stop()
+
+        return all_dirty_paths
+
+    def __relativeDirtyPaths( self, scm_project ):
+        if( not self.__is_complete
+        or scm_project is None
+        or scm_project.projectPath() != self.__project_path ):
+            return None
+
+        all_dirty_paths = set()
+        for path in self.__all_dirty_paths:
+            if path in self.__all_metadata_folders:
+                return None
+
+            all_dirty_paths.add( pathlib.Path( path ).relative_to( self.__project_path ) )
+
+        return all_dirty_paths
+
+    def refreshFinished( self ):
+        self.__refresh_running = False
+
+    def watchProject( self, scm_project ):
+        if scm_project is None:
+            self.__setWatchedPaths( None, set() )
+            return
+
+        project_path = scm_project.projectPath()
+
+        # files modified before this are shown as they are
+        if self.__refresh_start_time is None:
+            self.__refresh_start_time = time.time_ns()
+
+        all_metadata_folders = set()
+        for name in all_scm_metadata_folders:
+            metadata_folder = project_path / name
+            if metadata_folder.is_dir():
+                all_metadata_folders.add( str( metadata_folder ) )
+
+        self.__all_metadata_folders = all_metadata_folders
+
+        # a folder watch only sees files being added, removed or renamed.
+        # Changes inside a file are only seen by watching the file so
+        # every folder and file has to be watched to see all changes
+        all_folders = set( [str( project_path )] )
+        all_files = set()
+        if( scm_project.scmType() not in all_local_state_scm_types
+        or not self.__addTreePaths( all_folders, all_files, scm_project.tree ) ):
+            self.debugLog( 'cannot watch all the paths of %s' % (project_path,) )
+            self.__setWatchedPaths( project_path, set() )
+            self.__is_complete = False
+            return
+
+        # files changed before being watched
+        self.__checkFilesModifiedSinceRefresh( all_files - set( self.watcher.files() ) )
+
+        self.__setWatchedPaths( project_path, all_folders | all_files | all_metadata_folders )
+
+    # returns False if there are too many paths to watch
+    def __addTreePaths( self, all_folders, all_files, tree_node ):
+        folder = tree_node.absolutePath()
+        for name in tree_node.getAllFileNames():
+            all_files.add( str( folder / name ) )
+
+        for folder_node in tree_node.getAllFolderNodes():
+            all_folders.add( str( folder_node.absolutePath() ) )
+
+            if len(all_folders) + len(all_files) > self.max_watched_paths:
+                return False
+
+            if not self.__addTreePaths( all_folders, all_files, folder_node ):
+                return False
+
+        return len(all_folders) + len(all_files) <= self.max_watched_paths
+
+    def __checkFilesModifiedSinceRefresh( self, all_files ):
+        for filename in all_files:
+            try:
+                if os.stat( filename ).st_mtime_ns >= self.__refresh_start_time:
+                    self.__pathChanged( filename )
+
+            except OSError:
+                pass
+
+    def __setWatchedPaths( self, project_path, all_paths ):
+        if project_path != self.__project_path:
+            self.debugLog( 'watching project %s' % (project_path,) )
+            self.__project_path = project_path
+            self.__all_dirty_paths = set()
+
+        all_old_paths = set( self.watcher.directories() ) | set( self.watcher.files() )
+
+        all_remove_paths = all_old_paths - all_paths
+        if len(all_remove_paths) > 0:
+            self.watcher.removePaths( list( all_remove_paths ) )
+
+        self.__is_complete = True
+
+        all_add_paths = all_paths - all_old_paths
+        if len(all_add_paths) > 0:
+            # can fail if the OS limit on the number of watches is reached
+            all_failed_paths = self.watcher.addPaths( list( all_add_paths ) )
+            if len(all_failed_paths) > 0:
+                self.debugLog( 'failed to watch %d of %d paths' % (len(all_failed_paths), len(all_add_paths)) )
+                self.__is_complete = False
+
+        self.debugLog( 'watching %d folders and %d files complete %r' %
+                        (len(self.watcher.directories()), len(self.watcher.files()), self.__is_complete) )
+
+    def __pathChanged( self, path ):
+        # the scm may update its metadata while finding the status
+        if self.__refresh_running and path in self.__all_metadata_folders:
+            return
+
+        self.debugLog( 'changed %s' % (path,) )
+        self.__all_dirty_paths.add( path )
+
+        # only refresh now if the user can see the result
+        # otherwise wait for the app to be activated
+        if self.app.applicationState() == QtCore.Qt.ApplicationActive:
+            self.timer_debounce.start()
+
+    def __debounceTimeout( self ):
+        if len(self.__all_dirty_paths) == 0:
+            return
+
+        self.debugLog( 'refresh for %d changed paths' % (len(self.__all_dirty_paths),) )
+        self.refresh_handler()
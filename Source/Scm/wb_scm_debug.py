@@ -37,3 +37,6 @@ class WbScmDebug(wb_debug.WbDebug):
 
         self.debugLogLogHistory = self.addDebugOption( 'LOG HISTORY' )
         self.debugLogAnnotate = self.addDebugOption( 'ANNOTATE' )
+        self.debugLogChangeWatcher = self.addDebugOption( 'CHANGE WATCHER' )
+        self.debugLogStatusCache = self.addDebugOption( 'STATUS CACHE' )
+        self.debugLogAnnotateCache = self.addDebugOption( 'ANNOTATE CACHE' )
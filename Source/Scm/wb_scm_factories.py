@@ -9,38 +9,35 @@
 
     wb_scm_factories.py
 
+    The factories only import the modules of their scm, and the
+    python module that talks to the scm, when they are first used.
+    Which scm are available is found without importing them.
+
 '''
+import importlib
+import importlib.util
+
+# (factory module, factory class, module the scm needs, scm name)
+all_scm_backends = (
+    ('wb_git_factory',  'WbGitFactory', 'git',      'Git'),
+    ('wb_hg_factory',   'WbHgFactory',  'hglib',    'Mercurial (hg)'),
+    ('wb_svn_factory',  'WbSvnFactory', 'pysvn',    'Subversion (svn)'),
+    ('wb_p4_factory',   'WbP4Factory',  'P4',       'Perforce (P4)'),
+    )
 
 def allScmFactories():
     all_factories = []
     all_messages = []
 
-    try:
-        import wb_git_factory
-        all_factories.append( wb_git_factory.WbGitFactory() )
-
-    except ImportError as e:
-        all_messages.append( 'Git is not available - %s' % (e,) )
-
-    try:
-        import wb_hg_factory
-        all_factories.append( wb_hg_factory.WbHgFactory() )
-
-    except ImportError as e:
-        all_messages.append( 'Mercurial (hg) is not available - %s' % (e,) )
-
-    try:
-        import wb_svn_factory
-        all_factories.append( wb_svn_factory.WbSvnFactory() )
-
-    except ImportError as e:
-        all_messages.append( 'Subversion (svn) is not available - %s' % (e,) )
+    for factory_module_name, factory_class_name, scm_module_name, scm_name in all_scm_backends:
+        try:
+            if importlib.util.find_spec( scm_module_name ) is None:
+                raise ImportError( 'No module named %r' % (scm_module_name,) )
 
-    try:
-        import wb_p4_factory
-        all_factories.append( wb_p4_factory.WbP4Factory() )
+            factory_module = importlib.import_module( factory_module_name )
+            all_factories.append( getattr( factory_module, factory_class_name )() )
 
-    except ImportError as e:
-        all_messages.append( 'Perforce (P4) is not available - %s' % (e,) )
+        except ImportError as e:
+            all_messages.append( '%s is not available - %s' % (scm_name, e) )
 
     return all_factories, all_messages
@@ -37,6 +37,8 @@ import wb_scm_tree_model
 import wb_scm_project_dialogs
 import wb_scm_progress
 import wb_scm_favorites_dialogs
+import wb_scm_change_watcher
+import wb_scm_refresh_coordinator
 
 import wb_main_window
 import wb_preferences
@@ -54,7 +56,7 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
     INIT_STATE_CONSISTENT = 1   # all self variables exist but bg thread reading project state
     INIT_STATE_COMPLETE = 2     # everything is setup
 
-    def __init__( self, app, all_scm_types ):
+    def __init__( self, app ):
         self.table_view = None
 
         self.__init_state = self.INIT_STATE_INCONSISTENT
@@ -81,26 +83,18 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self.table_view = wb_scm_table_view.WbScmTableView( self.app, self )
         self.__setupTreeViewAndModel()
 
+        # the ui components of an scm are created when the first
+        # project that uses the scm is created - see uiComponentsForScmType
         self.all_ui_components = {}
-        for scm_type in all_scm_types:
-            self.all_ui_components[ scm_type ] = self.app.getScmFactory( scm_type ).uiComponents()
-            self.all_ui_components[ scm_type ].setMainWindow( self, self.table_view )
 
         # setup the chrome
         self.__menu_favorites = None
+        self.__menu_project = None
 
         self.setupMenuBar( self.menuBar() )
         self.setupToolBar()
         self.setupStatusBar( self.statusBar() )
 
-        self.__setupTreeContextMenu()
-        self.__setupTableContextMenu()
-
-        # tell all scm ui to hide all components
-        for scm_type in self.all_ui_components:
-            self.all_ui_components[ scm_type ].setTopWindow( self )
-            self.all_ui_components[ scm_type ].hideUiComponents()
-
         geometry = win_prefs.geometry
         if geometry is not None:
             geometry = QtCore.QByteArray( geometry.encode('utf-8') )
@@ -174,6 +168,10 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self.timer_update_enable_states.timeout.connect( self.updateActionEnabledStates )
         self.timer_update_enable_states.setSingleShot( True )
 
+        # only refresh when the selected project has changed
+        self.change_watcher = wb_scm_change_watcher.WbScmChangeWatcher( self.app, self.changeWatcherRefreshHandler )
+        self.refresh_coordinator = wb_scm_refresh_coordinator.WbScmRefreshCoordinator( self.app )
+
         # all variables exist
         self.__init_state = self.INIT_STATE_CONSISTENT
 
@@ -310,13 +308,49 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
                             ,'folder': project.path} )
             return None
 
-        if project.scm_type in self.all_ui_components:
-            return self.all_ui_components[ project.scm_type ].createProject( project )
+        ui_components = self.uiComponentsForScmType( project.scm_type )
+        if ui_components is None:
+            return None
 
-        else:
-            self.app.log.error( 'Unsupported project type %r' % (project.scm_type,) )
+        return ui_components.createProject( project )
+
+    def uiComponentsForScmType( self, scm_type ):
+        if scm_type in self.all_ui_components:
+            return self.all_ui_components[ scm_type ]
+
+        if scm_type not in self.app.all_factories:
+            self.app.log.error( 'Unsupported project type %r' % (scm_type,) )
+            return None
+
+        self.debugLog( 'uiComponentsForScmType creating ui components for %r' % (scm_type,) )
+        try:
+            ui_components = self.app.getScmFactory( scm_type ).uiComponents()
+
+        except ImportError as e:
+            self.app.log.error( T_('Cannot use %(scm_type)s projects - %(error)s') %
+                                {'scm_type': scm_type, 'error': e} )
             return None
 
+        ui_components.setMainWindow( self, self.table_view )
+
+        # the menus go before the Project menu and the left tool bars
+        # before the common tool bars, the same as if they were setup with the window
+        ui_components.setupMenuBar( WbMenuBarInserter( self.menuBar(), self.__menu_project ), self._addMenu )
+        ui_components.setupToolBarAtLeft( self.__addToolBarAtLeft, self._addTool )
+        ui_components.setupToolBarAtRight( self._addToolBar, self._addTool )
+
+        self.__setupTreeContextMenu( ui_components )
+        self.__setupTableContextMenu( ui_components )
+
+        ui_components.setTopWindow( self )
+        ui_components.hideUiComponents()
+
+        self.all_ui_components[ scm_type ] = ui_components
+        return ui_components
+
+    def __addToolBarAtLeft( self, name, style=None ):
+        return self._addToolBar( name, style=style, before=self.tool_bar_tree )
+
     def __setupTreeViewAndModel( self ):
         self.debugLog( '__setupTreeViewAndModel' )
 
@@ -368,36 +402,73 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
             self.app.log.infoheader( 'Switching to branch %s' % (branch_name,) )
             scm_project.switchToBranch( branch_name )
 
-    singleton_update_table_running = False
-
     @thread_switcher
-    def updateTableView_Bg( self, folder=None ):
-        if WbScmMainWindow.singleton_update_table_running:
+    def updateTableView_Bg( self, folder=None, changed_only=False ):
+        # a refresh is already running - it will refresh again when done
+        if not self.refresh_coordinator.requestRefresh( folder, changed_only ):
             return
 
-        WbScmMainWindow.singleton_update_table_running = True
+        try:
+            while True:
+                generation = self.refresh_coordinator.generation()
 
-        self.__updateBranches()
+                # only the paths that the watcher has seen change need refreshing
+                all_dirty_paths = self.change_watcher.refreshStarted( self.table_view.selectedScmProject() )
+                if not changed_only:
+                    all_dirty_paths = None
 
-        # need to turn sort on and off to have the view sorted on an update
-        self.tree_view.setSortingEnabled( False )
+                self.__updateBranches()
 
-        # load in the latest status
-        yield from self.tree_model.refreshTree_Bg( folder )
+                # need to turn sort on and off to have the view sorted on an update
+                self.tree_view.setSortingEnabled( False )
 
-        # sort filter is now invalid
-        self.table_view.table_sortfilter.refreshFilter()
+                # load in the latest status
+                yield from self.tree_model.refreshTree_Bg( folder, all_dirty_paths )
 
-        # tall all the singletons to update
-        for singleton in self.app.getAllSingletons():
-            singleton.updateSingleton()
+                # sort filter is now invalid
+                self.table_view.table_sortfilter.refreshFilter()
 
-        self.tree_view.setSortingEnabled( True )
+                # the next refresh will update the singletons
+                if not self.refresh_coordinator.isStale( generation ):
+                    # tall all the singletons to update
+                    for singleton in self.app.getAllSingletons():
+                        singleton.updateSingleton()
+
+                self.tree_view.setSortingEnabled( True )
+
+                more, folder, changed_only = self.refresh_coordinator.nextRefresh( self.__selectedRelativePath() )
+                if not more:
+                    break
+
+        except:
+            # the refresh may have failed on a background thread
+            self.app.runInForeground( self.__refreshFailed, () )
+            raise
+
+        self.__refreshFinished()
 
         # enabled states will have changed
         self.timer_update_enable_states.start( 0 )
 
-        WbScmMainWindow.singleton_update_table_running = False
+    def __refreshFinished( self ):
+        self.change_watcher.refreshFinished()
+        self.__updateChangeWatcher()
+
+    def __refreshFailed( self ):
+        self.__refreshFinished()
+
+        # do not lose the requests that were waiting for the failed refresh
+        more, folder, changed_only = self.refresh_coordinator.refreshAbandoned( self.__selectedRelativePath() )
+        if more:
+            self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'refresh after failure',
+                        priority=wb_background_thread.PRIORITY_INTERACTIVE )( folder, changed_only )
+
+    def __selectedRelativePath( self ):
+        tree_node = self.selectedScmProjectTreeNode()
+        return None if tree_node is None else tree_node.relativePath()
+
+    def __updateChangeWatcher( self ):
+        self.change_watcher.watchProject( self.table_view.selectedScmProject() )
 
     def updateActionEnabledStates( self ):
         # can be called during __init__ on macOS version
@@ -448,13 +519,12 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self._addMenu( m, T_('Edit'), self.table_view.tableActionEdit, self.table_view.enablerTableFilesExists, 'toolbar_images/edit.png' )
         self._addMenu( m, T_('Open'), self.table_view.tableActionOpen, self.table_view.enablerTableFilesExists, 'toolbar_images/open.png' )
 
-        # --- setup scm_type specific menus
-        for scm_type in self.all_ui_components:
-            self.debugLog( 'calling setupMenuBar for %r' % (scm_type,) )
-            self.all_ui_components[ scm_type ].setupMenuBar( mb, self._addMenu )
+        # --- scm_type specific menus are inserted here by uiComponentsForScmType
 
         # --- setup menus less used common menus
         m = mb.addMenu( T_('&Project') )
+        self.__menu_project = m
+
         self._addMenu( m, T_('Add…'), self.projectActionAdd_Bg )
         self._addMenu( m, T_('Settings…'), self.projectActionSettings, self.enablerIsProject )
         self._addMenu( m, T_('Delete'), self.projectActionDelete, self.enablerIsProject )
@@ -463,39 +533,31 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self._addMenu( m, T_("&User Guide…"), self.appActionUserGuide )
         self._addMenu( m, T_("&About…"), self.appActionAbout, role=QtWidgets.QAction.AboutRole )
 
-    def __setupTreeContextMenu( self ):
-        self.debugLog( '__setupTreeContextMenu' )
+    def __setupTreeContextMenu( self, ui_components ):
         # --- setup scm_type specific menu
-        for scm_type in self.all_ui_components:
-            self.debugLog( 'calling setupTreeContextMenu for %r' % (scm_type,) )
-
-            m = QtWidgets.QMenu( self )
-            m.addSection( T_('Folder Actions') )
-            self._addMenu( m, T_('&Command Shell'), self.treeActionShell, self.enablerFolderExists, 'toolbar_images/terminal.png' )
-            self._addMenu( m, T_('&File Browser'), self.treeActionFileBrowse, self.enablerFolderExists, 'toolbar_images/file_browser.png' )
+        self.debugLog( 'calling setupTreeContextMenu for %r' % (ui_components.scm_type,) )
 
-            self.all_ui_components[ scm_type ].setupTreeContextMenu( m, self._addMenu )
+        m = QtWidgets.QMenu( self )
+        m.addSection( T_('Folder Actions') )
+        self._addMenu( m, T_('&Command Shell'), self.treeActionShell, self.enablerFolderExists, 'toolbar_images/terminal.png' )
+        self._addMenu( m, T_('&File Browser'), self.treeActionFileBrowse, self.enablerFolderExists, 'toolbar_images/file_browser.png' )
 
-    def __setupTableContextMenu( self ):
-        self.debugLog( '__setupTableContextMenu' )
+        ui_components.setupTreeContextMenu( m, self._addMenu )
 
+    def __setupTableContextMenu( self, ui_components ):
         # --- setup scm_type specific menu
-        for scm_type in self.all_ui_components:
-            self.debugLog( 'calling setupTableContextMenu for %r' % (scm_type,) )
+        self.debugLog( 'calling setupTableContextMenu for %r' % (ui_components.scm_type,) )
 
-            m = QtWidgets.QMenu( self )
+        m = QtWidgets.QMenu( self )
 
-            m.addSection( T_('File Actions') )
-            self._addMenu( m, T_('Edit'), self.table_view.tableActionEdit, self.table_view.enablerTableFilesExists, 'toolbar_images/edit.png' )
-            self._addMenu( m, T_('Open'), self.table_view.tableActionOpen, self.table_view.enablerTableFilesExists, 'toolbar_images/open.png' )
+        m.addSection( T_('File Actions') )
+        self._addMenu( m, T_('Edit'), self.table_view.tableActionEdit, self.table_view.enablerTableFilesExists, 'toolbar_images/edit.png' )
+        self._addMenu( m, T_('Open'), self.table_view.tableActionOpen, self.table_view.enablerTableFilesExists, 'toolbar_images/open.png' )
 
-            self.all_ui_components[ scm_type ].setupTableContextMenu( m, self._addMenu )
+        ui_components.setupTableContextMenu( m, self._addMenu )
 
     def setupToolBar( self ):
-        # --- setup scm_type specific tool bars
-        for scm_type in self.all_ui_components:
-            self.debugLog( 'calling setupToolBarAtLeft for %r' % (scm_type,) )
-            self.all_ui_components[ scm_type ].setupToolBarAtLeft( self._addToolBar, self._addTool )
+        # --- scm_type specific tool bars are added by uiComponentsForScmType
 
         # --- setup common toolbars
         t = self.tool_bar_tree = self._addToolBar( T_('tree') )
@@ -506,11 +568,6 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self._addTool( t, T_('Edit'), self.table_view.tableActionEdit, self.table_view.enablerTableFilesExists, 'toolbar_images/edit.png' )
         self._addTool( t, T_('Open'), self.table_view.tableActionOpen, self.table_view.enablerTableFilesExists, 'toolbar_images/open.png' )
 
-        # --- setup scm_type specific tool bars
-        for scm_type in self.all_ui_components:
-            self.debugLog( 'calling setupToolBarAtRight for %r' % (scm_type,) )
-            self.all_ui_components[ scm_type ].setupToolBarAtRight( self._addToolBar, self._addTool )
-
     def setupStatusBar( self, s ):
         self.status_general = QtWidgets.QLabel()
         self.status_progress = QtWidgets.QLabel()
@@ -661,7 +718,21 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         if self.__init_state != self.INIT_STATE_COMPLETE:
             return
 
-        self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'appActiveHandler' )()
+        if not self.change_watcher.needsRefresh():
+            self.debugLog( 'appActiveHandler() no changes' )
+            return
+
+        self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'appActiveHandler',
+                    priority=wb_background_thread.PRIORITY_INTERACTIVE )( changed_only=True )
+
+    def changeWatcherRefreshHandler( self ):
+        self.debugLog( 'changeWatcherRefreshHandler()' )
+
+        if self.__init_state != self.INIT_STATE_COMPLETE:
+            return
+
+        self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'changeWatcherRefreshHandler',
+                    priority=wb_background_thread.PRIORITY_INTERACTIVE )( changed_only=True )
 
     #------------------------------------------------------------
     #
@@ -784,9 +855,12 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
                                 ,sys.version_info.serial) )
         all_about_info.append( 'PyQt %s, Qt %s' % (Qt.PYQT_VERSION_STR, QtCore.QT_VERSION_STR) )
 
-        for scm_type in self.all_ui_components:
-            all_about_info.append( '' )
-            all_about_info.extend( self.all_ui_components[ scm_type ].about() )
+        # about needs the ui components of all the scm_types
+        for scm_type in self.app.all_factories:
+            ui_components = self.uiComponentsForScmType( scm_type )
+            if ui_components is not None:
+                all_about_info.append( '' )
+                all_about_info.extend( ui_components.about() )
 
         all_about_info.append( '' )
         all_about_info.append( T_('Copyright Barry Scott (c) %s. All rights reserved') % (wb_scm_version.copyright_years,) )
@@ -832,6 +906,9 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         # close all open modeless windows
         wb_tracked_qwidget.closeAllWindows()
 
+        # stop any processes that the projects keep running
+        self.tree_model.closeAllProjects()
+
         if close:
             self.close()
 
@@ -847,7 +924,7 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
     def projectActionAdd_Bg( self, checked ):
         w = wb_scm_project_dialogs.WbScmAddProjectWizard( self.app )
         if w.exec_():
-            ui_components = self.all_ui_components[ w.getScmType() ]
+            ui_components = self.uiComponentsForScmType( w.getScmType() )
 
             if w.getAction() == w.action_init:
                 # pre is a good place to setup progress and status
@@ -1029,6 +1106,8 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
             self.folder_text.setText( folder )
 
+        self.__updateChangeWatcher()
+
     def treeActionShell( self ):
         folder_path = self.table_view.selectedAbsoluteFolder()
         if folder_path is None:
@@ -1088,3 +1167,17 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         tree_node = self.selectedScmProjectTreeNode()
         root = tree_node.project.projectPath()
         return [root / filename for filename in self.tableSelectedFiles()]
+
+#
+#   Looks like the menu bar to the scm ui components
+#   but inserts their menus before the before_menu
+#
+class WbMenuBarInserter:
+    def __init__( self, menu_bar, before_menu ):
+        self.menu_bar = menu_bar
+        self.before_menu = before_menu
+
+    def addMenu( self, title ):
+        menu = QtWidgets.QMenu( title, self.menu_bar )
+        self.menu_bar.insertMenu( self.before_menu.menuAction(), menu )
+        return menu
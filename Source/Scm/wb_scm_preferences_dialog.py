@@ -21,6 +21,7 @@ import wb_pick_path_dialogs
 import wb_shell_commands
 import wb_platform_specific
 import wb_dialog_bases
+import wb_diff_difflib
 
 class WbScmPreferencesDialog(wb_dialog_bases.WbTabbedDialog):
     def __init__( self, app, parent ):
@@ -32,7 +33,7 @@ class WbScmPreferencesDialog(wb_dialog_bases.WbTabbedDialog):
 
     def completeTabsInit( self ):
         self.tabs = QtWidgets.QTabWidget()
-        for tab_class in (GeneralTab, EditorTab, ShellTab, LogHistoryTab, FontTab):
+        for tab_class in (GeneralTab, EditorTab, ShellTab, LogHistoryTab, DiffTab, FontTab):
             tab = tab_class( self.app )
             self.addTab( tab )
 
@@ -229,6 +230,29 @@ class LogHistoryTab(wb_dialog_bases.WbTabBase):
         self.prefs.default_since_days_interval = self.default_since.value()
         self.prefs.use_default_since_days_interval = self.use_default_since.isChecked()
 
+class DiffTab(wb_dialog_bases.WbTabBase):
+    def __init__( self, app ):
+        super().__init__( app, T_('Diff') )
+
+        if self.app is None:
+            self.prefs = None
+        else:
+            self.prefs = self.app.prefs.diff
+
+        self.algorithm = QtWidgets.QComboBox()
+        self.algorithm.addItems( wb_diff_difflib.all_diff_algorithms )
+
+        if self.prefs is not None:
+            self.algorithm.setCurrentText( self.prefs.algorithm )
+
+        self.addRow( T_('Diff Algorithm'), self.algorithm )
+
+    def savePreferences( self ):
+        if self.prefs is None:
+            return
+
+        self.prefs.algorithm = self.algorithm.currentText()
+
 class FontTab(wb_dialog_bases.WbTabBase):
     def __init__( self, app ):
         super().__init__( app, 'Fonts' )
@@ -1,10 +1,20 @@
 
+import time
+
 #------------------------------------------------------------
 #
 #   progress reporting API
 #
+#   the counts can be incremented by more then one at a time
+#   when the increments are batched up on a background thread
+#
+#   once progress has been running for rate_min_time seconds
+#   the rate and, if the total is known, the time left is shown
+#
 #------------------------------------------------------------
 class WbScmProgress:
+    rate_min_time = 1.0
+
     def __init__( self, status_widget ):
         self.status_widget = status_widget
         self.progress_format = None
@@ -12,6 +22,7 @@ class WbScmProgress:
         self.__total = None
         self.__event_count = None
         self.__in_conflict = None
+        self.__start_time = None
 
         self.status_widget.setText( '' )
 
@@ -21,6 +32,7 @@ class WbScmProgress:
         self.__total = total
         self.__event_count = 0
         self.__in_conflict = 0
+        self.__start_time = time.monotonic()
 
         self.__updateStatusCtrl()
 
@@ -36,17 +48,35 @@ class WbScmProgress:
         if self.__total > 0:
             progress_values['percent'] = self.__event_count*100/self.__total
 
-        self.status_widget.setText( self.progress_format % progress_values )
+        text = self.progress_format % progress_values
+
+        elapsed = time.monotonic() - self.__start_time
+        if elapsed >= self.rate_min_time and self.__event_count > 0:
+            rate = self.__event_count / elapsed
+            text = T_('%(progress)s - %(rate)d per second') % {'progress': text, 'rate': rate}
+
+            if self.__total > self.__event_count:
+                seconds_left = int( (self.__total - self.__event_count) / rate )
+                text = T_('%(progress)s, %(minutes)d:%(seconds)02d left') % {
+                            'progress': text
+                            ,'minutes': seconds_left // 60
+                            ,'seconds': seconds_left % 60}
+
+        self.status_widget.setText( text )
+
+    def incEventCount( self, count=1 ):
+        self.__event_count += count
+        self.__updateStatusCtrl()
 
-    def incEventCount( self ):
-        self.__event_count += 1
+    def setEventCount( self, count ):
+        self.__event_count = count
         self.__updateStatusCtrl()
 
     def getEventCount( self ):
         return self.__event_count
 
-    def incInConflictCount( self ):
-        self.__in_conflict += 1
+    def incInConflictCount( self, count=1 ):
+        self.__in_conflict += count
         self.__updateStatusCtrl()
 
     def getInConflictCount( self ):
@@ -25,6 +25,9 @@ class ScmProjectPlaceholder:
     def scmType( self ):
         return self.prefs_project.scm_type
 
+    def closeProject( self ):
+        pass
+
     def isNotEqual( self, other ):
         return self.projectName() != other.projectName()
 
@@ -40,7 +43,7 @@ class ScmProjectPlaceholder:
     def projectPath( self ):
         return pathlib.Path( self.prefs_project.path )
 
-    def updateState( self, tree_leaf ):
+    def updateState( self, tree_leaf, all_dirty_paths=None ):
         pass
 
     def cmdInfo( self, path ):
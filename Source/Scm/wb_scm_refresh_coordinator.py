@@ -0,0 +1,121 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_scm_refresh_coordinator.py
+
+    coalesce the requests to refresh the table view that
+    arrive while a refresh is running into one more refresh
+
+'''
+import os
+import pathlib
+
+#
+#   Only one refresh runs at a time. Requests made while it runs
+#   are remembered and answered by one more refresh of the folder
+#   that contains all the requested folders.
+#
+#   A request can ask for only the paths that the change watcher
+#   has seen change to be refreshed. The next refresh does that only
+#   if all the requests it answers asked for it.
+#
+#   Each request made while a refresh runs makes that refresh
+#   stale. The work that is only needed to show the result of a
+#   refresh is skipped for a stale refresh as the next refresh
+#   will do it.
+#
+class WbScmRefreshCoordinator:
+    def __init__( self, app ):
+        self.app = app
+        self.debugLog = self.app.debug_options.debugLogMainWindow
+
+        self.__running = False
+        self.__generation = 0
+        # the folders of the requests that arrived while running
+        # a folder of None is the folder that is selected
+        self.__all_pending_folders = []
+        self.__pending_changed_only = True
+
+    def isRunning( self ):
+        return self.__running
+
+    # return True if the caller is to run the refresh now
+    # otherwise the request is added to the next refresh
+    def requestRefresh( self, folder, changed_only=False ):
+        self.__generation += 1
+
+        if self.__running:
+            self.debugLog( 'requestRefresh( %r ) coalesced with %d pending' % (folder, len(self.__all_pending_folders)) )
+            self.__all_pending_folders.append( folder )
+            self.__pending_changed_only = self.__pending_changed_only and changed_only
+            return False
+
+        self.__running = True
+        return True
+
+    def generation( self ):
+        return self.__generation
+
+    def isStale( self, generation ):
+        return generation != self.__generation
+
+    # return (True, folder, changed_only) for the next refresh
+    # or (False, None, False) when done
+    def nextRefresh( self, selected_folder ):
+        if len(self.__all_pending_folders) == 0:
+            self.__running = False
+            return False, None, False
+
+        return self.__takePending( 'nextRefresh', selected_folder )
+
+    # called if the refresh fails so that the next request runs.
+    # return (True, folder, changed_only) if requests are waiting for
+    # a refresh that the caller is to start otherwise (False, None, False)
+    def refreshAbandoned( self, selected_folder ):
+        self.__running = False
+        if len(self.__all_pending_folders) == 0:
+            return False, None, False
+
+        return self.__takePending( 'refreshAbandoned', selected_folder )
+
+    def __takePending( self, reason, selected_folder ):
+        folder = self.__mergeFolders( self.__all_pending_folders, selected_folder )
+        changed_only = self.__pending_changed_only
+        self.debugLog( '%s() %d requests as folder %r changed_only %r' %
+                        (reason, len(self.__all_pending_folders), folder, changed_only) )
+
+        self.__all_pending_folders = []
+        self.__pending_changed_only = True
+
+        return True, folder, changed_only
+
+    def __mergeFolders( self, all_folders, selected_folder ):
+        if all( folder is None for folder in all_folders ):
+            return None
+
+        all_paths = {}
+        for folder in all_folders:
+            if folder is None:
+                folder = selected_folder
+
+            if folder is None:
+                return None
+
+            all_paths[ pathlib.Path( folder ) ] = folder
+
+        if len(all_paths) == 1:
+            # the folder as it was requested
+            return all_paths.popitem()[1]
+
+        try:
+            return pathlib.Path( os.path.commonpath( list( all_paths ) ) )
+
+        except ValueError:
+            # no common folder - refresh the selected folder
+            return None
@@ -208,13 +208,14 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
         }
     def data( self, index, role ):
         result = self.data_( index, role )
-        if role in self.role_to_name:
+        # called for every cell that is drawn - only find the debug values when logging
+        if self.debugLog and role in self.role_to_name:
             if isinstance( result, QtGui.QBrush ):
                 colour = result.color()
                 result_p = 'Colour(%d, %d, %d)' % (colour.red(), colour.green(), colour.blue())
             else:
                 result_p = result
-            self.debugLog( 'WbScmTableModel.data( %r, %r ) -> %r' % (self.all_files[ index.row() ], self.role_to_name[ role ], result_p) )
+            self.debugLog( 'WbScmTableModel.data( %r, %r ) -> %r', self.all_files[ index.row() ], self.role_to_name[ role ], result_p )
         return result
 
     def data_( self, index, role ):
@@ -268,7 +269,7 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
             if working != '':
                 return self.__brush_is_changed
 
-            self.debugLog( 'WbScmTableModel.data_() isControlled %r entry %r' % (entry.isControlled(), entry) )
+            self.debugLog( 'WbScmTableModel.data_() isControlled %r entry %r', entry.isControlled(), entry )
             if not entry.isControlled():
                 return self.__brush_is_uncontrolled
 
@@ -283,8 +284,8 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
         self.refreshTable( scm_project_tree_node )
 
     def refreshTable( self, scm_project_tree_node=None ):
-        self.debugLog( 'WbScmTableModel.refreshTable( %r ) start' % (scm_project_tree_node,) )
-        self.debugLog( 'WbScmTableModel.refreshTable() self.scm_project_tree_node %r' % (self.scm_project_tree_node,) )
+        self.debugLog( 'WbScmTableModel.refreshTable( %r ) start', scm_project_tree_node )
+        self.debugLog( 'WbScmTableModel.refreshTable() self.scm_project_tree_node %r', self.scm_project_tree_node )
 
         if scm_project_tree_node is None:
             scm_project_tree_node = self.scm_project_tree_node
@@ -337,34 +338,30 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
             all_old_names = [entry.name for entry in self.all_files]
             all_new_names = [entry.name for entry in all_new_files]
 
-            all_debug_lines = []
-            for offset, name in enumerate( self.all_files ):
-                all_debug_lines.append( 'old %2d %s' % (offset, name) )
-
-            for offset, name in enumerate( all_new_files ):
-                all_debug_lines.append( 'new %2d %s' % (offset, name) )
-
             if self.debugLog:
-                for line in all_debug_lines:
-                    self.debugLog( line )
+                for offset, name in enumerate( self.all_files ):
+                    self.debugLog( 'old %2d %s', offset, name )
+
+                for offset, name in enumerate( all_new_files ):
+                    self.debugLog( 'new %2d %s', offset, name )
 
             offset = 0
             while offset < len(all_new_files) and offset < len(self.all_files):
-                self.debugLog( 'WbScmTableModel.refreshTable() while offset %d %r old %r' %
-                        (offset, all_new_files[ offset ].name, self.all_files[ offset ].name) )
+                self.debugLog( 'WbScmTableModel.refreshTable() while offset %d %r old %r',
+                        offset, all_new_files[ offset ].name, self.all_files[ offset ].name )
 
                 # all_new_files and self.all_files are a mix of str and Path objects
                 # coerce to str to do the compares
                 if str(all_new_files[ offset ].name) == str(self.all_files[ offset ].name):
                     if all_new_files[ offset ].isNotEqual( self.all_files[ offset ] ):
-                        self.debugLog( 'WbScmTableModel.refreshTable() emit dataChanged row=%d' % (offset,) )
+                        self.debugLog( 'WbScmTableModel.refreshTable() emit dataChanged row=%d', offset )
                         self.dataChanged.emit(
                             self.createIndex( offset, self.col_staged ),
                             self.createIndex( offset, self.col_type ) )
                     offset += 1
 
                 elif str(all_new_files[ offset ].name) < str(self.all_files[ offset ].name):
-                    self.debugLog( 'WbScmTableModel.refreshTable() insertRows row=%d %r' % (offset, all_new_names[offset]) )
+                    self.debugLog( 'WbScmTableModel.refreshTable() insertRows row=%d %r', offset, all_new_names[offset] )
                     self.beginInsertRows( parent, offset, offset )
                     self.all_files.insert( offset, all_new_files[ offset ] )
                     all_old_names.insert( offset, all_new_files[ offset ].name )
@@ -372,7 +369,7 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
                     offset += 1
 
                 else:
-                    self.debugLog( 'WbScmTableModel.refreshTable() deleteRows row=%d' % (offset,) )
+                    self.debugLog( 'WbScmTableModel.refreshTable() deleteRows row=%d', offset )
                     # delete the old
                     self.beginRemoveRows( parent, offset, offset )
                     del self.all_files[ offset ]
@@ -380,14 +377,14 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
                     self.endRemoveRows()
 
             if offset < len(self.all_files):
-                self.debugLog( 'WbScmTableModel.refreshTable() removeRows at end of old row=%d %r' % (offset, all_old_names[ offset: ]) )
+                self.debugLog( 'WbScmTableModel.refreshTable() removeRows at end of old row=%d %r', offset, all_old_names[ offset: ] )
 
                 self.beginRemoveRows( parent, offset, len(self.all_files)-1 )
                 del self.all_files[ offset: ]
                 self.endRemoveRows()
 
             if offset < len(all_new_files):
-                self.debugLog( 'WbScmTableModel.refreshTable() insertRows at end of new row=%d %r, old row %s' % (offset, all_new_names[offset:], offset) )
+                self.debugLog( 'WbScmTableModel.refreshTable() insertRows at end of new row=%d %r, old row %s', offset, all_new_names[offset:], offset )
 
                 to_insert = len(all_new_files) - offset - 1
                 self.beginInsertRows( parent, offset, offset + to_insert )
@@ -397,7 +394,7 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
             self.all_files = sorted( all_files.values() )
 
         self.scm_project_tree_node = scm_project_tree_node
-        self.debugLog( 'WbScmTableModel.refreshTable() done self.scm_project_tree_node %r' % (self.scm_project_tree_node,) )
+        self.debugLog( 'WbScmTableModel.refreshTable() done self.scm_project_tree_node %r', self.scm_project_tree_node )
 
     def selectedScmProjectTreeNode( self ):
         return self.scm_project_tree_node
@@ -433,6 +430,7 @@ class WbScmTableEntry:
         self.name = name
         self.dirent = None
         self.status = None
+        self.__file_mtime = None
 
     def __repr__( self ):
         return '<WbScmTableEntry: n: %r s: %r>' % (self.name, self.status)
@@ -444,6 +442,7 @@ class WbScmTableEntry:
 
     def updateFromDirEnt( self, dirent ):
         self.dirent = dirent
+        self.__file_mtime = None
 
     def updateFromScm( self, status ):
         self.status = status
@@ -464,13 +463,17 @@ class WbScmTableEntry:
         if self.dirent is None:
             return '-'
 
-        else:
+        # the dirent is replaced when the folder is read again.
+        # only the mtime is kept so that a change of timezone is shown
+        if self.__file_mtime is None:
             try:
-                return self.app.formatDatetime( self.dirent.stat( follow_symlinks=not self.dirent.is_symlink() ).st_mtime )
+                self.__file_mtime = self.dirent.stat( follow_symlinks=not self.dirent.is_symlink() ).st_mtime
 
             except FileNotFoundError:
                 return '-'
 
+        return self.app.formatDatetime( self.__file_mtime )
+
     # ------------------------------------------------------------
     def isControlled( self ):
         return self.status is not None and self.status.isControlled()
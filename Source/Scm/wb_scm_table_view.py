@@ -221,6 +221,31 @@ class WbScmTableView(wb_table_view.WbTableView):
 
         self.debugLog( 'tableActionViewRepo_Bg done' )
 
+    # like tableActionViewRepo_Bg but execute_function is called once
+    # with all the selected filenames so that the scm can act on them together
+    @thread_switcher
+    def tableActionViewRepoAll_Bg( self, execute_function, are_you_sure_function=None, finalise_function=None ):
+        self.debugLog( 'tableActionViewRepoAll_Bg start' )
+        all_filenames = self.__tableActionViewRepoPrep( are_you_sure_function )
+
+        if len(all_filenames) > 0:
+            scm_project = self.selectedScmProject()
+
+            if wb_background_thread.requiresThreadSwitcher( execute_function ):
+                yield from execute_function( scm_project, all_filenames )
+
+            else:
+                execute_function( scm_project, all_filenames )
+
+            if finalise_function is not None:
+                if wb_background_thread.requiresThreadSwitcher( finalise_function ):
+                    yield from finalise_function( scm_project )
+
+                else:
+                    finalise_function( scm_project )
+
+        self.debugLog( 'tableActionViewRepoAll_Bg done' )
+
     def __tableActionViewRepoPrep( self, are_you_sure_function ):
         folder_path = self.selectedAbsoluteFolder()
         if folder_path is None:
@@ -15,6 +15,7 @@ from PyQt5 import QtCore
 
 import wb_scm_project_place_holder
 
+import wb_background_thread
 from wb_background_thread import thread_switcher
 
 class WbScmTreeSortFilter(QtCore.QSortFilterProxyModel):
@@ -36,7 +37,8 @@ class WbScmTreeSortFilter(QtCore.QSortFilterProxyModel):
         return left_ent.text().lower() > right_ent.text().lower()
 
     def selectionChanged( self, selected, deselected ):
-        self.app.wrapWithThreadSwitcher( self.main_window.treeSelectionChanged_Bg, 'sort filter SelectionChanged' )(
+        self.app.wrapWithThreadSwitcher( self.main_window.treeSelectionChanged_Bg, 'sort filter SelectionChanged',
+                    priority=wb_background_thread.PRIORITY_INTERACTIVE )(
                 self.mapSelectionToSource( selected ),
                 self.mapSelectionToSource( deselected ) )
 
@@ -81,10 +83,18 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
 
             row += 1
 
+        if project_name in self.all_scm_projects:
+            scm_project, tree_node = self.all_scm_projects[ project_name ]
+            scm_project.closeProject()
+
         self.removeRow( row, QtCore.QModelIndex() )
 
+    def closeAllProjects( self ):
+        for scm_project, tree_node in self.all_scm_projects.values():
+            scm_project.closeProject()
+
     @thread_switcher
-    def refreshTree_Bg( self, folder=None ):
+    def refreshTree_Bg( self, folder=None, all_dirty_paths=None ):
         self.debugLog( 'refreshTree_Bg( %r ) selected_node %r' % (folder, self.selected_node) )
         if self.selected_node is None:
             return
@@ -97,7 +107,7 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
         if folder is None:
             folder = self.selected_node.scm_project_tree_node.relativePath()
 
-        scm_project.updateState( folder )
+        scm_project.updateState( folder, all_dirty_paths )
 
         yield self.app.switchToForeground
 
@@ -189,7 +199,8 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
         self.debugLog( 'selectionChanged: deselected %r' % ([(index.row(), index.column()) for index in deselected.indexes()],) )
         super().selectionChanged( selected, deselected )
         self.debugLog( 'selectionChanged calling selectionChanged_Bg' )
-        self.app.wrapWithThreadSwitcher( self.selectionChanged_Bg, 'treeModel selectionChanged' )( selected, deselected )
+        self.app.wrapWithThreadSwitcher( self.selectionChanged_Bg, 'treeModel selectionChanged',
+                    priority=wb_background_thread.PRIORITY_INTERACTIVE )( selected, deselected )
 
     @thread_switcher
     def selectionChanged_Bg( self, selected, deselected ):
@@ -12,10 +12,6 @@
 '''
 import pathlib
 
-import wb_svn_log_history_view
-import wb_svn_ui_components
-import wb_svn_ui_actions
-
 import wb_scm_project_dialogs
 import wb_scm_factory_abc
 import wb_svn_preferences
@@ -49,9 +45,11 @@ class WbSvnFactory(wb_scm_factory_abc.WbScmFactoryABC):
         pass
 
     def uiComponents( self ):
+        import wb_svn_ui_components
         return wb_svn_ui_components.SvnMainWindowComponents( self )
 
     def uiActions( self ):
+        import wb_svn_ui_actions
         return wb_svn_ui_actions.SvnMainWindowActions( self )
 
     def projectSettingsDialog( self, app, main_window, prefs_project, scm_project ):
@@ -70,6 +68,7 @@ class WbSvnFactory(wb_scm_factory_abc.WbScmFactoryABC):
         return [('.svn', 'svn'), ('_svn', 'svn')]
 
     def logHistoryView( self, app, title ):
+        import wb_svn_log_history_view
         return wb_svn_log_history_view.WbSvnLogHistoryView( app, title )
 
     def setupPreferences( self, scheme_nodes ):
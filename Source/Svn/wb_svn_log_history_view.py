@@ -14,6 +14,7 @@ from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
+import wb_date
 import wb_tracked_qwidget
 import wb_main_window
 import wb_ui_components
@@ -242,6 +243,7 @@ class WbSvnLogHistoryModel(QtCore.QAbstractTableModel):
         super().__init__()
 
         self.all_commit_nodes  = []
+        self.date_strings = wb_date.WbTableDateStrings( self.app.formatDatetime, lambda row: self.all_commit_nodes[ row ].date )
         self.all_tags_by_rev = {}
 
         if app.isDarkMode():
@@ -252,6 +254,7 @@ class WbSvnLogHistoryModel(QtCore.QAbstractTableModel):
     def loadCommitLogForFile( self, all_commit_nodes ):
         self.beginResetModel()
         self.all_commit_nodes = all_commit_nodes
+        self.date_strings.clear()
         self.endResetModel()
 
     def rowCount( self, parent ):
@@ -280,7 +283,7 @@ class WbSvnLogHistoryModel(QtCore.QAbstractTableModel):
         return self.all_commit_nodes[ row ].revision
 
     def dateStringForRow( self, row ):
-        return self.app.formatDatetime( self.all_commit_nodes[ row ].date )
+        return self.date_strings.dateString( row )
 
     def data( self, index, role ):
         if role == QtCore.Qt.UserRole:
@@ -295,7 +298,7 @@ class WbSvnLogHistoryModel(QtCore.QAbstractTableModel):
                 return node.author
 
             elif col == self.col_date:
-                return self.app.formatDatetime( node.date )
+                return self.date_strings.dateString( index.row() )
 
             elif col == self.col_tag:
                 if hasattr( node, 'is_tag' ):
@@ -17,6 +17,7 @@ import pysvn
 import wb_date
 import wb_read_file
 import wb_annotate_node
+import wb_folder_crawler
 import wb_background_thread
 import wb_svn_utils
 
@@ -74,6 +75,9 @@ class SvnProject:
     def scmType( self ):
         return 'svn'
 
+    def closeProject( self ):
+        pass
+
     def switchToBranch( self, branch ):
         pass
 
@@ -123,7 +127,7 @@ class SvnProject:
 
             self.flat_tree.addFileByPath( filepath )
 
-    def updateState( self, tree_leaf ):
+    def updateState( self, tree_leaf, all_dirty_paths=None ):
         self.debugLog( 'updateState( %r ) repo=%s' % (tree_leaf, self.projectPath()) )
 
         self.__stale_status = False
@@ -151,27 +155,14 @@ class SvnProject:
         self.all_file_state = {}
         self.__num_uncommitted_files = 0
 
-        repo_root = self.projectPath()
-
-        svn_dir = repo_root / '.svn'
-
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
-
-            for filename in folder.iterdir():
-                abs_path = folder / filename
-                repo_relative = abs_path.relative_to( repo_root )
-
-                if abs_path.is_dir():
-                    if abs_path != svn_dir:
-                        all_folders.add( abs_path )
+        all_listings = wb_folder_crawler.crawlFolders( self.projectPath(), '.svn' )
+        for folder, (mtime, all_entries) in all_listings.items():
+            for name, is_dir in all_entries.items():
+                repo_relative = folder / name
 
-                        self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
-
-                else:
-                    self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
+                self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
+                if is_dir:
+                    self.all_file_state[ repo_relative ].setIsDir()
 
         for state in self.client().status2( str(self.projectPath()) ):
             filepath = self.pathForWb( state.path )
@@ -188,10 +179,10 @@ class SvnProject:
                 self.__num_uncommitted_files += 1
 
     def __updateTree( self, path, is_dir ):
-        self.debugLogUpdateTree( '__updateTree path %r' % (path,) )
+        self.debugLogUpdateTree( '__updateTree path %r', path )
         node = self.tree
 
-        self.debugLogUpdateTree( '__updateTree path.parts %r' % (path.parts,) )
+        self.debugLogUpdateTree( '__updateTree path.parts %r', path.parts )
 
         if is_dir:
             parts = path.parts[:]
@@ -200,14 +191,14 @@ class SvnProject:
             parts = path.parts[0:-1]
 
         for index, name in enumerate( parts ):
-            self.debugLogUpdateTree( '__updateTree name %r at node %r' % (name, node) )
+            self.debugLogUpdateTree( '__updateTree name %r at node %r', name, node )
 
             if not node.hasFolder( name ):
                 node.addFolder( name, SvnProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
 
             node = node.getFolder( name )
 
-        self.debugLogUpdateTree( '__updateTree addFile %r to node %r' % (path, node) )
+        self.debugLogUpdateTree( '__updateTree addFile %r to node %r', path, node )
         if not is_dir:
             node.addFileByName( path )
 
@@ -283,6 +274,12 @@ class SvnProject:
         self.client().add( self.pathForSvn( filename ), depth=depth, force=force )
         self.__stale_status = True
 
+    def cmdAddFiles( self, all_filenames, depth=None, force=False ):
+        self.debugLog( 'cmdAddFiles( %d files )' % (len(all_filenames),) )
+
+        self.__runForAllFilenames( self.client().add, all_filenames, depth=depth, force=force )
+        self.__stale_status = True
+
     def cmdRevert( self, filename, depth=None ):
         self.debugLog( 'cmdRevert( %r, %r )' % (filename, depth) )
         self.debugLog( 'cmdRevert 2 ( %r, %r )' % (self.pathForSvn( filename ), depth) )
@@ -290,6 +287,37 @@ class SvnProject:
         self.client().revert( self.pathForSvn( filename ), depth=depth )
         self.__stale_status = True
 
+    def cmdRevertFiles( self, all_filenames, depth=None ):
+        self.debugLog( 'cmdRevertFiles( %d files, %r )' % (len(all_filenames), depth) )
+
+        self.__runForAllFilenames( self.client().revert, all_filenames, depth=depth )
+        self.__stale_status = True
+
+    # when the whole list fails run the files one at a time so that
+    # one path svn cannot handle does not stop the rest
+    def __runForAllFilenames( self, client_function, all_filenames, **kwargs ):
+        try:
+            client_function( [self.pathForSvn( filename ) for filename in all_filenames], **kwargs )
+            return
+
+        except ClientError as e:
+            if len(all_filenames) == 1:
+                raise
+
+        all_errors = []
+        for filename in all_filenames:
+            try:
+                client_function( self.pathForSvn( filename ), **kwargs )
+
+            except ClientError as e:
+                all_errors.append( e )
+
+        for e in all_errors[:-1]:
+            self.logClientError( e )
+
+        if len(all_errors) > 0:
+            raise all_errors[-1]
+
     def cmdResolved( self, filename ):
         self.debugLog( 'cmdResolved( %r )' % (filename,) )
 
@@ -512,6 +540,16 @@ class SvnProject:
 
         return all_annotation_nodes
 
+    # the annotation of a file only changes when a commit changes the file
+    # so the URL and the last changed revision identify the annotation
+    def cmdAnnotationIdentityForFile( self, filename ):
+        all_info = self.client().info2( self.pathForSvn( filename ), revision=self.svn_rev_head, depth=self.svn_depth_empty )
+        if len(all_info) == 0:
+            return None
+
+        info = all_info[0][1]
+        return '%s@%d' % (info['URL'], info['last_changed_rev'].number)
+
     def cmdCommitLogForAnnotateFile( self, filename, rev_start_num, rev_end_num ):
         rev_start = pysvn.Revision( pysvn.opt_revision_kind.number, rev_start_num )
         rev_end = pysvn.Revision( pysvn.opt_revision_kind.number, rev_end_num )
@@ -530,7 +568,8 @@ class SvnProject:
         # for commands like checkout, update and checkin.
         #
         # update progress via the foreground thread to avoid calling Qt
-        # on the background thread.
+        # on the background thread. The counts are batched up as there
+        # can be many thousands of notifications.
         #
 
         # nothing to print if no path
@@ -547,7 +586,7 @@ class SvnProject:
                       ,pysvn.wc_notify_action.commit_deleted
                       ,pysvn.wc_notify_action.commit_replaced
                       ,pysvn.wc_notify_action.annotate_revision):
-            self.app.runInForeground( self.app.top_window.progress.incEventCount, () )
+            self.app.countInForeground( self.app.top_window.progress.incEventCount )
             return
 
         if action == pysvn.wc_notify_action.failed_lock:
@@ -570,14 +609,14 @@ class SvnProject:
 
         if wb_svn_utils.wcNotifyTypeLookup( action ) == 'U':
             # count the interesting update event
-            self.app.runInForeground( self.app.top_window.progress.incEventCount, () )
+            self.app.countInForeground( self.app.top_window.progress.incEventCount )
 
         # count the number of files in conflict
         action_letter = wb_svn_utils.wcNotifyTypeLookup( action )
         if( arg_dict['content_state'] == pysvn.wc_notify_state.conflicted
         or arg_dict['prop_state'] == pysvn.wc_notify_state.conflicted ):
             action_letter = 'C'
-            self.app.runInForeground( self.app.top_window.progress.incInConflictCount, () )
+            self.app.countInForeground( self.app.top_window.progress.incInConflictCount )
 
         # print anything that gets through the filter
         path = arg_dict['path']
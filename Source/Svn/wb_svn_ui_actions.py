@@ -18,6 +18,7 @@ from PyQt5 import QtWidgets
 import wb_log_history_options_dialog
 import wb_ui_actions
 import wb_common_dialogs
+import wb_annotate_cache
 
 import wb_svn_project
 import wb_svn_info_dialog
@@ -593,20 +594,20 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
     @thread_switcher
     def tableActionSvnAdd_Bg( self, checked=None ):
-        def execute_function( svn_project, filename ):
+        def execute_all_function( svn_project, all_filenames ):
             try:
-                svn_project.cmdAdd( filename )
+                svn_project.cmdAddFiles( all_filenames )
 
             except wb_svn_project.ClientError as e:
                 svn_project.logClientError( e )
 
-        yield from self._tableActionSvnCmd_Bg( execute_function )
+        yield from self._tableActionSvnCmdAll_Bg( execute_all_function )
 
     @thread_switcher
     def tableActionSvnRevert_Bg( self, checked=None ):
-        def execute_function( svn_project, filename ):
+        def execute_all_function( svn_project, all_filenames ):
             try:
-                svn_project.cmdRevert( filename )
+                svn_project.cmdRevertFiles( all_filenames )
 
             except wb_svn_project.ClientError as e:
                 svn_project.logClientError( e )
@@ -615,7 +616,7 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
         def are_you_sure( all_filenames ):
             return wb_common_dialogs.WbAreYouSureRevert( self.main_window, all_filenames )
 
-        yield from self._tableActionSvnCmd_Bg( execute_function, are_you_sure )
+        yield from self._tableActionSvnCmdAll_Bg( execute_all_function, are_you_sure )
 
     @thread_switcher
     def tableActionSvnResolveConflict_Bg( self, checked=None ):
@@ -718,6 +719,15 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
         yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function )
         yield from self.top_window.updateTableView_Bg()
 
+    @thread_switcher
+    def _tableActionSvnCmdAll_Bg( self, execute_all_function, are_you_sure_function=None ):
+        svn_project = self.selectedSvnProject()
+        if svn_project is None:
+            return
+
+        yield from self.table_view.tableActionViewRepoAll_Bg( execute_all_function, are_you_sure_function )
+        yield from self.top_window.updateTableView_Bg()
+
     # ------------------------------------------------------------
     def selectedSvnProjectTreeNode( self ):
         if not self.main_window.isScmTypeActive( 'svn' ):
@@ -745,11 +755,17 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         yield self.switchToBackground
 
+        annotate_cache = wb_annotate_cache.WbAnnotateCache( self.app, 'svn', svn_project.projectPath() )
+
         try:
-            all_annotation_nodes = svn_project.cmdAnnotationForFile( filename )
-            all_annotate_revs = set()
-            for node in all_annotation_nodes:
-                all_annotate_revs.add( node.log_id )
+            annotation_identity = svn_project.cmdAnnotationIdentityForFile( filename )
+            cached_annotation = annotate_cache.load( filename, annotation_identity )
+
+            if cached_annotation is None:
+                all_annotation_nodes = svn_project.cmdAnnotationForFile( filename )
+                all_annotate_revs = set()
+                for node in all_annotation_nodes:
+                    all_annotate_revs.add( node.log_id )
 
             yield self.switchToForeground
 
@@ -759,22 +775,27 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
             yield self.switchToForeground
             return
 
-        self.progress.end()
-        self.progress.start( T_('Annotate Commit Logs %(count)d'), 0 )
+        if cached_annotation is not None:
+            all_annotation_nodes, all_commit_logs = cached_annotation
 
-        yield self.switchToBackground
+        else:
+            self.progress.end()
+            self.progress.start( T_('Annotate Commit Logs %(count)d'), 0 )
 
-        rev_min = min( all_annotate_revs )
-        rev_max = max( all_annotate_revs )
+            yield self.switchToBackground
 
-        try:
-            all_commit_logs = svn_project.cmdCommitLogForAnnotateFile( filename, rev_max, rev_min )
+            rev_min = min( all_annotate_revs )
+            rev_max = max( all_annotate_revs )
 
-        except wb_svn_project.ClientError as e:
-            svn_project.logClientError( e, 'Cannot get commit logs for %s:%s' % (svn_project.projectPath(), filename) )
-            all_commit_logs = []
+            try:
+                all_commit_logs = svn_project.cmdCommitLogForAnnotateFile( filename, rev_max, rev_min )
+                annotate_cache.save( filename, annotation_identity, all_annotation_nodes, all_commit_logs )
 
-        yield self.switchToForeground
+            except wb_svn_project.ClientError as e:
+                svn_project.logClientError( e, 'Cannot get commit logs for %s:%s' % (svn_project.projectPath(), filename) )
+                all_commit_logs = []
+
+            yield self.switchToForeground
 
         self.setStatusAction()
         self.progress.end()
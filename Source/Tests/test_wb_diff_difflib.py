@@ -0,0 +1,109 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    test_wb_diff_difflib.py
+
+    check that the opcodes of each diff algorithm turn
+    the left lines into the right lines
+
+'''
+import sys
+import pathlib
+import random
+import unittest
+
+sys.path.insert( 0, str( pathlib.Path( __file__ ).resolve().parent.parent / 'Common' ) )
+
+import wb_diff_difflib
+
+all_algorithms = ('difflib', 'myers', 'patience', 'histogram')
+
+def applyOpcodes( a, b, all_opcodes ):
+    result = []
+    for tag, i1, i2, j1, j2 in all_opcodes:
+        if tag == 'equal':
+            result.extend( a[i1:i2] )
+
+        elif tag in ('replace', 'insert'):
+            result.extend( b[j1:j2] )
+
+    return result
+
+def noCancel():
+    pass
+
+class TestDiffAlgorithms(unittest.TestCase):
+    def checkOpcodes( self, a, b ):
+        for algorithm in all_algorithms:
+            all_opcodes = wb_diff_difflib.getOpcodesForKeys( algorithm, a, b, noCancel )
+
+            # the opcodes cover both sides in order without gaps
+            i = j = 0
+            for tag, i1, i2, j1, j2 in all_opcodes:
+                self.assertEqual( (i1, j1), (i, j), algorithm )
+                if tag == 'equal':
+                    self.assertEqual( a[i1:i2], b[j1:j2], algorithm )
+
+                i, j = i2, j2
+
+            self.assertEqual( (i, j), (len(a), len(b)), algorithm )
+            self.assertEqual( applyOpcodes( a, b, all_opcodes ), b, algorithm )
+
+    def testEmpty( self ):
+        self.checkOpcodes( [], [] )
+        self.checkOpcodes( [1, 2, 3], [] )
+        self.checkOpcodes( [], [1, 2, 3] )
+
+    def testSame( self ):
+        self.checkOpcodes( list( range( 100 ) ), list( range( 100 ) ) )
+
+    def testAllDifferent( self ):
+        self.checkOpcodes( list( range( 50 ) ), list( range( 50, 120 ) ) )
+
+    def testRepeatedLines( self ):
+        # lines like blank lines and braces that are not unique
+        self.checkOpcodes( [0, 1, 0, 2, 0, 1, 0, 3, 0], [0, 2, 0, 1, 1, 0, 3, 0, 4] )
+
+    def testRandomEdits( self ):
+        rand = random.Random( 1 )
+        for attempt in range( 100 ):
+            a = [rand.randrange( 20 ) for index in range( rand.randrange( 200 ) )]
+            b = list( a )
+            for edit in range( rand.randrange( 20 ) ):
+                pos = rand.randrange( len(b) + 1 )
+                action = rand.randrange( 3 )
+                if action == 0:
+                    b.insert( pos, rand.randrange( 25 ) )
+
+                elif pos < len(b):
+                    if action == 1:
+                        del b[pos]
+
+                    else:
+                        b[pos] = rand.randrange( 25 )
+
+            self.checkOpcodes( a, b )
+
+    def testMoreThanMaxEditCost( self ):
+        # forces the matchers to give up on finding the smallest diff
+        rand = random.Random( 2 )
+        a = [rand.randrange( 1000 ) for index in range( 2000 )]
+        b = [rand.randrange( 1000 ) for index in range( 2000 )]
+        self.checkOpcodes( a, b )
+
+    def testCancel( self ):
+        def cancel():
+            raise wb_diff_difflib.DiffCancelled()
+
+        for algorithm in all_algorithms[1:]:
+            with self.assertRaises( wb_diff_difflib.DiffCancelled ):
+                wb_diff_difflib.getOpcodesForKeys( algorithm, list( range( 100 ) ), list( range( 1, 101 ) ), cancel )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    test_wb_git_commit_graph.py
+
+    check the answers of the commit graph against
+    git rev-list and git merge-base on a temporary repo
+
+'''
+import sys
+import os
+import pathlib
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+sys.path.insert( 0, str( pathlib.Path( __file__ ).resolve().parent.parent / 'Git' ) )
+
+try:
+    import git
+    import wb_git_commit_graph
+
+except ImportError:
+    git = None
+
+@unittest.skipIf( git is None or shutil.which( 'git' ) is None, 'needs GitPython and git' )
+class TestCommitGraph(unittest.TestCase):
+    def setUp( self ):
+        self.repo_dir = tempfile.mkdtemp()
+
+        self.env = dict( os.environ )
+        self.env.update( {
+            'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+            'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.com'} )
+
+        self.git( 'init', '-q', '-b', 'main' )
+        self.commits( 'main', 3 )
+
+        # topic leaves main and main is merged into it once
+        self.git( 'checkout', '-q', '-b', 'topic' )
+        self.commits( 'topic', 2 )
+        self.git( 'checkout', '-q', 'main' )
+        self.commits( 'main', 2 )
+        self.git( 'checkout', '-q', 'topic' )
+        self.git( 'merge', '-q', '--no-edit', 'main' )
+        self.commits( 'topic', 1 )
+
+        # other has no common history with main
+        self.git( 'checkout', '-q', '--orphan', 'other' )
+        self.commits( 'other', 2 )
+        self.git( 'checkout', '-q', 'main' )
+
+        self.repo = git.Repo( self.repo_dir )
+
+    def tearDown( self ):
+        self.repo.close()
+        shutil.rmtree( self.repo_dir, ignore_errors=True )
+
+    def git( self, *args ):
+        return subprocess.run( ['git'] + list( args ), cwd=self.repo_dir, env=self.env,
+                                check=True, stdout=subprocess.PIPE, universal_newlines=True ).stdout.strip()
+
+    def commits( self, name, count ):
+        for index in range( count ):
+            self.git( 'commit', '-q', '--allow-empty', '-m', '%s %d' % (name, index) )
+
+    def commitId( self, name ):
+        return self.git( 'rev-parse', name )
+
+    def revListCount( self, include, exclude ):
+        return int( self.git( 'rev-list', '--count', include, '^' + exclude ) )
+
+    def checkBranches( self, graph, left, right ):
+        left_id = self.commitId( left )
+        right_id = self.commitId( right )
+
+        self.assertEqual( graph.aheadBehind( self.repo, left_id, right_id ),
+                            (self.revListCount( left, right ), self.revListCount( right, left )) )
+
+        self.assertEqual( sorted( graph.commitsOnlyIn( self.repo, left_id, right_id ) ),
+                            sorted( self.git( 'rev-list', left, '^' + right ).split() ) )
+
+        is_ancestor = subprocess.run( ['git', 'merge-base', '--is-ancestor', right, left], cwd=self.repo_dir ).returncode == 0
+        self.assertEqual( graph.isAncestor( self.repo, right_id, left_id ), is_ancestor )
+
+    def testAheadBehind( self ):
+        graph = wb_git_commit_graph.WbGitCommitGraph()
+
+        for left, right in [('topic', 'main'), ('main', 'topic'), ('main', 'main'),
+                            ('topic~3', 'main'), ('main~1', 'topic'), ('other', 'main')]:
+            self.checkBranches( graph, left, right )
+
+    def testGraphIsExtended( self ):
+        graph = wb_git_commit_graph.WbGitCommitGraph()
+        self.checkBranches( graph, 'topic', 'main' )
+        num_commits = len(graph)
+
+        # new commits are added when asked about
+        self.commits( 'main', 3 )
+        self.git( 'checkout', '-q', 'topic' )
+        self.git( 'merge', '-q', '--no-edit', 'main' )
+
+        self.checkBranches( graph, 'topic', 'main' )
+        self.checkBranches( graph, 'main', 'other' )
+        self.assertEqual( len(graph), num_commits + 4 + 2 )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+'''
+ ====================================================================
+ Copyright (c) 2018 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    test_wb_scm_refresh_coordinator.py
+
+    check that requests made while a refresh runs
+    are answered by one more refresh
+
+'''
+import sys
+import pathlib
+import types
+import unittest
+
+sys.path.insert( 0, str( pathlib.Path( __file__ ).resolve().parent.parent / 'Scm' ) )
+
+import wb_scm_refresh_coordinator
+
+def makeApp():
+    return types.SimpleNamespace( debug_options=types.SimpleNamespace( debugLogMainWindow=lambda msg: None ) )
+
+class TestRefreshCoordinator(unittest.TestCase):
+    def setUp( self ):
+        self.coordinator = wb_scm_refresh_coordinator.WbScmRefreshCoordinator( makeApp() )
+
+    def testOnlyOneRefreshRuns( self ):
+        self.assertTrue( self.coordinator.requestRefresh( None ) )
+        self.assertTrue( self.coordinator.isRunning() )
+        self.assertFalse( self.coordinator.requestRefresh( None ) )
+
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, None, False) )
+        self.assertEqual( self.coordinator.nextRefresh( None ), (False, None, False) )
+        self.assertFalse( self.coordinator.isRunning() )
+
+        self.assertTrue( self.coordinator.requestRefresh( None ) )
+
+    def testOverlappingFolders( self ):
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b/c' ) )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b' ) )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b/d/e' ) )
+
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, pathlib.Path( 'a/b' ), False) )
+        self.assertEqual( self.coordinator.nextRefresh( None ), (False, None, False) )
+
+    def testSiblingFolders( self ):
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b' ) )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/c' ) )
+
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, pathlib.Path( 'a' ), False) )
+
+    def testSameFolder( self ):
+        # the folder is returned as it was requested
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( 'a/b' )
+        self.coordinator.requestRefresh( 'a/b' )
+
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, 'a/b', False) )
+
+    def testSelectedFolder( self ):
+        # a folder of None is the selected folder
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b/c' ) )
+
+        self.assertEqual( self.coordinator.nextRefresh( pathlib.Path( 'a/b' ) ), (True, pathlib.Path( 'a/b' ), False) )
+
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( pathlib.Path( 'a/b/c' ) )
+
+        # without a selected folder the selected folder is refreshed
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, None, False) )
+
+    def testChangedOnly( self ):
+        self.coordinator.requestRefresh( None, changed_only=True )
+        self.coordinator.requestRefresh( None, changed_only=True )
+        self.coordinator.requestRefresh( None, changed_only=True )
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, None, True) )
+
+        # one full request makes the next refresh a full one
+        self.coordinator.requestRefresh( None, changed_only=True )
+        self.coordinator.requestRefresh( None, changed_only=False )
+        self.assertEqual( self.coordinator.nextRefresh( None ), (True, None, False) )
+
+        self.assertEqual( self.coordinator.nextRefresh( None ), (False, None, False) )
+
+    def testStale( self ):
+        self.coordinator.requestRefresh( None )
+        generation = self.coordinator.generation()
+        self.assertFalse( self.coordinator.isStale( generation ) )
+
+        self.coordinator.requestRefresh( None )
+        self.assertTrue( self.coordinator.isStale( generation ) )
+
+    def testRefreshAbandoned( self ):
+        self.coordinator.requestRefresh( None )
+        self.assertEqual( self.coordinator.refreshAbandoned( None ), (False, None, False) )
+        self.assertFalse( self.coordinator.isRunning() )
+
+        # waiting requests are given to the caller to start
+        self.coordinator.requestRefresh( None )
+        self.coordinator.requestRefresh( pathlib.Path( 'a' ) )
+        self.assertEqual( self.coordinator.refreshAbandoned( None ), (True, pathlib.Path( 'a' ), False) )
+        self.assertFalse( self.coordinator.isRunning() )
+        self.assertTrue( self.coordinator.requestRefresh( pathlib.Path( 'a' ) ) )
+
+if __name__ == '__main__':
+    unittest.main()